@@ -14,6 +14,40 @@ def _C(n, k):
     return factorial(n) / (factorial(k) * factorial(n - k))
 
 
+_bernstein_cache = {}
+
+
+def bernstein_basis(ni, nC):
+    """
+    Bernstein basis matrix of a Bezier curve with nC control points
+    evaluated at ni points evenly distributed in t = [0, 1].
+
+    The matrix is computed once for each (ni, nC) and cached.
+
+    returns
+    -------
+    B: array
+        read-only basis matrix of size ((ni, nC)), the curve
+        is obtained as ``np.dot(B, CPs)``
+    """
+
+    key = (ni, nC)
+    try:
+        return _bernstein_cache[key]
+    except KeyError:
+        pass
+
+    n = nC - 1
+    t = np.linspace(0., 1., ni)[:, np.newaxis]
+    m = np.arange(nC)
+    binom = np.array([_C(n, k) for k in m], dtype=float)
+    B = binom * t**m * (1. - t)**(n - m)
+    B.flags.writeable = False
+    _bernstein_cache[key] = B
+
+    return B
+
+
 class BezierCurve(Curve):
     """
     Computes a 2D/3D bezier curve
@@ -42,38 +76,31 @@ class BezierCurve(Curve):
         # self._s /= self._s[-1] 
         self.initialize(points)
 
-    # def _compute_dp(self):
-    #     """
-    #     computes the derivatives (tangent vectors) along a Bezier curve
-    #     wrt ``t``.
+    def _compute(self, C):
 
-    #     there is no trivial analytic function to compute derivatives wrt
-    #     to a given space interval, so we just spline and redistribute
-    #     see: http://pomax.github.io/bezierinfo/
-    #     """
-    #     C = np.zeros((self.CPs.shape[0] - 1, self.nd))
-    #     nC = C.shape[0]
-    #     for i in range(nC):
-    #         C[i, :] = float(nC) * (self.CPs[i + 1] - self.CPs[i])
+        self.t = np.linspace(0., 1., self.ni)
 
-    #     dp = self._compute(C)
+        return np.dot(bernstein_basis(self.ni, C.shape[0]), C)
 
-    def _compute(self, C):
+    def derivative(self, order=1):
+        """
+        analytic derivative of the curve wrt ``t``
 
-        points = np.zeros((self.ni, self.nd))
-        self.t = np.linspace(0., 1., self.ni)
-        # control point iterator
-        _n = xrange(C.shape[0])
-
-        for i in range(self.ni):
-            s = self.t[i]
-            n = _n[-1]
-            points[i, :] = 0.
-            for j in range(self.nd):
-                for m in _n:
-                    # compute bernstein polynomial
-                    b_i = _C(n, m) * s**m * (1 - s)**(n - m)
-                    # multiply ith control point by ith bernstein polynomial
-                    points[i, j] += C[m, j] * b_i
-
-        return points
+        parameters
+        ----------
+        order: int
+            order of the derivative
+
+        returns
+        -------
+        dp: array
+            derivative of the curve points of size ((ni, nd))
+        """
+
+        C = np.asarray(self.CPs, dtype=float)
+        for k in range(order):
+            if C.shape[0] < 2:
+                return np.zeros((self.ni, C.shape[1]))
+            C = (C.shape[0] - 1) * np.diff(C, axis=0)
+
+        return np.dot(bernstein_basis(self.ni, C.shape[0]), C)
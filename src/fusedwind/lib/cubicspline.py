@@ -81,3 +81,50 @@ class NaturalCubicSpline(object):
 
         else:
             return y
+
+
+def cubic_spline_basis(xp, x):
+    """
+    linear operator of the NaturalCubicSpline through the knots xp
+    evaluated at x, such that ``NaturalCubicSpline(xp, yp)(x) == np.dot(S, yp)``
+    for any yp.
+
+    returns
+    -------
+    S: array
+        basis matrix of size ((len(x), len(xp)))
+    """
+
+    if np.any(np.diff(xp) < 0):
+        raise TypeError('xp must be in ascending order')
+
+    x = np.atleast_1d(x)
+    m = len(xp)
+    eye = np.eye(m)
+
+    xk = xp[1:-1]
+    xkp = xp[2:]
+    xkm = xp[:-2]
+
+    # right hand side operator, b = Q * yp
+    Q = (eye[2:] - eye[1:-1]) / (xkp - xk)[:, np.newaxis] - \
+        (eye[1:-1] - eye[:-2]) / (xk - xkm)[:, np.newaxis]
+    l = (xk - xkm)/6.0
+    d = (xkp - xkm)/3.0
+    u = (xkp - xk)/6.0
+
+    # second derivatives as function of yp
+    fpp = np.zeros((m, m))
+    fpp[1:-1] = solve_banded((1, 1), np.matrix([u, d, l]), Q)
+
+    # find location in vector
+    j = np.clip(np.searchsorted(xp, x, side='right') - 1, 0, m - 2)
+    x1 = xp[j]
+    x2 = xp[j+1]
+
+    A = ((x2 - x)/(x2 - x1))[:, np.newaxis]
+    B = 1 - A
+    C = 1.0/6*(A**3 - A)*((x2 - x1)**2)[:, np.newaxis]
+    D = 1.0/6*(B**3 - B)*((x2 - x1)**2)[:, np.newaxis]
+
+    return A * eye[j] + B * eye[j+1] + C * fpp[j] + D * fpp[j+1]
@@ -1,7 +1,11 @@
-
 from __future__ import division
 import numpy as np
-from scipy.optimize import fsolve, root
+from collections import OrderedDict
+
+
+# cache of previously computed distributions, see distfunc
+_dist_cache = OrderedDict()
+_dist_cache_size = 256
 
 
 def distfunc(dinp, ival=1):
@@ -11,6 +15,10 @@ def distfunc(dinp, ival=1):
 
     Adapted from NN Soerensen's distfunc.f
 
+    Distributions are cached on the control point specification
+    rounded to 12 decimals, so repeated calls with the same
+    specification only compute the distribution once.
+
     parameters:
     -----------
     dinp: list
@@ -27,9 +35,23 @@ def distfunc(dinp, ival=1):
         distribed points
     """
 
-    dinp = np.asarray(dinp)
+    dinp = np.asarray(dinp, dtype=float)
+
+    key = (ival, dinp.shape, tuple(np.round(dinp, 12).flat))
+    try:
+        fdist = _dist_cache.pop(key)
+    except KeyError:
+        fdist = _distfunc(dinp, ival)
+        if len(_dist_cache) >= _dist_cache_size:
+            _dist_cache.popitem(last=False)
+    _dist_cache[key] = fdist
 
-    ndist=dinp[-1, 2]
+    return fdist.copy()
+
+
+def _distfunc(dinp, ival):
+
+    ndist = int(dinp[-1, 2])
     nn = len(dinp)
     fdist = np.zeros(ndist)
     dy = np.zeros(ndist)
@@ -37,14 +59,14 @@ def distfunc(dinp, ival=1):
     fdist[0] = 0.0
     s0 = dinp[0, 0]
     d0 = dinp[0, 1]
-    n0 = np.int(dinp[0, 2]) - 1
+    n0 = int(dinp[0, 2]) - 1
 
     for i in range(1, nn):
         s1 = dinp[i, 0]
         if i  > 0  and d0 < 0.:
             d0 = fdist[n0] - fdist[n0-1]
         d1 = dinp[i, 1]
-        n1 = np.int(dinp[i, 2]) - 1
+        n1 = int(dinp[i, 2]) - 1
         _len = s1 - s0
         delta1 = d0
         delta2 = d1
@@ -53,8 +75,7 @@ def distfunc(dinp, ival=1):
         if ival == 2:
             dy[n0:n1+1] = sinhdist(delta1, delta2, _len, n0, n1)
 
-        for j in range(n0 + 1, n1 + 1):
-            fdist[j]=fdist[n0] + dy[j]
+        fdist[n0 + 1:n1 + 1] = fdist[n0] + dy[n0 + 1:n1 + 1]
 
         s0 = s1
         d0 = d1
@@ -65,11 +86,12 @@ def distfunc(dinp, ival=1):
 def tanhdist(delta1=None,delta2=None,_len=None,i1=None,i2=None):
 
     if i2 == i1:
-        return fdist
+        return np.zeros(1)
     delta1=delta1 / _len
     delta2=delta2 / _len
     ni = i2 - i1
     fdist = np.zeros(ni + 1)
+    xi = np.arange(ni + 1) / ni
     if delta1 <= 0.0 and 1. / delta2 < ni:
         delta1=1 / (ni ** 2 * delta2 * 1.02)
     else:
@@ -80,39 +102,34 @@ def tanhdist(delta1=None,delta2=None,_len=None,i1=None,i2=None):
         b=1.0 / (ni * np.sqrt(delta1 * delta2))
         if b >= 1.0:
             delta=transsinh(b)
-            for i in range(ni + 1):
-                ftmp=0.5 * (1 + np.tanh(delta * (i / ni - 0.5)) / np.tanh(0.5 * delta))
-                fdist[i]=ftmp / (a + (1 - a) * ftmp)
+            ftmp=0.5 * (1 + np.tanh(delta * (xi - 0.5)) / np.tanh(0.5 * delta))
         else:
             delta=transtanh(b)
-            for i in range(ni + 1):
-                ftmp=0.5 * (1 + np.sinh(delta * (i  / ni - 0.5)) / np.sinh(0.5 * delta))
-                fdist[i]=ftmp / (a + (1 - a) * ftmp)
+            ftmp=0.5 * (1 + np.sinh(delta * (xi - 0.5)) / np.sinh(0.5 * delta))
+        fdist=ftmp / (a + (1 - a) * ftmp)
     else:
         if delta1 > 0.0:
             b=1.0 / (ni * delta1)
             delta=transsinh(b)
-            for i in range(ni + 1):
-                fdist[i]=1.0 + np.tanh(0.5 * delta * (i / ni - 1.0)) / np.tanh(0.5 * delta)
+            fdist=1.0 + np.tanh(0.5 * delta * (xi - 1.0)) / np.tanh(0.5 * delta)
         else:
             if delta2 > 0.0:
                 b=1.0 / (ni * delta2)
                 delta=transsinh(b)
-                for i in range(ni + 1):
-                    fdist[i]=np.tanh(0.5 * delta * i / ni) / np.tanh(0.5 * delta)
+                fdist=np.tanh(0.5 * delta * xi) / np.tanh(0.5 * delta)
             else:
                 print 'Error from tandist, no cell hight is given'
-    for i in range(ni + 1):
-        fdist[i]=fdist[i] * _len
-    return fdist
+    return fdist * _len
 
 def sinhdist(delta1=None,delta2=None,_len=None,i1=None,i2=None):
 
     if i2 == i1:
-        return fdist
+        return np.zeros(1)
     delta1=delta1 / _len
     delta2=delta2 / _len
     ni=i2 - i1
+    fdist = np.zeros(ni + 1)
+    xi = np.arange(ni + 1) / ni
     if ((delta1 <= 0.0) and ((1 / delta2) < ni)):
         delta1=1 / (ni ** 2 * delta2 * 1.02)
     else:
@@ -123,112 +140,97 @@ def sinhdist(delta1=None,delta2=None,_len=None,i1=None,i2=None):
         b=1.0 / (ni * np.sqrt(delta1 * delta2))
         if (b >= 1.0):
             delta=transsinh(b)
-            for i in range(ni+1):
-                ftmp=0.5 * (1 + np.tanh(delta * (i / ni - 0.5)) / np.tanh(0.5 * delta))
-                fdist[i]=ftmp / (a + (1 - a) * ftmp)
+            ftmp=0.5 * (1 + np.tanh(delta * (xi - 0.5)) / np.tanh(0.5 * delta))
         else:
             delta=transtanh(b)
-            for i in range(ni+1):
-                ftmp=0.5 * (1 + np.sinh(delta * (i / ni - 0.5)) / np.sinh(0.5 * delta))
-                fdist[i]=ftmp / (a + (1 - a) * ftmp)
+            ftmp=0.5 * (1 + np.sinh(delta * (xi - 0.5)) / np.sinh(0.5 * delta))
+        fdist=ftmp / (a + (1 - a) * ftmp)
     else:
         if (delta1 > 0.0):
             b=1.0 / (ni * delta1)
             delta=transsinh(b)
-            for i in range(ni+1):
-                fdist[i]=np.sinh(delta * i / ni) / np.sinh(delta)
+            fdist=np.sinh(delta * xi) / np.sinh(delta)
         else:
             if (delta2 > 0.0):
                 b=1.0 / (ni * delta2)
                 delta=transsinh(b)
-                for i in range(ni+1):
-                    fdist[i]=1 - np.sinh(delta * (1 - i / ni)) / np.sinh(delta)
+                fdist=1 - np.sinh(delta * (1 - xi)) / np.sinh(delta)
             else:
-                disp_([char(' Error from tandist, no cell hight is given ')])
-    for i in range(ni):
-        fdist[i]=fdist[i] * _len
-    return fdist
+                print 'Error from sinhdist, no cell hight is given'
+    return fdist * _len
 
-def transsinh(b):
+def _newton(f, x0, lo, hi, rtol=1.e-13, nmax=100):
     """
-    solve the transcendental equation
-
-    b=sinh(delta)/delta
-    
-    using scipy.optimize.root
+    safeguarded scalar Newton-Raphson iteration for a monotonic function
+    f with a root in [lo, hi]. f returns the residual and its derivative.
+    Steps leaving the bracket are replaced by bisection.
     """
-    res = root(_transsinh, 1., args=(b))
-
-    return res['x']
-
 
-def _transsinh(delta, b):
-
-    return delta / (np.sinh(delta) + 1.0 * 10 ** (- 60)) - 1.0 / b
+    x = x0
+    for n in range(nmax):
+        r, dr = f(x)
+        if r == 0.:
+            return x
+        # update bracket
+        if (r > 0.) == (dr > 0.):
+            hi = x
+        else:
+            lo = x
+        xnew = x - r / dr
+        if not lo < xnew < hi:
+            xnew = 0.5 * (lo + hi)
+        if abs(xnew - x) <= rtol * abs(xnew):
+            return xnew
+        x = xnew
+    print ' Convergence problem in distfunc Newton solver, residual ', r
+    return x
 
-def transtanh(b):
+def transsinh(b):
     """
     solve the transcendental equation
 
     b=sinh(delta)/delta
-    
-    using scipy.optimize.root
-    """
-    res = root(_transtanh, 1., args=(b))
-
-    return res['x']
-
-def _transtanh(delta, b):
 
-    return delta / (np.tanh(0.5 * delta) + 1.0 * 10 ** (- 60)) - 2.0 / b
-
-def transsinh_(b=None):
+    for delta > 0 using a safeguarded Newton iteration
     """
-    unused fortran translation of Newton-Raphson solver for
-    solving the transcendental equation
+    # small delta series, sinh(delta)/delta = 1 + delta**2 / 6,
+    # delta is bounded away from zero to avoid 0/0 in the distributions
+    delta = np.sqrt(6. * max(b - 1., 0.))
+    if delta < 1.e-4:
+        return max(delta, 1.e-6)
+    if b > 2.:
+        delta = np.log(2. * b) + np.log(np.log(2. * b))
+    hi = 2. * delta + 1.
+    while np.sinh(hi) / hi < b:
+        hi *= 2.
+
+    def f(x):
+        # log(sinh(x)/x) - log(b)
+        return np.log(np.sinh(x) / x / b), 1. / np.tanh(x) - 1. / x
+
+    return _newton(f, min(delta, hi), 0., hi)
 
-    b=sinh(delta)/delta
-    """
-    rlim=1.e-6
-    nmax=300
-    delta=1.0
-    delta_old=delta
-    for n in range(nmax):
-        f=delta / (np.sinh(delta) + 1.0 * 10 ** (- 60)) - 1.0 / b
-        df=(np.sinh(delta) - delta * np.cosh(delta)) / np.sinh(delta) ** 2
-        delta=delta - 0.5 * f / df
-        if ((n == nmax) and (np.abs((delta - delta_old) / delta_old) > rlim)):
-            disp_([char(' Convergence problem in transsinh dist. function !!! ')])
-            disp_([char(' residual '),num2str_((delta - delta_old) / delta_old)])
-        delta_old=delta
-    return delta
-
-def transtanh_(b=None):
+def transtanh(b):
     """
-    unused fortran translation of Newton-Raphson solver for
-    solving the transcendental equation
+    solve the transcendental equation
 
-    b=tanh(delta)/delta
+    b=tanh(delta/2)/(delta/2)
+
+    for delta > 0 using a safeguarded Newton iteration
     """
-    if (b > 1.0):
-        print ' Error form transtanh: Can not be gridded '
-        return delta
-    rlim=1.e-6
-    nmax=100000
-    delta=1.0
-    delta_old=delta
-    for n in range(nmax):
-        f=delta / (np.tanh(0.5 * delta) + 1.0 * 10 ** (- 60)) - 2.0 / b
-        df=(np.tanh(0.5 * delta) - delta * (1 - np.tanh(0.5 * delta) ** 2)) / (np.tanh(0.5 * delta) ** 2 + 1.0 * 10 ** (- 60))
-        delta=delta - 0.5 * f / df
-        res = np.abs((delta - delta_old)/ delta_old)
-        if res < rlim: return delta
-        if ((n == nmax) and ( res > rlim)):
-            print ' Convergence problem in transtanh dist. function !!! '
-            print ' residual ',((delta - delta_old) / delta_old)
-            print 'n= ', n, '  nmax=',nmax, '   delta=', delta, '   delta_old=',delta_old,'  rlim=',rlim
-        delta_old= delta
-    return delta
+    # small delta series, tanh(u)/u = 1 - u**2 / 3
+    u = np.sqrt(3. * max(1. - b, 0.))
+    if u < 1.e-4:
+        return max(2. * u, 1.e-6)
+    if b < 0.5:
+        u = 1. / b
+    hi = 2. / b
+
+    def f(x):
+        # log(tanh(x)/x) - log(b)
+        return np.log(np.tanh(x) / x / b), 2. / np.sinh(min(2. * x, 700.)) - 1. / x
+
+    return 2. * _newton(f, min(u, hi), 0., hi)
 
 if __name__ == '__main__':
 
@@ -0,0 +1,494 @@
+import numpy as np
+import numpy.random as npr
+from math import pi
+from itertools import product
+from collections import OrderedDict
+from scipy.special import ndtri, comb
+from scipy.stats import vonmises
+
+
+# primitive polynomials and initial direction numbers m_1..m_s of the
+# Sobol sequence for dimensions 2-21, from Joe and Kuo (new-joe-kuo-6.21201)
+_sobol_poly = [
+    (3, [1]),
+    (7, [1, 3]),
+    (11, [1, 3, 1]),
+    (13, [1, 1, 1]),
+    (19, [1, 1, 3, 3]),
+    (25, [1, 3, 5, 13]),
+    (37, [1, 1, 5, 5, 17]),
+    (41, [1, 1, 5, 5, 5]),
+    (47, [1, 1, 7, 11, 19]),
+    (55, [1, 1, 5, 1, 1]),
+    (59, [1, 1, 1, 3, 11]),
+    (61, [1, 3, 5, 5, 31]),
+    (67, [1, 3, 3, 9, 7, 49]),
+    (91, [1, 1, 1, 15, 21, 21]),
+    (97, [1, 3, 1, 13, 27, 49]),
+    (103, [1, 1, 1, 15, 7, 5]),
+    (109, [1, 3, 1, 15, 13, 25]),
+    (115, [1, 1, 5, 5, 19, 61]),
+    (131, [1, 3, 7, 11, 23, 15, 103]),
+    (137, [1, 3, 7, 13, 13, 15, 69])]
+
+# number of bits of the Sobol points
+_bits = 32
+
+
+def _random_state(seed):
+    """
+    random number generator for seed, the global numpy generator if None
+    """
+
+    if seed is None:
+        return npr
+    if isinstance(seed, npr.RandomState):
+        return seed
+    return npr.RandomState(seed)
+
+
+def _primes(n):
+    """
+    the first n prime numbers
+    """
+
+    primes = []
+    k = 2
+    while len(primes) < n:
+        if all(k % p for p in primes):
+            primes.append(k)
+        k += 1
+    return primes
+
+
+def _sobol_directions(dim):
+    """
+    direction numbers V[j, k] = m_k * 2**(bits - k) of the Sobol sequence
+    """
+
+    if dim > len(_sobol_poly) + 1:
+        raise ValueError('Sobol sequence only available up to %i dimensions' % (len(_sobol_poly) + 1))
+
+    V = np.zeros((dim, _bits), dtype=np.int64)
+    V[0] = 1 << np.arange(_bits - 1, -1, -1)
+    for j in range(1, dim):
+        p, m = _sobol_poly[j - 1]
+        s = len(m)
+        a = (p >> 1) & ((1 << (s - 1)) - 1)
+        v = [m[k] << (_bits - 1 - k) for k in range(s)]
+        for k in range(s, _bits):
+            x = v[k - s] ^ (v[k - s] >> s)
+            for i in range(1, s):
+                if (a >> (s - 1 - i)) & 1:
+                    x ^= v[k - i]
+            v.append(x)
+        V[j] = v
+    return V
+
+
+def _scramble_directions(V, rng):
+    """
+    linear matrix scrambling of direction numbers with random lower
+    triangular binary matrices with unit diagonal
+    """
+
+    shifts = _bits - 1 - np.arange(_bits)
+    for j in range(V.shape[0]):
+        L = np.tril(rng.randint(2, size=(_bits, _bits)), -1) + np.eye(_bits, dtype=np.int64)
+        digits = (V[j][:, None] >> shifts) & 1
+        digits = np.dot(digits, L.T) % 2
+        V[j] = (digits << shifts).sum(axis=1)
+    return V
+
+
+def sobol(n, dim, scramble=True, seed=None):
+    """
+    points of the Sobol low discrepancy sequence
+
+    The scrambled sequence uses linear matrix scrambling and a random
+    digital shift, and a random offset within the resolution of the
+    points, such that each point is uniformly distributed and estimates
+    based on independently scrambled replicates are unbiased.
+    For best uniformity n should be a power of two.
+
+    parameters
+    ----------
+    n: int
+        number of points
+    dim: int
+        number of dimensions, at most 21
+    scramble: bool
+        flag for scrambling the sequence
+    seed: int
+        seed of the random number generator for the scrambling, or
+        RandomState object. If None the global numpy generator is used.
+
+    returns
+    -------
+    u: array
+        [n, dim] array of points in the unit hypercube
+    """
+
+    rng = _random_state(seed)
+    V = _sobol_directions(dim)
+    if scramble:
+        V = _scramble_directions(V, rng)
+
+    i = np.arange(n, dtype=np.int64)
+    gray = i ^ (i >> 1)
+    x = np.zeros((n, dim), dtype=np.int64)
+    for k in range(_bits):
+        mask = ((gray >> k) & 1).astype(bool)
+        x[mask] ^= V[:, k]
+
+    if scramble:
+        shifts = _bits - 1 - np.arange(_bits)
+        shift = (rng.randint(2, size=(dim, _bits)) << shifts).sum(axis=1)
+        x ^= shift
+        offset = rng.uniform(size=(n, dim))
+    else:
+        offset = 0.5
+    return (x + offset) / 2.**_bits
+
+
+def halton(n, dim, scramble=True, seed=None):
+    """
+    points of the Halton low discrepancy sequence, starting at index 1
+
+    The scrambled sequence uses random permutations of the digits in
+    each base and digit position and a random offset within the
+    resolution of the points, such that each point is uniformly
+    distributed and estimates based on independently scrambled
+    replicates are unbiased.
+
+    parameters
+    ----------
+    n: int
+        number of points
+    dim: int
+        number of dimensions
+    scramble: bool
+        flag for scrambling the sequence
+    seed: int
+        seed of the random number generator for the scrambling, or
+        RandomState object. If None the global numpy generator is used.
+
+    returns
+    -------
+    u: array
+        [n, dim] array of points in the unit hypercube
+    """
+
+    rng = _random_state(seed)
+    u = np.zeros((n, dim))
+    for j, b in enumerate(_primes(dim)):
+        i = np.arange(1, n + 1)
+        ndigits = int(np.ceil(np.log(n + 1) / np.log(b))) + 1
+        scale = 1.
+        for k in range(ndigits):
+            scale /= b
+            d = i % b
+            i = i // b
+            if scramble:
+                d = rng.permutation(b)[d]
+            u[:, j] += d * scale
+        if scramble:
+            u[:, j] += rng.uniform(size=n) * scale
+    return u
+
+
+def latin_hypercube(n, dim, seed=None):
+    """
+    Latin hypercube sample: each dimension is divided in n equally
+    probable intervals that each contain one point
+
+    parameters
+    ----------
+    n: int
+        number of points
+    dim: int
+        number of dimensions
+    seed: int
+        seed of the random number generator, or RandomState object.
+        If None the global numpy generator is used.
+
+    returns
+    -------
+    u: array
+        [n, dim] array of points in the unit hypercube
+    """
+
+    rng = _random_state(seed)
+    u = np.zeros((n, dim))
+    for j in range(dim):
+        u[:, j] = (rng.permutation(n) + rng.uniform(size=n)) / n
+    return u
+
+
+def uniform_points(n, dim, method='random', seed=None):
+    """
+    points in the unit hypercube, to be mapped to samples of a distribution
+    by its inverse cumulative distribution function
+
+    parameters
+    ----------
+    n: int
+        number of points
+    dim: int
+        number of dimensions
+    method: str
+        'random' for pseudo random points, 'lhs' for Latin hypercube
+        sampling, 'sobol' or 'halton' for scrambled low discrepancy points
+    seed: int
+        seed of the random number generator, or RandomState object.
+        If None the global numpy generator is used.
+
+    returns
+    -------
+    u: array
+        [n, dim] array of points
+    """
+
+    if method == 'random':
+        return _random_state(seed).uniform(size=(n, dim))
+    elif method == 'lhs':
+        return latin_hypercube(n, dim, seed)
+    elif method == 'sobol':
+        return sobol(n, dim, seed=seed)
+    elif method == 'halton':
+        return halton(n, dim, seed=seed)
+    raise ValueError('unknown sampling method %s' % method)
+
+
+def ppf_vonmises(p, kappa, loc):
+    """
+    inverse cumulative distribution function of the von Mises distribution
+    computed by safeguarded Newton iteration, with the values wrapped to
+    [-pi, pi] like numpy.random.vonmises
+
+    parameters
+    ----------
+    p: array
+        probabilities
+    kappa: array
+        concentration parameters
+    loc: array
+        locations
+
+    returns
+    -------
+    x: array
+        angles in radians
+    """
+
+    p, kappa, loc = np.broadcast_arrays(np.asarray(p, dtype=float),
+                                        np.asarray(kappa, dtype=float),
+                                        np.asarray(loc, dtype=float))
+    lo = -pi * np.ones(p.shape)
+    hi = pi * np.ones(p.shape)
+    x = np.clip(ndtri(p) / np.sqrt(np.maximum(kappa, 1.e-6)), -pi, pi)
+    for i in range(100):
+        F = vonmises.cdf(x, kappa) - p
+        lo = np.where(F < 0, x, lo)
+        hi = np.where(F > 0, x, hi)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xn = x - F / vonmises.pdf(x, kappa)
+        bad = ~np.isfinite(xn) | (xn <= lo) | (xn >= hi)
+        xn = np.where(bad, 0.5 * (lo + hi), xn)
+        done = np.abs(xn - x).max() < 1.e-12 if xn.size > 0 else True
+        x = xn
+        if done:
+            break
+    return np.mod(x + loc + pi, 2 * pi) - pi
+
+
+def _tensor(axes):
+    """
+    [N, dim] array of all combinations of the values of the axes,
+    ordered with the first axis running fastest
+    """
+
+    grids = np.meshgrid(*axes, indexing='ij')
+    return np.array([g.ravel(order='F') for g in grids]).T
+
+
+def grid_points(xmin, xmax, ns):
+    """
+    points of a regular tensor grid including the bounds, ordered with the
+    first index running fastest
+
+    parameters
+    ----------
+    xmin: array
+        lower bounds
+    xmax: array
+        upper bounds
+    ns: array
+        number of points in each dimension
+
+    returns
+    -------
+    x: array
+        [prod(ns), dim] array of points
+    dx: array
+        grid spacing in each dimension
+    """
+
+    xmin = np.atleast_1d(np.asarray(xmin, dtype=float))
+    xmax = np.atleast_1d(np.asarray(xmax, dtype=float))
+    ns = np.atleast_1d(ns).astype(int)
+    dx = (xmax - xmin) / (ns - 1.)
+    return _tensor([xmin[j] + dx[j] * np.arange(ns[j]) for j in range(len(ns))]), dx
+
+
+def clenshaw_curtis(n):
+    """
+    nodes and weights of the n point Clenshaw-Curtis rule on [-1, 1].
+    The rules with 1, 3, 5, 9, 17, ... points are nested.
+    """
+
+    if n == 1:
+        return np.zeros(1), 2. * np.ones(1)
+    N = n - 1
+    theta = pi * np.arange(n) / N
+    x = -np.cos(theta)
+    x[abs(x) < 1.e-15] = 0.
+    w = np.ones(n)
+    for k in range(1, N // 2 + 1):
+        b = 1. if 2 * k == N else 2.
+        w -= b / (4. * k**2 - 1) * np.cos(2 * k * theta)
+    c = 2. * np.ones(n)
+    c[0] = c[-1] = 1.
+    return x, c * w / N
+
+
+def quadrature_rule(rule, n, a=-1., b=1.):
+    """
+    nodes and weights of a one dimensional quadrature rule on [a, b]
+
+    parameters
+    ----------
+    rule: str
+        'uniform' for equally spaced nodes including the bounds with equal
+        weights, 'trapezoid', 'gauss' for Gauss-Legendre or 'clenshaw_curtis'
+    n: int
+        number of nodes
+    a: float
+        lower bound
+    b: float
+        upper bound
+
+    returns
+    -------
+    x: array
+        nodes
+    w: array
+        weights
+    """
+
+    if rule in ['uniform', 'trapezoid']:
+        x = np.linspace(a, b, n)
+        w = (b - a) / (n - 1.) * np.ones(n)
+        if rule == 'trapezoid':
+            w[0] *= 0.5
+            w[-1] *= 0.5
+        return x, w
+    elif rule == 'gauss':
+        x, w = np.polynomial.legendre.leggauss(n)
+    elif rule == 'clenshaw_curtis':
+        x, w = clenshaw_curtis(n)
+    else:
+        raise ValueError('unknown quadrature rule %s' % rule)
+    return a + 0.5 * (b - a) * (x + 1.), 0.5 * (b - a) * w
+
+
+def tensor_rule(rule, ns, xmin, xmax):
+    """
+    nodes and weights of the tensor product of one dimensional quadrature
+    rules, ordered with the first index running fastest
+
+    parameters
+    ----------
+    rule: str
+        one dimensional rule, see quadrature_rule
+    ns: array
+        number of nodes in each dimension
+    xmin: array
+        lower bounds
+    xmax: array
+        upper bounds
+
+    returns
+    -------
+    x: array
+        [prod(ns), dim] array of nodes
+    w: array
+        weights
+    """
+
+    xmin = np.atleast_1d(xmin)
+    xmax = np.atleast_1d(xmax)
+    ns = np.atleast_1d(ns)
+    rules = [quadrature_rule(rule, ns[j], xmin[j], xmax[j]) for j in range(len(ns))]
+    x = _tensor([r[0] for r in rules])
+    w = _tensor([r[1] for r in rules]).prod(axis=1)
+    return x, w
+
+
+def smolyak_rule(level, xmin, xmax, rule='clenshaw_curtis'):
+    """
+    nodes and weights of the Smolyak sparse grid rule, built by the
+    combination technique from one dimensional rules with 1, 3, 5, 9, ...
+    nodes for Clenshaw-Curtis or 1, 3, 5, 7, ... nodes for Gauss-Legendre.
+    Nodes shared by several tensor rules are merged, which for the nested
+    Clenshaw-Curtis rules gives the sparse grid with the fewest nodes.
+    Level 1 is the midpoint rule; the rule of level l is exact for
+    polynomials of total degree 2l - 1.
+
+    parameters
+    ----------
+    level: int
+        level of the rule
+    xmin: array
+        lower bounds
+    xmax: array
+        upper bounds
+    rule: str
+        'clenshaw_curtis' or 'gauss'
+
+    returns
+    -------
+    x: array
+        [n, dim] array of nodes
+    w: array
+        weights, some of which are negative
+    """
+
+    xmin = np.atleast_1d(np.asarray(xmin, dtype=float))
+    xmax = np.atleast_1d(np.asarray(xmax, dtype=float))
+    dim = len(xmin)
+    if rule == 'clenshaw_curtis':
+        npts = lambda i: 1 if i == 1 else 2**(i - 1) + 1
+    elif rule == 'gauss':
+        npts = lambda i: 2 * i - 1
+    else:
+        raise ValueError('unknown quadrature rule %s' % rule)
+
+    q = level + dim - 1
+    nodes = OrderedDict()
+    for idx in product(range(1, level + 1), repeat=dim):
+        s = sum(idx)
+        if s < max(dim, q - dim + 1) or s > q:
+            continue
+        c = (-1)**(q - s) * comb(dim - 1, q - s, exact=True)
+        x, w = tensor_rule(rule, [npts(i) for i in idx], -np.ones(dim), np.ones(dim))
+        for xi, wi in zip(np.round(x, 12) + 0., c * w):
+            xi = tuple(xi)
+            nodes[xi] = nodes.get(xi, 0.) + wi
+
+    x = np.array(nodes.keys())
+    w = np.array(nodes.values())
+    keep = abs(w) > 1.e-14 * abs(w).sum()
+    x = xmin + 0.5 * (xmax - xmin) * (x[keep] + 1.)
+    w = w[keep] * np.prod(0.5 * (xmax - xmin))
+    return x, w
@@ -0,0 +1,332 @@
+import os
+import time
+import json
+import signal
+from math import ceil
+from collections import OrderedDict
+from multiprocessing import Pool
+
+
+class JobTimeout(Exception):
+    """
+    raised in a job that exceeds its time limit
+    """
+    pass
+
+
+def _alarm(signum, frame):
+
+    raise JobTimeout('job exceeded its time limit')
+
+
+def _call(func, data, timeout):
+    """
+    call func(data), raising JobTimeout after timeout seconds
+    """
+
+    if not timeout:
+        return func(data)
+    handler = signal.signal(signal.SIGALRM, _alarm)
+    signal.alarm(int(ceil(timeout)))
+    try:
+        return func(data)
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, handler)
+
+
+def _run_job(args):
+    """
+    run a single job in its run directory, retrying on failure with
+    exponential backoff. Module level to allow pickling.
+
+    returns (key, status, result or error message, number of attempts)
+    """
+
+    func, key, data, timeout, retries, backoff, rundir = args
+    cwd = os.getcwd()
+    if rundir is not None:
+        os.chdir(rundir)
+    try:
+        for n in range(retries + 1):
+            try:
+                return key, 'done', _call(func, data, timeout), n + 1
+            except Exception, e:
+                err = '%s: %s' % (e.__class__.__name__, e)
+            if n < retries:
+                print 'job %s failed (%s), retry %i of %i' % (key, err, n + 1, retries)
+                time.sleep(backoff * 2**n)
+        return key, 'failed', err, retries + 1
+    finally:
+        os.chdir(cwd)
+
+
+class JobQueue(object):
+    """
+    Queue of jobs stored in an append-only journal file, such that a
+    campaign can be resumed after an interruption.
+
+    Each job has a unique string key, JSON serializable data passed to the
+    function running the job, and a status 'pending', 'done' or 'failed'.
+    Every change of a job is appended to the journal as a line
+    ``[key, changes]``; when the journal is read the last entry of each
+    field wins, and a line that was partially written when the process was
+    interrupted is ignored.
+
+    Parameters
+    ----------
+    fname: str
+        path to the journal file, created if it does not exist.
+        If None the queue is kept in memory only.
+    """
+
+    def __init__(self, fname=None):
+
+        self.fname = fname
+        self.jobs = OrderedDict()
+        self._fout = None
+        self._partial = False
+        if fname is not None and os.path.exists(fname):
+            for ln in file(fname):
+                self._partial = not ln.endswith('\n')
+                try:
+                    key, entry = json.loads(ln)
+                except ValueError:
+                    continue
+                self.jobs.setdefault(key, {}).update(entry)
+
+    def _write(self, key, entry):
+
+        self.jobs.setdefault(key, {}).update(entry)
+        if self.fname is None:
+            return
+        if self._fout is None:
+            self._fout = file(self.fname, 'a')
+            if self._partial:
+                self._fout.write('\n')
+        self._fout.write(json.dumps([key, entry]) + '\n')
+        self._fout.flush()
+
+    def __len__(self):
+
+        return len(self.jobs)
+
+    def __contains__(self, key):
+
+        return key in self.jobs
+
+    def __getitem__(self, key):
+
+        return self.jobs[key]
+
+    def add(self, key, data, **info):
+        """
+        add a pending job, unless a job with this key exists already
+
+        parameters
+        ----------
+        key: str
+            unique name of the job
+        data: object
+            JSON serializable input of the job
+        info: dict
+            optional JSON serializable fields stored with the job, e.g. the
+            parameters of the case and the location of its outputs
+        """
+
+        if key not in self.jobs:
+            info.update(data=data, status='pending')
+            self._write(key, info)
+
+    def mark(self, key, status, **info):
+        """
+        set the status of a job, and optionally other fields, e.g. the number
+        of attempts or an error message
+        """
+
+        info['status'] = status
+        self._write(key, info)
+
+    def keys(self, status=None):
+        """
+        keys of the jobs, optionally only those with the given status
+        """
+
+        return [k for k, v in self.jobs.iteritems() if status is None or v['status'] == status]
+
+    def reset(self, status='failed'):
+        """
+        set the jobs with the given status back to pending
+        """
+
+        for key in self.keys(status):
+            self.mark(key, 'pending')
+
+    def close(self):
+
+        if self._fout is not None:
+            self._fout.close()
+            self._fout = None
+
+
+class LocalScheduler(object):
+    """
+    Run a campaign of independent jobs, e.g. aeroelastic simulations of
+    the cases of a load case table, in a pool of local worker processes.
+
+    The pending jobs of the queue are run by ``func`` with at most nproc
+    jobs running at a time. Each job is retried up to ``retries`` times,
+    waiting ``backoff * 2**n`` seconds before retry n + 1, and interrupted
+    after ``timeout`` seconds. Results are passed to the collector in the
+    main process in the order the jobs complete, after which the job is
+    marked done in the queue. A campaign interrupted at any point is
+    resumed by calling run again with a queue on the same journal file;
+    jobs that failed all their attempts are retried after
+    ``queue.reset()``. Jobs whose outputs exist and are valid according
+    to ``validate`` are not run again, also when they are missing from the
+    queue or marked failed, e.g. after the journal was lost.
+
+    Timeouts use SIGALRM and are only available on Unix. A timeout
+    interrupts func in the worker process, so func should terminate any
+    external process it started when it catches JobTimeout.
+
+    Parameters
+    ----------
+    func: callable
+        function taking the job data as argument and returning its result.
+        With nproc > 1 func and the results need to be picklable, i.e. func
+        has to be defined at module level.
+    nproc: int
+        number of worker processes
+    timeout: float
+        maximum run time of a single attempt of a job in seconds, or None
+    retries: int
+        number of times a failed job is retried
+    backoff: float
+        time in seconds to wait before the first retry
+    queue: object
+        JobQueue object, defaults to an in-memory queue
+    rundir: str
+        optional root directory in which each job runs in a subdirectory
+        named by its key, created if it does not exist
+    link_files: list
+        paths of files or directories linked into the run directory of
+        each job, e.g. input templates of the aeroelastic code
+    validate: callable
+        optional function called as validate(key, data) for the jobs that
+        are not done, returning True if the outputs of the job exist and are
+        valid. These jobs are marked done without running them and passed to
+        the collector with result None.
+    """
+
+    def __init__(self, func, nproc=1, timeout=None, retries=0, backoff=1., queue=None,
+                 rundir=None, link_files=[], validate=None):
+
+        self.func = func
+        self.nproc = nproc
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        if queue is None:
+            queue = JobQueue()
+        self.queue = queue
+        self.rundir = rundir
+        self.link_files = link_files
+        self.validate = validate
+
+    def _setup_rundir(self, key):
+        """
+        create the run directory of a job and link the input files into it
+        """
+
+        if self.rundir is None:
+            return None
+        path = os.path.abspath(os.path.join(self.rundir, key))
+        if not os.path.exists(path):
+            os.makedirs(path)
+        for f in self.link_files:
+            dst = os.path.join(path, os.path.basename(os.path.normpath(f)))
+            if not os.path.lexists(dst):
+                os.symlink(os.path.abspath(f), dst)
+        return path
+
+    def run(self, jobs=[], collector=None, stop=None):
+        """
+        add jobs to the queue and run those that are pending, or all pending
+        jobs of the queue if no jobs are given
+
+        parameters
+        ----------
+        jobs: list
+            list of (key, data) tuples of jobs to add to the queue. Jobs
+            with a key that is already in the queue are not added again.
+        collector: callable
+            function called as collector(key, result) for each completed job,
+            with result None for jobs with existing valid outputs
+        stop: callable
+            function called as stop(key, result) after the collector, returning
+            True to stop the campaign, e.g.
+            ``lambda key, res: monitor.update(res)`` with a
+            runSummation.ConvergenceMonitor. The remaining jobs are left
+            pending.
+
+        returns
+        -------
+        ndone: int
+            number of jobs completed in this call
+        """
+
+        for key, data in jobs:
+            self.queue.add(key, data)
+        if len(jobs) > 0:
+            keys = [key for key, data in jobs]
+        else:
+            keys = self.queue.keys()
+
+        ndone = 0
+        todo = []
+        for key in keys:
+            job = self.queue[key]
+            if job['status'] == 'done':
+                continue
+            if self.validate is not None and self.validate(key, job['data']):
+                if collector is not None:
+                    collector(key, None)
+                self.queue.mark(key, 'done', attempts=0)
+                ndone += 1
+            elif job['status'] == 'pending':
+                todo.append(key)
+        args = [(self.func, key, self.queue[key]['data'], self.timeout, self.retries,
+                 self.backoff, self._setup_rundir(key)) for key in todo]
+
+        pool = None
+        if self.nproc > 1 and len(args) > 1:
+            pool = Pool(min(self.nproc, len(args)))
+            results = pool.imap_unordered(_run_job, args)
+        else:
+            results = (_run_job(a) for a in args)
+
+        finished = False
+        try:
+            for key, status, res, attempts in results:
+                if status == 'done':
+                    if collector is not None:
+                        collector(key, res)
+                    self.queue.mark(key, 'done', attempts=attempts)
+                    ndone += 1
+                    if stop is not None and stop(key, res):
+                        break
+                else:
+                    print 'job %s failed after %i attempts: %s' % (key, attempts, res)
+                    self.queue.mark(key, 'failed', attempts=attempts, error=res)
+            else:
+                finished = True
+        finally:
+            if pool is not None:
+                if finished:
+                    pool.close()
+                else:
+                    pool.terminate()
+                pool.join()
+
+        return ndone
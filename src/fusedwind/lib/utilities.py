@@ -129,6 +129,46 @@ def interp_with_deriv(x, xp, yp):
     return y, np.diag(dydx), dydxp, dydyp
 
 
+def interp_weights(x, xp):
+    """bracketing indices and weights for linear interpolation onto x,
+    such that y = (1 - w) * yp[i] + w * yp[i+1].
+    xp must be in ascending order, x outside xp is clamped to the end
+    values as done by np.interp"""
+
+    xp = np.asarray(xp, dtype=float)
+    x = np.clip(np.asarray(x, dtype=float), xp[0], xp[-1])
+
+    i = np.clip(np.searchsorted(xp, x, side='right') - 1, 0, xp.shape[0] - 2)
+    w = (x - xp[i]) / (xp[i + 1] - xp[i])
+
+    return i, w
+
+
+class Tab2(object):
+    """bilinear interpolation in a table z of size ((len(y), len(x))),
+    i.e. f(x, y) with x along the columns and y along the rows.
+    x and y need not be sorted, points outside the table are clamped
+    to its edges as done by scipy.interpolate.interp2d.
+    Unlike interp2d, f(x, y) is evaluated at the scattered points
+    (x[k], y[k]) rather than on the grid spanned by x and y"""
+
+    def __init__(self, x, y, z):
+
+        ix = np.argsort(x)
+        iy = np.argsort(y)
+        self.x = np.asarray(x, dtype=float)[ix]
+        self.y = np.asarray(y, dtype=float)[iy]
+        self.z = np.asarray(z, dtype=float)[iy][:, ix]
+
+    def __call__(self, x, y):
+
+        i, wx = interp_weights(x, self.x)
+        j, wy = interp_weights(y, self.y)
+        z = self.z
+        return (1. - wy) * ((1. - wx) * z[j, i] + wx * z[j, i + 1]) + \
+               wy * ((1. - wx) * z[j + 1, i] + wx * z[j + 1, i + 1])
+
+
 def cubic_with_deriv(x, xp, yp):
     """deprecated"""
 
@@ -9,6 +9,7 @@ from openmdao.lib.drivers.caseiterdriver import CaseIteratorDriver
 from openmdao.main.datatypes.api import Int
 
 import os, types
+from collections import OrderedDict
 from math import pi
 import numpy as np
 
@@ -43,6 +44,8 @@ from fusedwind.runSuite.runAero import FUSEDIECBase, openAeroCode, PGrafObject
 #from fusedwind.runSuite.runAero import FUSEDIECBase
 
 from fusedwind.runSuite.runCase import GenericRunCase
+from fusedwind.lib.scheduler import JobQueue, LocalScheduler
+from fusedwind.runSuite.runSummation import ConvergenceMonitor
 
 #from runAero import PGrafObject
 
@@ -177,6 +180,26 @@ class PGrafAssembly(Assembly):
 
 ##########################################
 
+# CaseAnalyzer running its cases with run_local(), inherited by the forked worker processes
+_local_analyzer = None
+
+def _external_codes(comp):
+    """ ExternalCode components of an assembly, including those of nested assemblies """
+    if isinstance(comp, ExternalCode):
+        return [comp]
+    codes = []
+    if isinstance(comp, Assembly):
+        for name in comp.list_components():
+            codes += _external_codes(getattr(comp, name))
+    return codes
+
+def _run_local_case(h):
+    """ run the case with hash h of the CaseAnalyzer in a worker process """
+    runner = _local_analyzer.aerocode
+    runner.inputs = _local_analyzer.hashed_cases[h]
+    runner.run()
+    return h
+
 
 ## orchestrate process with CaseIteratorDriver
 class CaseAnalyzer(Assembly):
@@ -292,19 +315,11 @@ class CaseAnalyzer(Assembly):
 
         # note NO output; collecting it by hand from file system
 
-    def collect_output(self, output_params):
-        print "RUNS ARE DONE:"
-        print "collecting output from copied-back files (not from case recorder), see %s" % output_params['main_output_file']
-        fout = file(output_params['main_output_file'], "w")
-        fres = file("failed_cases.txt", "w")
+    def output_setup(self, output_params):
+        """ parameter names, output names and postprocessing operations of the main output file """
         acase = self.runcases[0]._inputs['runner.inputs'] ## any easier way to get this back?
         print "processing case", acase
         parms = acase.sample.keys()
-        for p in parms:
-            fout.write("%s " % p)
-            fres.write("%s " % p)
-        fout.write("   ")
-        fres.write("   ")
         if "output_operations" not in output_params:
             output_ops = ["max"]
         else:
@@ -314,61 +329,209 @@ class CaseAnalyzer(Assembly):
         outnames = output_params['output_keys']
         if (isinstance(outnames, basestring)):
             outnames = [outnames]
+        return parms, outnames, output_ops
+
+    def write_output_header(self, fout, fres, parms, outnames, output_ops):
+        for p in parms:
+            fout.write("%s " % p)
+            fres.write("%s " % p)
+        fout.write("   ")
+        fres.write("   ")
         if ("raw" in output_ops):
             fout.write("FAST output directory\n")
         else:
-            for op in output_ops:
-                if (":" in op):
-                    op = op.split(":")[1]
-                for p in outnames:
-                    fout.write("%s_%s " % (op,p))
+            for col in self.output_columns(outnames, output_ops):
+                fout.write("%s " % col)
+            fout.write("\n")
+
+    def output_columns(self, outnames, output_ops):
+        """ names of the output columns of the main output file """
+        cols = []
+        for op in output_ops:
+            if (":" in op):
+                op = op.split(":")[1]
+            for p in outnames:
+                cols.append("%s_%s" % (op,p))
+        return cols
+
+    def write_case_output(self, case, fout, fres, parms, outnames, output_ops):
+        """ write the line of one case to the main output file, or to the failed cases file if its output can not be processed.
+        returns the output values of the case, None if they could not be processed """
+        for p in parms:
+            val = case.sample[p]
+            fout.write("%.16e " % val)
+        fout.write("   ")
+        results_dir = os.path.join(self.aerocode.basedir, case.case_name)
+        print "collecting from ", results_dir
+        if ("raw" in output_ops):
+            ## user just wants name of raw FAST output file saved, for later access
+            fout.write("%s\n" % results_dir)
+            return None
+        else:
+            vals = []
+            ## op is a function with input = vector of values, output=a single scalar
+            for opstr in output_ops:                
+                ## we have a system where the function we do the postprocessing with can be specified in the control
+                ## input file via: "output_operations" tag.
+                try:
+                    if (":" in opstr):
+                        mod = opstr.split(":")[0]
+                        opstr2 = opstr.split(":")[1]
+                        op =getattr( __import__(mod, globals(), locals(), [opstr2], -1), opstr2)
+                    else:
+                        op = eval(opstr)  ## this gives us the "python function object" described by opstr (e.g. string "np.std"  something we can call)
+                   # op is called  as op(col):R^n -> R. i.e. gets passed an array (output vs time) and produces a scalar.
+                except:
+                    print "ERROR: Failed to find/use specified postprocessing function ", opstr
+
+                try:
+                    result = self.aerocode.getResults(outnames, results_dir, operation=op)
+                    for val in result:
+                        if (val == None):
+                            fout.write("nan ")
+                            vals.append(np.nan)
+                        else:
+                            fout.write("%.16e " % val)
+                            vals.append(val)
+                except:
+                    print "DIRECTORY FAILED: ", results_dir
+                    for p in parms:
+                        val = case.sample[p]
+                        fres.write("%.16e " % val)
+                    fres.write( "   %s \n" % ( results_dir))
+                    vals = None
+                    break   # breaks out of "for opstr ..." so we don't repeat this message
+
             fout.write("\n")
+            return vals
+
+    def collect_output(self, output_params):
+        print "RUNS ARE DONE:"
+        print "collecting output from copied-back files (not from case recorder), see %s" % output_params['main_output_file']
+        fout = file(output_params['main_output_file'], "w")
+        fres = file("failed_cases.txt", "w")
+        out = self.output_setup(output_params)
+        self.write_output_header(fout, fres, *out)
         for fullcase in self.runcases:
             case = fullcase._inputs['runner.inputs']
-            for p in parms:
-                val = case.sample[p]
-                fout.write("%.16e " % val)
-            fout.write("   ")
-            results_dir = os.path.join(self.aerocode.basedir, case.case_name)
-            print "collecting from ", results_dir
-            if ("raw" in output_ops):
-                ## user just wants name of raw FAST output file saved, for later access
-                fout.write("%s\n" % results_dir)
-            else:
-                ## op is a function with input = vector of values, output=a single scalar
-                for opstr in output_ops:                
-                    ## we have a system where the function we do the postprocessing with can be specified in the control
-                    ## input file via: "output_operations" tag.
-                    try:
-                        if (":" in opstr):
-                            mod = opstr.split(":")[0]
-                            opstr2 = opstr.split(":")[1]
-                            op =getattr( __import__(mod, globals(), locals(), [opstr2], -1), opstr2)
-                        else:
-                            op = eval(opstr)  ## this gives us the "python function object" described by opstr (e.g. string "np.std"  something we can call)
-                       # op is called  as op(col):R^n -> R. i.e. gets passed an array (output vs time) and produces a scalar.
-                    except:
-                        print "ERROR: Failed to find/use specified postprocessing function ", opstr
-
-                    try:
-                        result = self.aerocode.getResults(outnames, results_dir, operation=op)
-                        for val in result:
-                            if (val == None):
-                                fout.write("nan ")
-                            else:
-                                fout.write("%.16e " % val)
-                    except:
-                        print "DIRECTORY FAILED: ", results_dir
-                        for p in parms:
-                            val = case.sample[p]
-                            fres.write("%.16e " % val)
-                        fres.write( "   %s \n" % ( results_dir))
-                        break   # breaks out of "for opstr ..." so we don't repeat this message
-
-                fout.write("\n")
+            self.write_case_output(case, fout, fres, *out)
         fout.close()
         fres.close()
 
+    def run_local(self, output_params, nproc=1, timeout=None, retries=0, queue_file="runbatch-queue.txt",
+                  rel_tol=None, channels=None):
+        """ run the cases in a pool of nproc local worker processes instead of the CaseIteratorDriver,
+        writing the line of each case to the main output file as soon as it is done.
+        queue_file is the manifest of the campaign: it records for each case, keyed by the hash of its
+        full parameter set, its name, parameters, output directory and status.  Cases that are done,
+        or whose output directory already holds valid results, are skipped and failed cases are rerun,
+        so an interrupted or partially failed campaign is completed by running again.
+        Each case runs in its own directory local_runs/<case_hash>, with links to the contents of
+        the current directory.  Relies on the workers being forked from this process (Unix).
+        The timeout is passed to the ExternalCode components of the aerocode, which kill the
+        external process when it runs out of time, so a retry does not run next to it.
+        With rel_tol, the outputs of the completed cases are fed to a runSummation.ConvergenceMonitor
+        and the campaign stops once the confidence intervals of the mean outputs in channels (names of
+        output columns, e.g. max_RootMxc1, default all) are within rel_tol of the means.  The remaining
+        cases are left pending in the queue. """
+        global _local_analyzer
+        _local_analyzer = self
+        # repeated cases are run once
+        self.hashed_cases = OrderedDict((case.case_hash, case) for case in self.studycases)
+        # cases sharing an output directory would be validated and collected from each other's results
+        names = {}
+        for case in self.studycases:
+            names.setdefault(case.case_name, set()).add(case.case_hash)
+        shared = [name for name in names if len(names[name]) > 1]
+        if (len(shared) > 0):
+            raise ValueError, "cases with different parameters share the output directories %s, case names only keep 4 digits of the parameters" % ", ".join(sorted(shared))
+
+        queue = JobQueue(queue_file)
+        queue.reset()
+        for case in self.studycases:
+            queue.add(case.case_hash, case.case_hash, name=case.case_name, params=case.sample,
+                      output=os.path.join(self.aerocode.basedir, case.case_name))
+        rundir = "local_runs"
+        skip = [os.path.basename(self.aerocode.basedir), rundir, queue_file]
+        links = [f for f in os.listdir(os.getcwd()) if f not in skip]
+        out = self.output_setup(output_params)
+
+        monitor = None
+        if (rel_tol != None):
+            if ("raw" in out[2]):
+                raise ValueError, "rel_tol needs processed outputs, not raw output directories"
+            cols = self.output_columns(out[1], out[2])
+            fields = None
+            if (channels != None):
+                missing = [c for c in channels if c not in cols]
+                if (len(missing) > 0):
+                    raise ValueError, "unknown output channels %s, available are %s" % (", ".join(missing), ", ".join(cols))
+                fields = [cols.index(c) for c in channels]
+            monitor = ConvergenceMonitor(len(cols), rel_tol=rel_tol, fields=fields)
+
+        def validate(key, h):
+            # the results of a case are valid if all its outputs can be read
+            results_dir = queue[key]['output']
+            if (not os.path.exists(results_dir)):
+                return False
+            try:
+                result = self.aerocode.getResults(out[1], results_dir, operation=np.max)
+            except:
+                return False
+            return all([val != None for val in result])
+
+        if (timeout):
+            codes = _external_codes(self.aerocode)
+            if (len(codes) == 0):
+                raise ValueError, "timeout needs ExternalCode components in the aerocode to stop the external processes"
+            for code in codes:
+                code.timeout = timeout
+
+        sched = LocalScheduler(_run_local_case, nproc=nproc, retries=retries,
+                               queue=queue, rundir=rundir, link_files=links, validate=validate)
+
+        # append to the output of an interrupted campaign
+        fname = output_params['main_output_file']
+        resume = len(queue.keys('done')) > 0 and os.path.exists(fname)
+        fout = file(fname, "a" if resume else "w")
+        fres = file("failed_cases.txt", "a" if resume else "w")
+        if (not resume):
+            self.write_output_header(fout, fres, *out)
+        elif (monitor != None):
+            # the cases of the interrupted campaign count towards convergence
+            ncols = len(out[0]) + monitor.stats.mean.shape[0]
+            for ln in file(fname).readlines()[1:]:
+                tok = ln.split()
+                if (len(tok) == ncols):
+                    vals = [float(v) for v in tok[len(out[0]):]]
+                    if (not np.isnan(vals).any()):
+                        monitor.update(vals)
+
+        def collect(key, h):
+            vals = self.write_case_output(self.hashed_cases[key], fout, fres, *out)
+            fout.flush()
+            fres.flush()
+            if (monitor != None and vals != None and not np.isnan(vals).any()):
+                monitor.update(vals)
+
+        stop = None
+        if (monitor != None):
+            stop = lambda key, h: monitor.converged
+
+        try:
+            jobs = [(h, h) for h in self.hashed_cases]
+            sched.run(jobs, collector=collect, stop=stop)
+        finally:
+            queue.close()
+            fout.close()
+            fres.close()
+        failed = [k for k, v in jobs if queue[k]['status'] == 'failed']
+        if (len(failed) > 0):
+            print "%d cases failed, see %s" % (len(failed), queue_file)
+        if (monitor != None and monitor.converged):
+            print "outputs converged to relative error %e after %d cases, %d cases not run" % \
+                (monitor.rel_error().max(), monitor.n, len(queue.keys('pending')))
+
 ########### 
 ## rest of code is options handling, input file handling.  Maybe generic enough for fusedwind.
 
@@ -383,6 +546,14 @@ def get_options():
     parser.add_option("-c", "--cluster", dest="cluster_allocator", help="run using cluster allocator", action="store_true", default=False)
     parser.add_option("-n", "--norun", dest="norun", help="just process results", action="store_true", default=False)
     parser.add_option("-s", "--start_at", dest="start_at", help="index of sample to start at", type="int", default=0)
+    parser.add_option("-l", "--local", dest="nproc", help="run cases in this many local processes instead of via openmdao", type="int", default=0)
+    parser.add_option("-t", "--timeout", dest="timeout", help="time limit of a single case in seconds, with --local", type="float", default=None)
+    parser.add_option("-r", "--retries", dest="retries", help="number of times a failed case is retried, with --local", type="int", default=0)
+    parser.add_option("-q", "--queue", dest="queue_file", type="string", default="runbatch-queue.txt",
+                                    help="manifest keeping the status of the cases, with --local; rerun to complete an interrupted or partially failed campaign")
+    parser.add_option("--rel_tol", dest="rel_tol", help="with --local, stop once the confidence intervals of the mean outputs are within this relative error", type="float", default=None)
+    parser.add_option("--channels", dest="channels", type="string", default=None,
+                                    help="comma separated output columns, e.g. max_RootMxc1, that need to converge for --rel_tol. default: all")
 
     (options, args) = parser.parse_args()
     return options, args
@@ -579,6 +750,14 @@ def rundlcs():
     # calling configure() is done inside run(). but now it is done already (above), too.
 
     # norun does not write directories, but it does set us up to process them if they already exist
+    if (options.nproc > 0 and not options.norun):
+        print "running cases locally in %d processes" % options.nproc
+        channels = None
+        if (options.channels != None):
+            channels = [c.strip() for c in options.channels.split(",")]
+        dispatcher.run_local(ctrl.output, options.nproc, options.timeout, options.retries, options.queue_file,
+                             options.rel_tol, channels)
+        return
     if (not options.norun):
         print "calling run"
         dispatcher.run()
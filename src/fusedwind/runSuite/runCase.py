@@ -1,6 +1,7 @@
 import numpy as np
 from math import pi
 import copy
+import hashlib
 from openmdao.main.api import VariableTree
 from openmdao.lib.datatypes.api import Str, VarTree, Float
 from fusedwind.turbine.environment_vt import  TurbineEnvironmentVT, OffshoreTurbineEnvironmentVT
@@ -36,6 +37,14 @@ class RunCaseBuilder(object):
 
 #//////////////////////////////////////////////////
 
+def case_hash(sample):
+    """ content hash of the full parameter set of a case, a dictionary of parameter names and values.
+    Independent of the order of the parameters, and of the formatting of the values in the case table """
+    h = hashlib.sha1()
+    for p in sorted(sample.keys()):
+        h.update("%s=%r;" % (p, float(sample[p])))
+    return h.hexdigest()
+
 class GenericRunCase(IECRunCaseBaseVT):
     """ Like Run case, but only base key value info
     still one run of aero code, just w.r.t. "universal" variables """
@@ -48,6 +57,8 @@ class GenericRunCase(IECRunCaseBaseVT):
         for p in self.sample:
             self.thename += "%s.%.4f" % (p[0:3],self.sample[p])
         self.case_name = self.thename
+        # unlike case_name, which keeps 4 digits, unique for each parameter set
+        self.case_hash = case_hash(self.sample)
 
 class GenericRunCaseTable(object):
     """ basically a list of GenericRunCase's', including header"""
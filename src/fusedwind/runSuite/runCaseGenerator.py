@@ -106,7 +106,10 @@ y = N(2*x, sigy)
 import re, random, numpy as np, numpy.random as npr
 from copy import deepcopy
 
+from collections import OrderedDict
 from scipy.stats import vonmises, gamma
+from scipy.special import ndtr, ndtri, gammainc, gammaincc, gammaincinv, gammainccinv
+from fusedwind.lib.sampling import uniform_points, ppf_vonmises
 import scipy.integrate as integrate
 # this is not available until scipy 0.14:
 #from scipy.stats import  multivariate_normal
@@ -195,10 +198,101 @@ def prob_multivariate_normal(x, mu, sigma):
         norm_const = 1.0/ ( math.pow((2*pi),float(size)/2) * math.pow(det,1.0/2) )
         x_mu = matrix(x - mu)
         inv = sigma.I        
-        result = math.pow(math.e, -0.5 * (x_mu * inv * x_mu.T))
+        result = math.exp(-0.5 * (x_mu * inv * x_mu.T)[0,0])
         return norm_const * result
     else:
         raise NameError("The dimensions of the input don't match")
+def prob_multivariate_normal_batch(x, mu, sigma):
+    """ density of bivariate normal distributions, x and mu are [n, 2] arrays,
+    sigma the [n, 2, 2] covariance matrices """
+    det = sigma[:,0,0] * sigma[:,1,1] - sigma[:,0,1] * sigma[:,1,0]
+    if (det == 0).any():
+        raise NameError("The covariance matrix can't be singular")
+    d = x - mu
+    q = (sigma[:,1,1] * d[:,0]**2 - (sigma[:,0,1] + sigma[:,1,0]) * d[:,0] * d[:,1] + sigma[:,0,0] * d[:,1]**2) / det
+    return np.exp(-0.5 * q) / (2 * pi * np.sqrt(det))
+
+############
+# cumulative distribution functions (cdf), survival functions (sf) and their
+# inverses, used to sample truncated distributions by inversion
+
+def cdf_uniform(x, x0, x1):
+    return np.clip((x - x0) / (x1 - x0), 0, 1)
+
+def sf_uniform(x, x0, x1):
+    return np.clip((x1 - x) / (x1 - x0), 0, 1)
+
+def ppf_uniform(p, x0, x1):
+    return x0 + p * (x1 - x0)
+
+def isf_uniform(p, x0, x1):
+    return x1 - p * (x1 - x0)
+
+def cdf_normal(x, mu, sigma):
+    return ndtr((x - mu) / sigma)
+
+def sf_normal(x, mu, sigma):
+    return ndtr((mu - x) / sigma)
+
+def ppf_normal(p, mu, sigma):
+    return mu + sigma * ndtri(p)
+
+def isf_normal(p, mu, sigma):
+    return mu - sigma * ndtri(p)
+
+def cdf_weibull(x, shape, scale):
+    return -np.expm1(-(np.maximum(x, 0) / scale)**shape)
+
+def sf_weibull(x, shape, scale):
+    return np.exp(-(np.maximum(x, 0) / scale)**shape)
+
+def ppf_weibull(p, shape, scale):
+    return scale * (-np.log1p(-p))**(1. / shape)
+
+def isf_weibull(p, shape, scale):
+    return scale * (-np.log(p))**(1. / shape)
+
+def cdf_gamma(x, shape, scale):
+    return gammainc(shape, np.maximum(x, 0) / scale)
+
+def sf_gamma(x, shape, scale):
+    return gammaincc(shape, np.maximum(x, 0) / scale)
+
+def ppf_gamma(p, shape, scale):
+    return scale * gammaincinv(shape, p)
+
+def isf_gamma(p, shape, scale):
+    return scale * gammainccinv(shape, p)
+
+inverse_cdf = {"U": (cdf_uniform, sf_uniform, ppf_uniform, isf_uniform),
+               "N": (cdf_normal, sf_normal, ppf_normal, isf_normal),
+               "W": (cdf_weibull, sf_weibull, ppf_weibull, isf_weibull),
+               "G": (cdf_gamma, sf_gamma, ppf_gamma, isf_gamma)}
+
+def truncated_interval(fn, args, Vin, Vout):
+    """ probabilities p0, p1 of the truncation points of distribution fn.
+    Intervals in the upper tail (upper=True) are described by the survival
+    function for accuracy, the others by the cdf. The normalization
+    constant of the truncated distribution is abs(p1 - p0). """
+    cdf, sf = inverse_cdf[fn][:2]
+    F0 = cdf(Vin, *args)
+    upper = F0 > 0.5
+    p0 = np.where(upper, sf(Vin, *args), F0)
+    p1 = np.where(upper, sf(Vout, *args), cdf(Vout, *args))
+    return p0, p1, upper
+
+def draw_truncated(fn, args, Vin, Vout, u):
+    """ variates of distribution fn truncated to [Vin, Vout] for uniform
+    variates u, by the inverse cdf on the truncated interval """
+    ppf, isf = inverse_cdf[fn][2:]
+    p0, p1, upper = truncated_interval(fn, args, Vin, Vout)
+    p = p0 + u * (p1 - p0)
+    val = np.where(upper, isf(p, *args), ppf(p, *args))
+    return np.clip(val, Vin, Vout)
+
+def gamma_args(argvals, min_shape):
+    """ gamma distribution shape and scale, shape limited to min_shape """
+    return [np.maximum(min_shape, argvals[0]), np.maximum(1e-3, argvals[1])]
 
 
 ###############################
@@ -233,6 +327,25 @@ def parse_arg(a):
 #eg: parsed  10 + Vhub/100 - 0.02*(WaveDir+1) to  ['10', '+', 'Vhub', '/', '100', '-', '0.02', '*', '(', 'WaveDir', '+', '1', ')']
     return alist
 
+# math functions evaluated on numpy arrays for the batched sampler; the argument
+# expressions are otherwise evaluated as plain python math expressions
+vector_math = dict((k, v) for k, v in math.__dict__.items() if not k.startswith('_'))
+vector_math.update(sqrt=np.sqrt, exp=np.exp, log=np.log, log10=np.log10,
+                   sin=np.sin, cos=np.cos, tan=np.tan,
+                   asin=np.arcsin, acos=np.arccos, atan=np.arctan, atan2=np.arctan2,
+                   sinh=np.sinh, cosh=np.cosh, tanh=np.tanh, hypot=np.hypot,
+                   fabs=np.fabs, floor=np.floor, ceil=np.ceil, pow=np.power,
+                   degrees=np.degrees, radians=np.radians, np=np)
+
+def compile_arg(a):
+    """ compile a parsed argument (list of tokens) to a code object that can be
+    evaluated with arrays of variable values """
+    return compile(" ".join(a), "<distribution>", "eval")
+
+def eval_arg(code, ns, n):
+    """ evaluate a compiled argument in namespace ns, broadcast to n values """
+    return np.zeros(n) + eval(code, ns)
+
 def merge_dicts(d1,d2):
     d =  {key:d1[key] for key in d1}
     for key in d2:
@@ -240,6 +353,13 @@ def merge_dicts(d1,d2):
     return d
 
 
+def outside(val, Vin, Vout):
+    """ mask of (rows of) val outside the truncation interval [Vin, Vout] """
+    if val.ndim > 1:
+        return ((val < Vin[:,None]) | (val > Vout[:,None])).any(axis=1)
+    return (val < Vin) | (val > Vout)
+
+
 class Distribution(object):
     def __init__(self, vstr, ctx):
         self.vstr = vstr # what variable is being defined
@@ -253,6 +373,17 @@ class Distribution(object):
         return self.vstr
     def calc_prob(self, x):
         return 1
+
+    def get_args(self):
+        """ parsed argument expressions (lists of tokens) of the distribution """
+        return []
+
+    def compile(self, names):
+        """ compile the argument expressions for batched sampling and find the
+        variables they depend on """
+        self.vnames = getattr(self, "vnames", [self.vstr])
+        self.codes = [compile_arg(a) for a in self.get_args()]
+        self.deps = set(x for a in self.get_args() for x in a if x in names and x not in self.vnames)
     
     
 class EnumDistn(Distribution):
@@ -270,6 +401,21 @@ class EnumDistn(Distribution):
         res = self.ctx.resolve_value(res)
         return res
 
+    def get_args(self):
+        return self.items
+
+    def sample_batch(self, idx, ns):
+        """ values of the items with index idx, evaluated in namespace ns """
+        n = len(idx)
+        if len(self.codes) == 1:
+            return eval_arg(self.codes[0], ns, n)
+        val = np.zeros(n)
+        for k, code in enumerate(self.codes):
+            mask = idx == k
+            if mask.any():
+                val[mask] = eval_arg(code, ns, n)[mask]
+        return val
+
     def get_bounds(self):
         """ assumes numbers """
         nums = [float(i[0]) for i in self.items]
@@ -290,23 +436,35 @@ class FnDistn(Distribution):
         self.args = args
 
         self.is_truncated = False
-        self.C = None
+        self.C = OrderedDict()  # normalization constants of truncated distn, per argument values
+        self.C_size = 1024
         if (fn[0] == "T"):  ## this is a truncated distribution
             self.is_truncated = True
             self.fn = fn[1:]  # strip "T"            
             print "distn is truncated", fn, self.fn
 
     def ensure_C(self, argvals):
-        if not self.is_truncated:
-            return
-        if self.C == None:
-            self.Vin = argvals[-2]  # last two args to distn are truncation points
-            self.Vout = argvals[-1]
-            self.is_truncated = False  # temp turn it off b/c we want true integral of pdf over truncated range
-            self.C = integrate.quad(self.calc_prob, self.Vin, self.Vout)
-            self.is_truncated = True
-            self.C = self.C[0]
-            print "truncated distribution normalization constant = ", self.C, "range: ", self.Vin, self.Vout
+        """ normalization constant of the truncated distribution, i.e. the
+        probability of the interval [Vin, Vout] given by the last two
+        arguments, cached per argument values """
+        key = tuple(argvals)
+        try:
+            C = self.C.pop(key)
+        except KeyError:
+            Vin = argvals[-2]  # last two args to distn are truncation points
+            Vout = argvals[-1]
+            if self.fn in inverse_cdf:
+                args = argvals[:2]
+                if self.fn == "G":
+                    args = gamma_args(args, 1e-1)
+                p0, p1, upper = truncated_interval(self.fn, args, Vin, Vout)
+                C = float(abs(p1 - p0))
+            else:
+                C = integrate.quad(self.raw_prob, Vin, Vout, args=(argvals,))[0]
+            if len(self.C) >= self.C_size:
+                self.C.popitem(last=False)
+        self.C[key] = C
+        return C
 
     def sample(self):
         argvals = []
@@ -315,14 +473,88 @@ class FnDistn(Distribution):
             argvals.append(self.ctx.resolve_value(a))
 
         if (self.is_truncated):
-            self.ensure_C(argvals)
-            val = self.Vin - 1
-            while (val < self.Vin or val > self.Vout):
-                val = self.raw_sample(argvals)
-            return val
+            val = self.sample_batch([np.array([a], dtype=float) for a in argvals], 1)
+            return val[0]
         else:
             return self.raw_sample(argvals)
 
+    def get_args(self):
+        return self.args
+
+    def sample_batch(self, argvals, n):
+        """ draw n variates of the distribution, argvals are arrays of length n
+        of the argument values of each variate """
+        if not self.is_truncated:
+            return self.raw_sample_batch(argvals, n)
+        Vin = argvals[-2]
+        Vout = argvals[-1]
+        if self.fn in inverse_cdf:
+            args = argvals[:2]
+            if self.fn == "G":
+                args = gamma_args(args, 1e-3)
+            return draw_truncated(self.fn, args, Vin, Vout, npr.uniform(size=n))
+        # rejection sampling, redrawing the rejected variates in blocks
+        val = self.raw_sample_batch(argvals, n)
+        bad = np.nonzero(outside(val, Vin, Vout))[0]
+        while bad.size > 0:
+            val[bad] = self.raw_sample_batch([a[bad] for a in argvals], bad.size)
+            bad = bad[outside(val[bad], Vin[bad], Vout[bad])]
+        return val
+
+    def ppf_batch(self, argvals, u):
+        """ variates of the distribution for points u in the unit hypercube by
+        the inverse cdf, u is an [n, 2] array for N2, [n, 1] otherwise.
+        Truncated VM and N2 distributions have no closed form inverse and
+        are sampled randomly instead """
+        n = u.shape[0]
+        if (self.is_truncated and self.fn not in inverse_cdf):
+            print "random sampling of truncated distribution %s" % self.fn
+            return self.sample_batch(argvals, n)
+        if (self.fn == "N2"):
+            z = ndtri(u)
+            s0 = np.sqrt(argvals[2])
+            c = argvals[4] / s0
+            val = np.zeros((n, 2))
+            val[:,0] = argvals[0] + s0 * z[:,0]
+            val[:,1] = argvals[1] + c * z[:,0] + np.sqrt(argvals[3] - c**2) * z[:,1]
+        elif (self.fn == "VM"):
+            val = ppf_vonmises(u[:,0], argvals[0], argvals[1])
+        elif (self.fn in inverse_cdf):
+            args = argvals[:2]
+            if self.fn == "G":
+                args = gamma_args(args, 1e-3)
+            if self.is_truncated:
+                val = draw_truncated(self.fn, args, argvals[-2], argvals[-1], u[:,0])
+            else:
+                val = inverse_cdf[self.fn][2](u[:,0], *args)
+        else:
+            raise ValueError,  "Sorry, unknown distribution: %s" % self.fn
+        return val
+
+    def raw_sample_batch(self, argvals, n):
+        """ vectorized version of raw_sample """
+        if (self.fn == "N"):
+            val = npr.normal(argvals[0], argvals[1], size=n)
+        elif (self.fn == "N2"):
+            # bivariate normal by Cholesky factorization of the 2x2 covariance matrices
+            z = npr.standard_normal((n, 2))
+            s0 = np.sqrt(argvals[2])
+            c = argvals[4] / s0
+            val = np.zeros((n, 2))
+            val[:,0] = argvals[0] + s0 * z[:,0]
+            val[:,1] = argvals[1] + c * z[:,0] + np.sqrt(argvals[3] - c**2) * z[:,1]
+        elif (self.fn == "U"):
+            val = npr.uniform(argvals[0], argvals[1], size=n)
+        elif (self.fn == "G"):
+            val = npr.gamma(*gamma_args(argvals, 1e-3), size=n)
+        elif (self.fn == "VM"):
+            val = npr.vonmises(argvals[1], argvals[0], size=n)
+        elif (self.fn == "W"):
+            val = argvals[1] * npr.weibull(argvals[0], size=n)
+        else:
+            raise ValueError,  "Sorry, unknown distribution: %s" % self.fn
+        return val
+
     def raw_sample(self, argvals):
         if (self.fn == "N"):
 #            print " need to sample normal with args = ", argvals
@@ -355,13 +587,61 @@ class FnDistn(Distribution):
             argvals.append(self.ctx.resolve_value(a))
 
         if (self.is_truncated):
-            self.ensure_C(argvals)
-            if x < self.Vin or x > self.Vout:
+            if x < argvals[-2] or x > argvals[-1]:
                 return 0  ## bail here for samples outside range
-            C = self.C ## this is normalization for truncated distn
+            C = self.ensure_C(argvals) ## this is normalization for truncated distn
         else:
             C = 1.0  ## untruncated distn's have normalization of 1
-            
+
+        return self.raw_prob(x, argvals) / C
+
+    def calc_prob_batch(self, x, argvals):
+        """ vectorized version of calc_prob, argvals are arrays of the
+        argument values of each x """
+        if not self.is_truncated:
+            return self.raw_prob_batch(x, argvals)
+
+        Vin = argvals[-2]
+        Vout = argvals[-1]
+        if self.fn in inverse_cdf:
+            args = argvals[:2]
+            if self.fn == "G":
+                args = gamma_args(args, 1e-1)
+            p0, p1, upper = truncated_interval(self.fn, args, Vin, Vout)
+            C = np.abs(p1 - p0)
+        else:
+            C = np.array([self.ensure_C(list(a)) for a in zip(*argvals)])
+        val = self.raw_prob_batch(x, argvals) / C
+        val[outside(x, Vin, Vout)] = 0  ## samples outside range
+        return val
+
+    def raw_prob_batch(self, x, argvals):
+        """ vectorized version of raw_prob """
+        if (self.fn == "N"):
+            val = prob_normal(x, argvals[0], argvals[1])
+        elif (self.fn == "N2"):
+            mu = np.column_stack((argvals[0], argvals[1]))
+            sigma = np.array([[argvals[2], argvals[4]], [argvals[4], argvals[3]]]).transpose(2, 0, 1)
+            val = prob_multivariate_normal_batch(x, mu, sigma)
+        elif (self.fn == "U"):
+            val = np.ones(len(x)) / (argvals[1] - argvals[0])
+        elif (self.fn == "G"):
+            val = gamma.pdf(x, np.maximum(1e-1, argvals[0]), loc=0, scale=argvals[1])
+        elif (self.fn == "VM"):
+            val = np.max([vonmises.pdf(x + m, argvals[0], loc=argvals[1]) for m in [-2*pi, 0, 2*pi]], axis=0)
+        elif (self.fn == "W"):
+            shape, scale = argvals[0], argvals[1]
+            val = (shape/scale)*(x/scale)**(shape-1)*np.exp(-(x/scale)**shape)
+        else:
+            raise ValueError,  "unknown distribution %s" % self.fn
+
+        nnan = np.isnan(val).sum()
+        if nnan > 0:
+            print "NAN in %d of %d samples of" % (nnan, len(x)), self.fn
+        return val
+
+    def raw_prob(self, x, argvals):
+        """ probability density of the untruncated distribution """
         if (self.fn == "N"):
             val = prob_normal(x,argvals[0], argvals[1])
         elif (self.fn == "N2"):
@@ -380,7 +660,7 @@ class FnDistn(Distribution):
         
         if (math.isnan(val)):
             print "NAN", val, x, self.fn, argvals
-        return val/C
+        return val
 
 
 class DistnParser(object):
@@ -388,6 +668,7 @@ class DistnParser(object):
         self.vars = []
         self.dlist = []
         self.dlist_map = {}
+        self.plan = None
         
     def parse_file(self,fname):
         mystr = file(fname).readlines()
@@ -454,7 +735,9 @@ class DistnParser(object):
                         except:
                             print "cannot parse distribution spec ", dspec
                 if (newdist != None):
+                    newdist.vnames = [v.strip() for v in vtok]
                     self.dlist_map[vstr] = newdist
+                    self.plan = None
                         
         print "defined distns. for vars ", self.vars
 #        print self.dlist       
@@ -525,59 +808,108 @@ class DistnParser(object):
                 self.set_value(d.vstr,s)
         return self.values
 
-    def multi_sample(self, numsamples, expand_enums=False):
-        slist = []
-        if (expand_enums):
-#            print "expanding set variables, then sampling %d times" % numsamples
-            # make slist of product space of set vars.
-            enum_list = self.expand_enums()
-#            print "enum_list", enum_list
-            for e in enum_list:
-#                self.clear_values()
-#                self.set_values(e)
-                for i in range(numsamples):
-                    # now truly sampled vars to each of them                    
-                    # combine real samples to enum cases
-                    self.clear_values()
-
-                    for d in self.dlist:
- #                       print "scanning ", d.vstr
-                        if (hasattr(d,"fn")):
-                            s = d.sample()
-                            #print "sampled ", d.vstr, " and got ", s
-                            self.set_value(d.vstr,s)
-                        
-                        if (hasattr(d,"items")):  #### bad programming!
-                            maxiter = len(e)
-                            tries = 0
-                            while (tries < maxiter):
-                                for it in e:  # find this var and resolve it here
-#                                    print it, e[it]
-                                    # this is some crazy stuff: try (maybe out of order b/c of dict) until we succeed
-                                    # to resolve everything
-                                    try:
-                                        val = self.resolve_value(e[it])
-                                        self.set_value(it,val)
-#                                        print "succes resolving ", e[it]
-                                    except:
-#                                        print "failed resolving ", e[it]
-                                        pass
-                                    tries += 1
-                    slist.append(self.values)
-
-#                    vals = self.sample_fns()
-#                    print vals, e
-#                    vals = merge_dicts(vals, e)
-#                    slist.append(vals)
-        else:            
-#            print "sampling %d times" % numsamples
-            for i in range(numsamples):
-                self.clear_values()
-                vals = self.sample()
-#                print "sample %d = " % i, self.values
-                slist.append(self.values)
-        
-        return slist
+    def compile_plan(self):
+        """ compile the parsed distributions into a sampling plan: the list of
+        distributions ordered such that each comes after the variables its
+        arguments depend on """
+        if self.plan is not None:
+            return self.plan
+        for d in self.dlist:
+            d.compile(self.vars)
+        plan = []
+        done = set()
+        todo = list(self.dlist)
+        while len(todo) > 0:
+            ready = [d for d in todo if d.deps <= done]
+            if len(ready) == 0:
+                raise ValueError, "cannot resolve dependencies of variables %s" % [d.vstr for d in todo]
+            for d in ready:
+                plan.append(d)
+                done.update(d.vnames)
+                todo.remove(d)
+        self.plan = plan
+        return plan
+
+    def multi_sample_table(self, numsamples, expand_enums=False, method='random', seed=None):
+        """
+        draw samples of all variables as arrays, distribution by distribution
+
+        parameters
+        ----------
+        numsamples: int
+            number of samples, per combination of the enum items if expand_enums
+        expand_enums: bool
+            if True the samples are drawn for each combination in the cartesian
+            product of the enum items, otherwise the enum items are drawn at random
+        method: str
+            'random' for pseudo random sampling, or 'lhs', 'sobol', 'halton' for
+            Latin hypercube or scrambled low discrepancy points mapped through the
+            inverse cdf's of the distributions, see fusedwind.lib.sampling.
+            With expand_enums the same points are used for each enum combination.
+        seed: int
+            seed of the scrambling of the points, None for the global numpy
+            random number generator
+
+        returns
+        -------
+        names: list
+            names of the variables
+        table: array
+            [n_samples, n_vars] array of samples
+        """
+        plan = self.compile_plan()
+        enums = [d for d in self.dlist if isinstance(d, EnumDistn)]
+        ncombo = 1
+        if len(enums) == 0:
+            idx = np.zeros((numsamples, 0), dtype=int)
+        elif expand_enums:
+            combos = np.indices([len(d.items) for d in enums]).reshape(len(enums), -1).T
+            ncombo = combos.shape[0]
+            idx = np.repeat(combos, numsamples, axis=0)
+
+        u = None
+        if method == 'random':
+            if len(enums) > 0 and not expand_enums:
+                idx = np.array([npr.randint(len(d.items), size=numsamples) for d in enums]).T
+        else:
+            # dimensions of the points used by each distribution
+            dims = {}
+            ndim = 0
+            for d in plan:
+                if isinstance(d, FnDistn) or not expand_enums:
+                    nd = len(d.vnames) if isinstance(d, FnDistn) else 1
+                    dims[d.vstr] = range(ndim, ndim + nd)
+                    ndim += nd
+            u = uniform_points(numsamples, ndim, method, seed)
+            if len(enums) > 0 and not expand_enums:
+                idx = np.array([np.minimum((u[:,dims[d.vstr][0]] * len(d.items)).astype(int), len(d.items) - 1)
+                                for d in enums]).T
+            u = np.tile(u, (ncombo, 1))
+        n = idx.shape[0]
+        idx = dict((d.vstr, idx[:,k]) for k, d in enumerate(enums))
+
+        ns = dict(vector_math)
+        for d in plan:
+            if isinstance(d, EnumDistn):
+                val = d.sample_batch(idx[d.vstr], ns)
+            elif u is None:
+                val = d.sample_batch([eval_arg(c, ns, n) for c in d.codes], n)
+            else:
+                val = d.ppf_batch([eval_arg(c, ns, n) for c in d.codes], u[:,dims[d.vstr]])
+            if val.ndim > 1:
+                for k, v in enumerate(d.vnames):
+                    ns[v] = val[:,k]
+            else:
+                for v in d.vnames:
+                    ns[v] = val
+
+        table = np.array([ns[v] for v in self.vars]).T.reshape(n, len(self.vars))
+        return list(self.vars), table
+
+    def multi_sample(self, numsamples, expand_enums=False, method='random', seed=None):
+        """ list of samples as dicts of variable values, see multi_sample_table """
+        names, table = self.multi_sample_table(numsamples, expand_enums, method, seed)
+        return [dict(zip(names, row)) for row in table]
 
     def resolve_one_value(self,a):
 #        print "resolve_one_value()", a        
@@ -663,6 +995,43 @@ class DistnParser(object):
         return ptot
 
 
+    def calc_prob_batch(self, names, table):
+        """
+        probabilities of a table of samples according to parsed distribution,
+        vectorized version of calc_prob
+
+        parameters
+        ----------
+        names: list
+            names of the columns of table, columns that are not variables of
+            the distribution are ignored
+        table: array
+            [n_samples, n_vars] array of samples
+
+        returns
+        -------
+        p: array
+            probability density of each sample
+        """
+        plan = self.compile_plan()
+        table = np.asarray(table, dtype=float).reshape(-1, len(names))
+        n = table.shape[0]
+        ns = dict(vector_math)
+        for k, name in enumerate(names):
+            ns[name] = table[:,k]
+
+        ptot = np.ones(n)
+        for d in plan:
+            if isinstance(d, FnDistn) and d.vstr in names:
+                argvals = [eval_arg(c, ns, n) for c in d.codes]
+                if len(d.vnames) > 1:
+                    x = np.column_stack([ns[v] for v in d.vnames])
+                else:
+                    x = ns[d.vstr]
+                ptot *= d.calc_prob_batch(x, argvals)
+        return ptot
+
+
 def get_options():
     from optparse import OptionParser
     parser = OptionParser()    
@@ -675,16 +1044,19 @@ def get_options():
     parser.add_option("-p", "--probfile", dest="old_samples",  type="string", default=None,
                                     help="an input file of samples whose probabilities we want to calculat w.r.t input distn")
     parser.add_option("-a", "--augment", dest="augment", help="goes with -p, will include _both_ given and newly calculated probs to the output samples", action="store_true", default=False)
+    parser.add_option("-m", "--method", dest="method", type="choice", choices=["random", "lhs", "sobol", "halton"], default="random",
+                                    help="sampling method: random, lhs (Latin hypercube), sobol or halton (scrambled low discrepancy). default: random")
+    parser.add_option("-r", "--replicates", dest="replicates", help="number of independently randomized replicates, written with a Replicate column", type="int", default=1)
+    parser.add_option("-s", "--seed", dest="seed", help="random seed", type="int", default=None)
             
     (options, args) = parser.parse_args()
     return options, args
 
 def read_samples(fname):
-    lines = file(fname).readlines()
-    hdr = lines[0].split()
-    dat = []
-    for ln in lines[1:]:
-        dat.append([float(x) for x in ln.split()])
+    fin = file(fname)
+    hdr = fin.readline().split()
+    dat = np.loadtxt(fin, ndmin=2)
+    fin.close()
     return hdr, dat
 
 def gen_cases(options=None, args=None):
@@ -699,31 +1071,19 @@ def gen_cases(options=None, args=None):
         # probabilities for the samples w.r.t. the given distribution
         old_hdr, old_samples = read_samples(options.old_samples)
         pidx = old_hdr.index("Prob")
-        new_hdr = old_hdr
+        p = dparser.calc_prob_batch(old_hdr, old_samples)
+        new_hdr = list(old_hdr)
         if (options.augment):
             new_hdr.append("Prob2")
             pidx = len(new_hdr)-1
-        new_samples = []
-        for s in old_samples:
-            samp = {old_hdr[i]:s[i] for i in range(len(s))}
-#            print "sample ", samp
-            p = dparser.calc_prob(samp)
-#            print "prob ", p
-            if (options.augment):
-                s.append(p)
-            else:
-                s[pidx] = p
-            new_samples.append(s)
+            new_samples = np.column_stack((old_samples, p))
+        else:
+            new_samples = old_samples
+            new_samples[:,pidx] = p
 
         fout = file(options.main_output, "w")
-        for key in new_hdr:
-            fout.write("%s " % key)
-        fout.write("\n")
-
-        for s in new_samples:
-            for val in s:
-                fout.write("%.16e " % val)
-            fout.write("\n")
+        fout.write("%s\n" % " ".join(new_hdr))
+        np.savetxt(fout, new_samples, fmt="%.16e")
         fout.close()
 
         print "Calculated probabilities of samples in %s w.r.t. distribution in %s" % (options.old_samples, options.dist)
@@ -734,25 +1094,29 @@ def gen_cases(options=None, args=None):
 
     else:
         numsamples = options.nsamples
-        slist = dparser.multi_sample(numsamples, expand_enums = True)
-        print "%d samples, SAMPLING set/enumeration variables:" % (numsamples)
+        method = getattr(options, "method", "random")
+        replicates = getattr(options, "replicates", 1)
+        seed = getattr(options, "seed", None)
+        if seed != None:
+            npr.seed(seed)
+        tables = []
+        for r in range(replicates):
+            names, table = dparser.multi_sample_table(numsamples, expand_enums = True, method = method)
+            tables.append(table)
+        table = np.vstack(tables)
+        print "%d samples, SAMPLING set/enumeration variables:" % (len(table))
+        p = dparser.calc_prob_batch(names, table)
+        if (replicates > 1):
+            # replicates of randomized QMC/LHS samples give unbiased error estimates
+            names = names + ["Replicate"]
+            table = np.column_stack((table, np.repeat(np.arange(replicates), len(tables[0]))))
+        if ("AnalTime" in names and options.tmax != None and options.tmax > 0):
+            table[:,names.index("AnalTime")] = options.tmax  ## special case to replace analysis time on the fly
         fout = file(options.main_output, "w")
-        s = slist[0]
-        for key in s:
-            fout.write("%s " % key)
-        fout.write("Prob\n")
-        for i in range(len(slist)):
-            s = slist[i]
-            p =  dparser.calc_prob(s)
-    #        print "sample %d = " % i, s, p
-            for key in s:
-                if (key == "AnalTime" and options.tmax != None and options.tmax > 0):
-                    fout.write("%.16e " % options.tmax)  ## special case to replace analysis time on the fly
-                else:
-                    fout.write("%.16e " % s[key])
-            fout.write("   %.16e\n" % p)
+        fout.write("%s Prob\n" % " ".join(names))
+        np.savetxt(fout, np.column_stack((table, p)), fmt="%.16e")
         fout.close()
-        print "wrote %d samples (run cases) from distribution in \'%s\' to \'%s\'" % (numsamples, options.dist, options.main_output)
+        print "wrote %d samples (run cases) from distribution in \'%s\' to \'%s\'" % (len(table), options.dist, options.main_output)
 
 
 if __name__=="__main__":
@@ -1,4 +1,5 @@
 import os,sys
+from itertools import islice
 import numpy as np
 
 ## simple file to process output list from runBatch.py. 
@@ -18,6 +19,8 @@ def get_options():
     parser.add_option("-f", "--field_name", dest="field_name",  type="string", default=None,  help="field of interest, by name")
     parser.add_option("-n", "--field_idx", dest="field_idx", help="field of interest, by 0-based index", type="int", default=None)
     parser.add_option("-a", "--doall", dest="do_all", help="process all field, and cumulatively", action="store_true", default=False)
+    parser.add_option("-c", "--chunk_size", dest="chunk_size", help="number of records read at a time", type="int", default=100000)
+    parser.add_option("-s", "--stride", dest="stride", help="write cumulative averages every stride records", type="int", default=1)
 #    parser.add_option("-s", "--start_at", dest="start_at", help="index of sample to start at", type="int", default=0)
             
     (options, args) = parser.parse_args()
@@ -30,26 +33,275 @@ def find_field(name, hdr):
     print "field %s not found in input" % name
     sys.exit()
 
-def dosum_once(dat, field_idx):
-    tot = 0
-    N = len(dat)
-    for i in range(N):
-       tot += dat[i][field_idx]
-    tot/=N
-    return tot
-
-
-def dosum_cumulative(dat):
-    N = len(dat)
-    M = len(dat[0])
-    xtot = np.zeros(M)
-    res = []
-    for i in range(N):
-        xtot += dat[i]
-        xnow = xtot/(i+1)
-        res.append(xnow)
-    res = np.array(res)
-    return res
+class RunningStats(object):
+    """
+    Running mean and variance of each field of a stream of records,
+    updated a chunk of records at a time with Welford's algorithm
+    in the pairwise form of Chan et al.
+
+    parameters
+    ----------
+    nfields: int
+        number of fields of each record
+    """
+
+    def __init__(self, nfields):
+
+        self.n = 0
+        self.mean = np.zeros(nfields)
+        self.M2 = np.zeros(nfields)
+
+    def update(self, chunk):
+        """
+        add a [n, nfields] chunk of records
+
+        returns
+        -------
+        cummean: array
+            [n, nfields] cumulative means after each record of the chunk
+        """
+
+        chunk = np.asarray(chunk, dtype=float)
+        nb = chunk.shape[0]
+        if nb == 0:
+            return np.zeros((0, self.mean.shape[0]))
+        count = self.n + np.arange(1, nb + 1)
+        cummean = (self.n * self.mean + np.cumsum(chunk, axis=0)) / count[:, None]
+
+        mean_b = chunk.mean(axis=0)
+        M2_b = ((chunk - mean_b)**2).sum(axis=0)
+        n = self.n + nb
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * nb / n
+        self.M2 = self.M2 + M2_b + delta**2 * self.n * nb / n
+        self.n = n
+        return cummean
+
+    @property
+    def var(self):
+        """ sample variance of each field """
+        if self.n < 2:
+            return np.zeros_like(self.mean)
+        return self.M2 / (self.n - 1)
+
+    @property
+    def std(self):
+        """ sample standard deviation of each field """
+        return np.sqrt(self.var)
+
+    @property
+    def stderr(self):
+        """ standard error of the mean of each field """
+        if self.n == 0:
+            return np.zeros_like(self.mean)
+        return self.std / np.sqrt(self.n)
+
+
+class ConvergenceMonitor(object):
+    """
+    Online convergence estimator for Monte-Carlo load estimates.
+
+    Results are added as the runs complete. The monitor maintains per
+    output channel the running mean and its standard error, and
+    confidence intervals from the means of consecutive batches of
+    batch_size records, which unlike the standard error remain valid for
+    correlated records. Once at least min_samples records and two batches
+    are available and the confidence interval half widths of all channels
+    relative to the means are below rel_tol, the monitor signals that
+    sampling can stop.
+
+    parameters
+    ----------
+    nfields: int
+        number of output channels of each record
+    rel_tol: float
+        target relative error, None to never signal convergence
+    batch_size: int
+        number of records per batch
+    confidence: float
+        confidence level of the confidence intervals
+    min_samples: int
+        minimum number of records before convergence can be signalled
+    fields: list
+        indices of the channels that need to converge, default all
+    """
+
+    def __init__(self, nfields, rel_tol=None, batch_size=10, confidence=0.95, min_samples=20, fields=None):
+
+        self.rel_tol = rel_tol
+        self.batch_size = batch_size
+        self.confidence = confidence
+        self.min_samples = min_samples
+        self.fields = fields
+        self.stats = RunningStats(nfields)
+        self.batch_stats = RunningStats(nfields)
+        self._batch_sum = np.zeros(nfields)
+        self._batch_n = 0
+
+    @property
+    def n(self):
+        return self.stats.n
+
+    @property
+    def mean(self):
+        return self.stats.mean
+
+    @property
+    def stderr(self):
+        return self.stats.stderr
+
+    def update(self, records):
+        """
+        add one record or a [n, nfields] array of records
+
+        returns
+        -------
+        converged: bool
+            True if the target relative error has been reached
+        """
+
+        records = np.atleast_2d(np.asarray(records, dtype=float))
+        self.stats.update(records)
+
+        # accumulate the records into batches
+        i = 0
+        while i < records.shape[0]:
+            k = min(records.shape[0] - i, self.batch_size - self._batch_n)
+            self._batch_sum += records[i:i + k].sum(axis=0)
+            self._batch_n += k
+            i += k
+            if self._batch_n == self.batch_size:
+                self.batch_stats.update(self._batch_sum[None, :] / self.batch_size)
+                self._batch_sum[:] = 0.
+                self._batch_n = 0
+
+        return self.converged
+
+    def ci_halfwidth(self):
+        """
+        half widths of the batch means confidence intervals of the means,
+        inf before two batches are complete
+        """
+
+        from scipy.stats import t
+        nb = self.batch_stats.n
+        if nb < 2:
+            return np.inf * np.ones_like(self.stats.mean)
+        return t.ppf(0.5 + 0.5 * self.confidence, nb - 1) * self.batch_stats.stderr
+
+    def rel_error(self):
+        """ confidence interval half widths relative to the means """
+
+        hw = self.ci_halfwidth()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            err = hw / np.abs(self.stats.mean)
+        err[hw == 0] = 0.
+        err[np.isnan(err)] = np.inf
+        return err
+
+    @property
+    def converged(self):
+        """ flag signalling that the target relative error has been reached """
+
+        if self.rel_tol is None or self.n < self.min_samples:
+            return False
+        err = self.rel_error()
+        if self.fields is not None:
+            err = err[self.fields]
+        return bool((err <= self.rel_tol).all())
+
+
+def read_header(fname):
+    """ field names of a results file, for binary (.npy) files read from
+    the first line of the companion text file <fname>.hdr """
+    if fname.endswith(".npy"):
+        fname = fname + ".hdr"
+    fin = file(fname)
+    hdr = fin.readline().split()
+    fin.close()
+    return hdr
+
+def read_chunks(fname, chunk_size=100000):
+    """
+    read the records of a results file in chunks of chunk_size records
+
+    the file is either a text file with a header line followed by a line of
+    values per record, or a binary columnar .npy file of shape
+    [n_records, n_fields], see write_binary
+
+    returns
+    -------
+    chunks: generator
+        [n, n_fields] arrays of records
+    """
+    if fname.endswith(".npy"):
+        dat = np.load(fname, mmap_mode='r')
+        for i in range(0, dat.shape[0], chunk_size):
+            yield np.array(dat[i:i + chunk_size], dtype=float)
+        return
+
+    fin = file(fname)
+    try:
+        nfields = len(fin.readline().split())
+        while True:
+            lines = list(islice(fin, chunk_size))
+            if len(lines) == 0:
+                break
+            yield np.array("".join(lines).split(), dtype=float).reshape(-1, nfields)
+    finally:
+        fin.close()
+
+def write_binary(fname, npy_name, chunk_size=100000):
+    """ convert a text results file to a binary columnar .npy file
+    (and its <npy_name>.hdr header file) for faster processing """
+    hdr = read_header(fname)
+    fin = file(fname)
+    nrec = sum(1 for ln in fin if len(ln.strip()) > 0) - 1
+    fin.close()
+    dat = np.lib.format.open_memmap(npy_name, mode='w+', dtype=float, shape=(nrec, len(hdr)))
+    i = 0
+    for chunk in read_chunks(fname, chunk_size):
+        dat[i:i + chunk.shape[0]] = chunk
+        i += chunk.shape[0]
+    del dat
+    fout = file(npy_name + ".hdr", "w")
+    fout.write("%s\n" % " ".join(hdr))
+    fout.close()
+
+def summation_stream(fname, fout=None, stride=1, chunk_size=100000):
+    """
+    streaming summation of a results file
+
+    parameters
+    ----------
+    fname: str
+        name of the results file, text or binary, see read_chunks
+    fout: file
+        optional file to which cumulative averages of all fields are
+        written every stride records, preceded by the record count
+    stride: int
+        number of records between cumulative averages written to fout
+    chunk_size: int
+        number of records read at a time
+
+    returns
+    -------
+    stats: object
+        RunningStats of all fields
+    """
+    hdr = read_header(fname)
+    stats = RunningStats(len(hdr))
+    for chunk in read_chunks(fname, chunk_size):
+        n0 = stats.n
+        cummean = stats.update(chunk)
+        if fout is not None:
+            count = n0 + np.arange(1, chunk.shape[0] + 1)
+            idx = np.nonzero(count % stride == 0)[0]
+            np.savetxt(fout, np.column_stack((count[idx], cummean[idx])), fmt="%e")
+    if fout is not None and stats.n % stride != 0:
+        # always end with the average over all records
+        np.savetxt(fout, np.column_stack(([stats.n], [cummean[-1]])), fmt="%e")
+    return stats
 
 """
     for i in range():
@@ -79,16 +331,9 @@ def dosum_cumulative(dat):
 def process_results():
     options, args = get_options()
     fname = options.main_input
-    lines = file(fname).readlines()  ## TODO: might by big
-    hdr = lines[0].split()
-    dat = []
-    for i in range(1,len(lines)):
-        ln = lines[i].split()
-        ln = np.array([float(f) for f in ln])
-        dat.append(ln)
-    dat = np.array(dat)
-    N = len(dat)
+    hdr = read_header(fname)
 
+    do_all = False
     if (not options.do_all and options.field_idx == None and options.field_name == None):
         print "please specify either --all or --field_name or --field_idx"
         sys.exit()
@@ -110,30 +355,25 @@ def process_results():
 
     
     if (do_all):
-        res = dosum_cumulative(dat)
         fout = file(options.main_output, "w")
-        for i in range(len(hdr)):
-            fout.write( "%s " % hdr[i])
-        fout.write("\n")
-        for i in range(len(dat)):
-            for j in range(len(hdr)):
-                fout.write("%e " % res[i][j])
-            fout.write("\n")
+        fout.write("N %s\n" % " ".join(hdr))
+        stats = summation_stream(fname, fout, options.stride, options.chunk_size)
         fout.close()
         print "wrote cumulative averages for all fields to file %s" % (options.main_output)
-        print "There were %d records, %d fields each" % (len(dat), len(hdr))
+        print "There were %d records, %d fields each" % (stats.n, len(hdr))
 
         gpname = "%s.gp" % options.main_output
         fout = file(gpname, "w")
         fout.write("set term png\n")
         for i in range(len(hdr)):
             fout.write("set output 'runbatch-%s.png'\n" % hdr[i])
-            fout.write("plot '%s' u :%d w l t '%s'\n" % (options.main_output, i+1, hdr[i]))        
+            fout.write("plot '%s' u 1:%d w l t '%s'\n" % (options.main_output, i+2, hdr[i]))        
         fout.close()
 
     else:
-        tot = dosum_once(dat, field_idx)
-        print "E(field %i, ie %s) over %d samples is %e" % (field_idx, field_name, N, tot)
+        stats = summation_stream(fname, chunk_size=options.chunk_size)
+        tot = stats.mean[field_idx]
+        print "E(field %i, ie %s) over %d samples is %e (std. error %e)" % (field_idx, field_name, stats.n, tot, stats.stderr[field_idx])
 
 if __name__=="__main__":
     process_results()
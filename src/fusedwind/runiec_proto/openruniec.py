@@ -27,6 +27,7 @@ from twister.models.FAST.mkgeom import makeGeometry
 #from twister_mkgeom import makeGeometry
 
 import sampler
+from fusedwind.runSuite.runSummation import ConvergenceMonitor
 
 from openaero import openFAST, designFAST
 from design_load_case import  NREL13_88_329Input, NREL13_88_329FromDistn, RawCases, ParamDesignLoadCaseBuilder, save_run_cases
@@ -274,16 +275,58 @@ def final_load_calc(sctx, fname, use_prob, field_idx, nsamples = -1):
     print "Load for %d samples = %e  (psum = %e)" % (cnt, lsum, psum)
     return [cnt,lsum,psum]
 
-def test_convergence(fname, use_prob, field_idx,minsamp, maxsamp, incr):
-    sctx = sampler.Context()
-    nsamp = minsamp
+def test_convergence(fname, use_prob, field_idx,minsamp, maxsamp, incr, rel_tol=None):
+    ### same estimate as final_load_calc for minsamp, minsamp+incr, ... samples, but
+    # in a single pass over the file, using an online estimator that also gives the
+    # standard error and batch means confidence interval of the estimate.
+    # Stops early once the relative error is below rel_tol.
+    monitor = ConvergenceMonitor(1, rel_tol=rel_tol)
+    fin = file(fname)
+    ln = fin.readline()  # skip header
+    ln = fin.readline()  # skip header
     foutname = "%s.conv" % (fname)
     fout = file(foutname, "w")
-    while (nsamp < maxsamp):
-        onedat = final_load_calc(sctx,fname,  use_prob, field_idx,nsamp)
-        fout.write("%d %e %e\n" % (onedat[0], onedat[1], onedat[2]))
-        nsamp += incr
+    psum = 0
+    nsamp = minsamp
+    cnt = 0
+    written = 0
+    for ln in fin:
+        # estimates are written for nsamp < maxsamp only
+        if (nsamp >= maxsamp):
+            break
+        ln = ln.split()
+        if (len(ln) == 0):
+            break
+        load = float(ln[field_idx])
+        prob = float(ln[4])
+        psum += prob
+        if (use_prob):
+            load *= prob
+        monitor.update(load)
+        cnt = monitor.n
+        if (cnt == nsamp or monitor.converged):
+            write_convergence(fout, monitor, use_prob, psum)
+            written = cnt
+            nsamp += incr
+            if (monitor.converged):
+                break
+    if (cnt > written):
+        # fewer samples in the file than requested
+        write_convergence(fout, monitor, use_prob, psum)
+    fin.close()
     fout.close()
+    if (monitor.converged):
+        print "Load converged to relative error %e after %d samples" % (monitor.rel_error()[0], monitor.n)
+    return monitor
+
+def write_convergence(fout, monitor, use_prob, psum):
+    # same scaling as final_load_calc: sum * dx for integration, mean for MC
+    if (use_prob):
+        scale = 20 * monitor.n
+    else:
+        scale = 1.0
+    fout.write("%d %e %e %e %e\n" % (monitor.n, scale * monitor.mean[0], psum,
+                                     scale * monitor.stderr[0], scale * monitor.ci_halfwidth()[0]))
 
 #----------------------------------------------
 ##### dealing with input, suggestive code, playing with ideas
@@ -4,6 +4,9 @@ import numpy.random as npr
 from math import pi, isnan, exp
 from numpy import mean
 import numpy as np
+from scipy.special import gammaincinv
+from fusedwind.lib.sampling import uniform_points, ppf_vonmises
+from fusedwind.lib.utilities import Tab2
 
 def draw_weibull(shape, scale, nsamples):
     x = scale * weibull(shape, nsamples)
@@ -22,7 +25,7 @@ def draw_vonmises(kappa, loc, nsamples):
 ############
 
 def prob_weibull(x, shape, scale):
-    p = (shape/scale)*(x/scale)**(shape-1)*exp(-(x/scale)**shape)
+    p = (shape/scale)*(x/scale)**(shape-1)*np.exp(-(x/scale)**shape)
     return p
 
 def prob_gamma(x, shape, scale):
@@ -33,8 +36,8 @@ def prob_vonmises(x, kappa, loc):
 #    print "kappa, loc: ", kappa, loc
 #    p = vonmises.pdf(x*pi/180.0,kappa, loc=loc)
 #    p = [vonmises.pdf(x*pi/180.0 + m,kappa, loc=loc) for m in [-2*pi, 0, 2*pi]]
-    p = [vonmises.pdf(x + m,kappa, loc=loc) for m in [-2*pi, 0, 2*pi]]
-    p = max(p)
+    p = np.array([vonmises.pdf(x + m,kappa, loc=loc) for m in [-2*pi, 0, 2*pi]])
+    p = np.amax(p, axis=0)
     return p
 
 ########
@@ -68,13 +71,14 @@ def interp_tab2(fname):
 #    z1 = [float(s) for s in dat[14][1:]]
 #    print len(z1), z1
     z = np.array([  [myfloat(s) for s in dat[i][1:]] for i in range(1,len(x)+1)])
-    xx, yy = np.meshgrid(y,x)
+#    xx, yy = np.meshgrid(y,x)
 #    print xx,yy,z
 #    print xx.shape, yy.shape,z.shape
-    f = interpolate.interp2d(xx, yy, z, kind='linear')
+#    f = interpolate.interp2d(xx, yy, z, kind='linear')
+    # the first row of the file holds the values along the columns, the first column those along the rows
+    f = Tab2(y, x, z)
     return f
 
-
 class Context(object):
     def __init__(self,dim=4):
         npr.seed(1)
@@ -100,89 +104,119 @@ class Context(object):
         self.Tp0 = 2
         self.WindDir0 = 0
     
-    def sample(self,ns):
-    #    WaveDir = draw_vonmises( 0.844272129,-0.477919589, ns)
-        Vhub = []
-        WaveDir = []
-        Hs = []
-        Tp = []
-        Prob = []
+    def sample(self,ns, method='random', seed=None):
+        """ sample ns (Vhub, WaveDir, Hs, Tp) tuples, by pseudo random sampling
+        (method='random'), or by mapping Latin hypercube (method='lhs') or scrambled
+        low discrepancy points (method='sobol' or 'halton') through the inverse cdf's
+        of the conditional distributions, see sample_points """
+        if (method != 'random'):
+            return self.sample_points(ns, method, seed)
+        Vhub, WaveDir, Hs, Tp, Prob = [np.zeros(0) for k in range(5)]
+        block = ns
+        while len(Vhub) < ns:
+            res = self.sample_block(block)
+            Vhub, WaveDir, Hs, Tp, Prob = [np.concatenate((a, b)) for a, b in zip([Vhub, WaveDir, Hs, Tp, Prob], res)]
+            # top up, with the block size based on the acceptance rate so far
+            nmiss = ns - len(Vhub)
+            accept = max(len(res[0]), 1) / float(block)
+            block = int(1.1 * nmiss / accept) + 10
+
+        self.Vhub = Vhub[:ns]
+        self.WaveDir = WaveDir[:ns]
+        self.Hs = Hs[:ns]
+        self.Tp = Tp[:ns]
+        self.Prob = Prob[:ns]
+
+    def sample_block(self, m):
+        """ draw a block of m candidate (Vhub, WaveDir, Hs, Tp) samples and
+        return the valid ones and their probabilities as arrays: Vhub outside
+        Vbounds and negative conditional distribution parameters are invalid """
+        dim = self.dim
+        v = draw_weibull(2.120, 9.767, m)  # hard coded east coast vals
+        wd = self.WindDir0 * np.ones(m)
+        hg = self.Hs0 * np.ones(m)
+        tg = self.Tp0 * np.ones(m)
+        prob = prob_weibull(v, 2.120, 9.767)
+        if (dim <= 1):
+            return v, wd, hg, tg, prob
+
+        valid = (v >= self.Vbounds[0]) & (v <= self.Vbounds[1])
+        v, wd, hg, tg, prob = v[valid], wd[valid], hg[valid], tg[valid], prob[valid]
+        k = self.WindDirKappaTab(v)
+        l = self.WindDirLocTab(v)
+        # in [l - pi, l + pi] like scipy.stats.vonmises.rvs, not wrapped to [-pi, pi]
+        wd = l + npr.vonmises(0, k)
+        prob *= prob_vonmises(wd, k, l)
+        if (dim <= 2):
+            return v, wd, hg, tg, prob
+
+        hshape = self.HsShapeTab(v,wd)
+        hscale = self.HsScaleTab(v,wd)
+        tshape = self.TpShapeTab(v,wd)
+        tscale = self.TpScaleTab(v,wd)
+        valid = (hshape > 0) & (hscale > 0) & (tshape > 0) & (tscale > 0)
+        v, wd, prob = v[valid], wd[valid], prob[valid]
+        hshape, hscale, tshape, tscale = hshape[valid], hscale[valid], tshape[valid], tscale[valid]
+        hg = npr.gamma(hshape, hscale)
+        tg = npr.gamma(tshape, tscale)
+        prob *= prob_gamma(hg, hshape, hscale) * prob_gamma(tg, tshape, tscale)
+        return v, wd, hg, tg, prob
+
+    def map_points(self, u):
+        """ map points u in the unit hypercube ([n, dim] array) to samples of the
+        joint distribution by the inverse cdf's of the conditional distributions.
+        Returns the samples, their probabilities and a mask of the valid samples """
+        n = u.shape[0]
         dim = self.dim
-    #    shape = HsShapeTab(10,110)
-    #    print shape
-    #    vtest = draw_weibull (2.120, 9.767, 20)
-    #    print vtest
-        i = 0
-#        fweib = file("weibull.dat", "w")
-        while i < ns:
-            hg = self.Hs0
-            tg = self.Tp0
-            wd = self.WindDir0
-            phg = 1
-            ptg = 1
-            pwd = 1
-            v = draw_weibull (2.120, 9.767, 1)  # hard coded east coast vals
-            v = v[0]
-            pv = prob_weibull(v, 2.120, 9.767)
-#            fweib.write("%f\n" % v)  ## record ALL Weibull samples
-    #        print "v=",v
-            got_sample = False
-            if (dim <= 1):
-                got_sample = True
-            elif (v< self.Vbounds[0] or v>self.Vbounds[1]):
-                got_sample = False
-            else:
-#                print "v, bounds", v, self.Vbounds
-                k = self.WindDirKappaTab(v)
-                l = self.WindDirLocTab(v)
-    #            print "k,l", k,l
-                wd = draw_vonmises(k, l, 1)
-                wd = wd[0]
-                pwd = prob_vonmises(wd, k, l)
-#                print v, wd, pwd, k,l
-                if (dim <= 2):
-                    got_sample = True                    
-                else:
-                    hshape = self.HsShapeTab(v,wd)
-                    hscale = self.HsScaleTab(v,wd)
-                    if (hshape < 0 or hscale < 0): 
-                        got_sample = False
-                    else:
-                        hg = draw_gamma(hshape, hscale, 1)
-                        hg = hg[0]
-                        phg = prob_gamma(hg, hshape, hscale)
-
-                    tshape = self.TpShapeTab(v,wd)
-                    tscale = self.TpScaleTab(v,wd)
-                #       print "shape, scale", tshape, tscale
-                    if (tshape < 0 or tscale < 0): 
-                        got_sample = False
-                    else:
-#                        print tshape, tscale
-                        tg = draw_gamma(tshape, tscale, 1)
-                        tg = tg[0]
-                        ptg = prob_gamma(tg, tshape, tscale)
-                        got_sample = True
-
-            if (got_sample):
-# and (hshape > 0 and hscale > 0 and tshape > 0 and tscale > 0): 
- #                   if (hg >= self.HsBounds[0] and hg <=self.HsBounds[1] and
- #                       tg >= self.TpBounds[0] and tg <=self.TpBounds[1] and
-  #                      wd >= self.WindDirBounds[0] and wd <= self.WindDirBounds[1]):
-                    # finally we have a sample with nonzero prob.
-                Hs.append(hg)
-                Vhub.append(v)
-                WaveDir.append( wd )
-                Tp.append(tg)
-                Prob.append(pv*pwd*phg*ptg)
-                i += 1
-#        fweib.close()
-
-        self.Hs = Hs
-        self.Vhub = Vhub
-        self.WaveDir = WaveDir
-        self.Tp = Tp
-        self.Prob = Prob
+        WaveDir = self.WindDir0 * np.ones(n)
+        Hs = self.Hs0 * np.ones(n)
+        Tp = self.Tp0 * np.ones(n)
+        valid = np.ones(n, dtype=bool)
+
+        # Weibull, truncated to Vbounds above one dimension like the rejection sampler
+        p = u[:,0]
+        if (dim > 1):
+            p = p * (1 - np.exp(-(self.Vbounds[1] / 9.767)**2.120))
+        Vhub = 9.767 * (-np.log1p(-p))**(1 / 2.120)
+        Prob = prob_weibull(Vhub, 2.120, 9.767)
+        if (dim > 1):
+            k = self.WindDirKappaTab(Vhub)
+            l = self.WindDirLocTab(Vhub)
+            # in [l - pi, l + pi] like the random sampler
+            WaveDir = l + ppf_vonmises(u[:,1], k, 0.)
+            Prob *= prob_vonmises(WaveDir, k, l)
+        if (dim > 2):
+            hshape = self.HsShapeTab(Vhub,WaveDir)
+            hscale = self.HsScaleTab(Vhub,WaveDir)
+            tshape = self.TpShapeTab(Vhub,WaveDir)
+            tscale = self.TpScaleTab(Vhub,WaveDir)
+            valid = (hshape > 0) & (hscale > 0) & (tshape > 0) & (tscale > 0)
+            hshape[~valid] = 1.
+            tshape[~valid] = 1.
+            Hs = hscale * gammaincinv(hshape, u[:,2])
+            Tp = tscale * gammaincinv(tshape, u[:,3])
+            Prob *= prob_gamma(Hs, hshape, hscale) * prob_gamma(Tp, tshape, tscale)
+            Prob[~valid] = 0
+        return Vhub, WaveDir, Hs, Tp, Prob, valid
+
+    def sample_points(self, ns, method, seed=None):
+        """ sample ns (Vhub, WaveDir, Hs, Tp) tuples from Latin hypercube or scrambled
+        low discrepancy points, see map_points. Points that map to invalid
+        samples (negative distribution parameters) are dropped, and more points are
+        drawn until ns valid samples are found """
+        m = ns
+        while True:
+            u = uniform_points(m, 4, method, seed)
+            res = self.map_points(u)
+            valid = res[-1]
+            nvalid = valid.sum()
+            if (nvalid >= ns):
+                break
+            if (nvalid == 0 and m > 100 * ns):
+                raise ValueError, "no valid samples found"
+            m = int(1.1 * m * ns / max(nvalid, 1)) + 1
+        idx = np.nonzero(valid)[0][:ns]
+        self.Vhub, self.WaveDir, self.Hs, self.Tp, self.Prob = [r[idx] for r in res[:-1]]
 
     def write_samples(self, write_prob = False, gdict = {}):
         fout = file("dlcsamples.txt", "w")
@@ -192,56 +226,49 @@ class Context(object):
         if (write_prob):
             fout.write(" Prob")
         fout.write("\n")
-        for i in range(len(self.Vhub)):
-            for key in gdict:
-                fout.write("%e " % gdict[key])
-            fout.write("%.16e %.16e %.16e %.16e" % (self.Vhub[i], self.WaveDir[i], self.Hs[i], self.Tp[i]))
-            if (write_prob):
-#                y = [self.Vhub[i], self.WaveDir[i], self.Hs[i], self.Tp[i]]
-#                s = ["%.2f" % yf for yf in y]
-#                x = [float(ss) for ss in s]
-#                p2 = self.calc_prob(x)
-#                p3 = self.calc_prob(y)
-                fout.write(" %.16e" % (self.Prob[i]))
-            fout.write("\n")
+        n = len(self.Vhub)
+        cols = [gdict[key] * np.ones(n) for key in gdict]
+        cols += [self.Vhub, self.WaveDir, self.Hs, self.Tp]
+        fmt = ["%e" for key in gdict] + ["%.16e" for i in range(4)]
+        if (write_prob):
+            cols.append(self.Prob)
+            fmt.append("%.16e")
+        np.savetxt(fout, np.column_stack(cols), fmt=fmt)
         fout.close()
 
 
     def calc_prob(self, x):
-        v=x[0]
-        pv = prob_weibull(v, 2.120, 9.767)
+        return self.calc_prob_batch(np.array([x], dtype=float))[0]
+
+    def calc_prob_batch(self, x):
+        """ joint probabilities of an [n, dim] array of samples (Vhub, WaveDir, Hs, Tp),
+        zero for samples outside the bounds or with invalid distribution parameters """
+        x = np.asarray(x, dtype=float)
+        v = x[:,0]
+        prob = prob_weibull(v, 2.120, 9.767)
         if (self.dim == 1):
-            return pv
-        if (v>= self.Vbounds[0] and v<=self.Vbounds[1]):
-            wd = x[1]
-            k = self.WindDirKappaTab(v)
-            l = self.WindDirLocTab(v)
-            pwd = prob_vonmises(wd, k, l)
-            if (self.dim == 2):
-                prob = pv * pwd
-#                print v, k, l, wd, pv, pwd, prob
-                return prob
-            else:
-                hg = x[2]
-                tg = x[3]
-                hshape = self.HsShapeTab(v,wd)
-                hscale = self.HsScaleTab(v,wd)
-                if (hshape > 0 and hscale > 0): 
-                    phg = prob_gamma(hg, hshape, hscale)
-                tshape = self.TpShapeTab(v,wd)
-                tscale = self.TpScaleTab(v,wd)
-                if (tshape > 0 and tscale > 0): 
-                    ptg = prob_gamma(tg, tshape, tscale)
-
-                if (hshape > 0 and hscale > 0 and tshape > 0 and tscale > 0): 
-                    if (hg >= self.HsBounds[0] and hg <=self.HsBounds[1] and
-                        tg >= self.TpBounds[0] and tg <=self.TpBounds[1] and
-                        wd >= self.WindDirBounds[0] and wd <= self.WindDirBounds[1]):
-                        # finally we have a sample with nonzero prob.
-                            prob = pv*pwd*phg*ptg
-                            return prob[0]
-#        print "returning 0 prob, out of bounds ", x
-        return 0
+            return prob
+        inb = (v >= self.Vbounds[0]) & (v <= self.Vbounds[1])
+        prob[~inb] = 0
+        v = v[inb]
+        wd = x[inb,1]
+        k = self.WindDirKappaTab(v)
+        l = self.WindDirLocTab(v)
+        p = prob_vonmises(wd, k, l)
+        if (self.dim > 2):
+            hg = x[inb,2]
+            tg = x[inb,3]
+            hshape = self.HsShapeTab(v,wd)
+            hscale = self.HsScaleTab(v,wd)
+            tshape = self.TpShapeTab(v,wd)
+            tscale = self.TpScaleTab(v,wd)
+            valid = ((hshape > 0) & (hscale > 0) & (tshape > 0) & (tscale > 0) &
+                     (hg >= self.HsBounds[0]) & (hg <= self.HsBounds[1]) &
+                     (tg >= self.TpBounds[0]) & (tg <= self.TpBounds[1]) &
+                     (wd >= self.WindDirBounds[0]) & (wd <= self.WindDirBounds[1]))
+            p = np.where(valid, p * prob_gamma(hg, hshape, hscale) * prob_gamma(tg, tshape, tscale), 0)
+        prob[inb] *= p
+        return prob
 
 def get_options():
     from optparse import OptionParser
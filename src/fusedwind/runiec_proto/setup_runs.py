@@ -9,7 +9,10 @@
 
 ## first try, assume we are just given big list of samples
 
-import sys, os, os.path, re
+import sys, os, os.path, re, shutil, subprocess
+import numpy as np
+from fusedwind.lib.scheduler import JobQueue, LocalScheduler, JobTimeout
+from fusedwind.runSuite.runSummation import ConvergenceMonitor
 
 files_we_need = ["runjob.pbs.template", "PeregrineClusterAllocator.py", "sampler.py", "openaero.py",
                  "design_load_case.py",	"opendakota.py","distn_input.py","openruniec.py", "simplemc.py","dlcproto-files.txt",
@@ -104,6 +107,11 @@ def get_options():
                                     help="root directory for tree of runs (e.g. /scratch/pgraf/runiec/proto/runs/)")
     parser.add_option("-m", "--multiple", dest="multiple", help="setup for multiple input files instead of splitting one file", action="store_true", default=False)
     parser.add_option("-t", "--walltime", dest="jobtime", help="jobtime to request in pbs, in hours", type="int", default=10)
+    parser.add_option("-l", "--local", dest="nproc", help="run the jobs in this many local processes instead of writing pbs scripts", type="int", default=0)
+    parser.add_option("-r", "--retries", dest="retries", help="number of times a failed local job is retried", type="int", default=0)
+    parser.add_option("-e", "--rel_tol", dest="rel_tol", help="with --local, stop once the confidence intervals of the mean loads are within this relative error (Monte Carlo samples)", type="float", default=None)
+    parser.add_option("-c", "--channels", dest="channels", type="string", default=None,
+                                    help="comma separated output channels, e.g. TwrBsMxt,RootMxc1, that need to converge for --rel_tol")
     
     (options, args) = parser.parse_args()
     return options, args
@@ -133,6 +141,89 @@ def write_collection_script(output_names, all_files, options):
         fout.write("cp %s %s\n" % (name, outpath))
     fout.close()
 
+def run_job(sfile):
+    # run one sample file with openruniec.py in the job directory, killing it when the job times out
+    p = subprocess.Popen([sys.executable, "openruniec.py", "-i", sfile])
+    try:
+        ret = p.wait()
+    except JobTimeout:
+        p.kill()
+        p.wait()
+        raise
+    if (ret != 0):
+        raise RuntimeError, "openruniec.py returned %d" % ret
+    return sfile
+
+def read_channels(outname, channels):
+    # values of the given channels for the samples in an output file of openruniec.py, leaving out
+    # samples for which a channel could not be read (-99999.9999, written as -1.000000e+05)
+    hdr = file(outname).readline().lstrip("#").split()
+    missing = [c for c in channels if c not in hdr]
+    if (len(missing) > 0):
+        raise ValueError, "channels %s not in %s" % (", ".join(missing), outname)
+    dat = np.loadtxt(outname, skiprows=1, ndmin=2)[:, [hdr.index(c) for c in channels]]
+    return dat[(np.abs(dat + 99999.9999) > 0.01).all(axis=1)]
+
+def run_local(all_files, options):
+    # run the jobs set up by setup_dirs() on this machine instead of through pbs, copying each output back
+    # to the run root like collect_output.sh as soon as the job is done.  The status of the jobs is kept in
+    # <run_dir_root>/jobs.queue; rerunning with the same options resumes an interrupted campaign, skipping
+    # jobs with complete output and rerunning failed ones.
+    # With --rel_tol the loads of the samples of each completed job are fed to a ConvergenceMonitor, and no
+    # more jobs are started once the means of all --channels are within rel_tol; the remaining jobs are left
+    # pending.
+    rootdir = os.path.abspath(options.run_dir_root)
+    queue = JobQueue(os.path.join(rootdir, "jobs.queue"))
+    queue.reset()
+
+    def validate(key, sfile):
+        # output is complete if it has a line for each sample
+        dirname = os.path.join(rootdir, key)
+        outname = os.path.join(dirname, "dlcproto.out")
+        if (not os.path.exists(outname)):
+            return False
+        return len(file(outname).readlines()) == len(file(os.path.join(dirname, sfile)).readlines())
+
+    monitor = None
+    if (options.rel_tol != None):
+        if (options.channels == None):
+            raise ValueError, "--rel_tol needs the --channels that need to converge"
+        channels = [c.strip() for c in options.channels.split(",")]
+        monitor = ConvergenceMonitor(len(channels), rel_tol=options.rel_tol)
+
+    sched = LocalScheduler(run_job, nproc=options.nproc, timeout=3600*options.jobtime, retries=options.retries,
+                           queue=queue, rundir=rootdir, validate=validate)
+    names = {}
+    jobs = []
+    for i in range(len(all_files)):
+        fname = all_files[i]
+        key = "%s.dir" % fname
+        if (not options.multiple):
+            names[key] = os.path.join(rootdir, "dlcproto.out.%d" % i)
+        else:
+            names[key] = os.path.join(rootdir, "%s.out" % fname)
+        jobs.append((key, os.path.basename(fname)))
+
+    def collect(key, sfile):
+        shutil.copy(os.path.join(rootdir, key, "dlcproto.out"), names[key])
+        print "job %s done" % key
+        if (monitor != None):
+            monitor.update(read_channels(names[key], channels))
+
+    stop = None
+    if (monitor != None):
+        stop = lambda key, sfile: monitor.converged
+
+    try:
+        sched.run(jobs, collector=collect, stop=stop)
+    finally:
+        queue.close()
+    failed = queue.keys('failed')
+    print "%d of %d jobs done, %d failed" % (len(queue.keys('done')), len(queue), len(failed))
+    if (monitor != None and monitor.converged):
+        print "loads converged to relative error %e after %d samples, %d jobs not run" % \
+            (monitor.rel_error().max(), monitor.n, len(queue.keys('pending')))
+
 def setup_jobs():
     options, arg = get_options()
     if (not options.multiple):
@@ -143,8 +234,11 @@ def setup_jobs():
 
     # now setup directory for each
     all_output_names = setup_dirs(all_files, options)
-    # write collection script
-    write_collection_script(all_output_names, all_files, options)
+    if (options.nproc > 0):
+        run_local(all_files, options)
+    else:
+        # write collection script
+        write_collection_script(all_output_names, all_files, options)
     
 
 if __name__=="__main__":
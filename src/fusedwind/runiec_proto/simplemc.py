@@ -4,6 +4,8 @@ import numpy as np
 from numpy.random import weibull
 from scipy.stats import vonmises, gamma
 from math import pi
+from fusedwind.runSuite.runSummation import ConvergenceMonitor
+from fusedwind.lib.sampling import grid_points, tensor_rule, smolyak_rule
 
 
 class MultiIndex(object):
@@ -33,7 +35,8 @@ def prod(x):
     return val
 
 def fn(x):
-    val = sum(x**2)
+    # also evaluates an [n, dim] array of points at once
+    val = np.sum(x**2, axis=-1)
     return val
 
 #-------------
@@ -134,61 +137,65 @@ def int_det2(nsample):
     return lsum
 
 
+def read_values(lines, n):
+    # values of the field of interest and sample probabilities of the first n lines of a results file
+    lines = np.array(lines[:n])
+    return lines[:,20], lines[:,4]  ### NOTE exact field of interest!
+
 def int_det4(sctx,nsample,write,read):
-    ns = np.array(nsample)
-    dx = np.divide((xmax-xmin),(ns-1.0))
-    lsum = 0
-    psum = 0
-    done =False
-    midx = MultiIndex(dim, ns)
-    idx = 0
-    while not done:
-        x = xmin + np.multiply(dx, np.array(midx.midx))
-        if (write):
-            for j in range(dim):
-                fscan.write("%f " % x[j])
-            fscan.write("\n")
-        if (read):
-            val = fscanlines[idx][20]  ### NOTE exact field of interest!
-        else:
-            val = fn(x)
-        prob = sctx.calc_prob(x)
-#        prob = pdf2(x)
-        psum += prob
-        lsum += (val * prob * prod(dx))
-#        print x, val, prob, lsum, psum, dx
-        done = midx.incr()
-        idx += 1
+    # whole grid at once, first index running fastest like MultiIndex
+    x, dx = grid_points(xmin, xmax, nsample)
+    if (write):
+        np.savetxt(fscan, x, fmt="%f")
+    if (read):
+        val = read_values(fscanlines, len(x))[0]
+    else:
+        val = fn(x)
+    prob = sctx.calc_prob_batch(x)
+#    prob = pdf2(x)
+    psum = np.sum(prob)
+    lsum = np.sum(val * prob) * prod(dx)
     print "det int done, ", lsum, psum,  psum * prod(dx)
     return lsum
 
 def int_det4_cumulative(sctx,nsample,nsub):
+    # estimates on the grid and on nsub-1 nested coarser grids taking every 2nd, 4th, ... point
+    # in each dimension, all from one pass over the fine grid.  The coarse grids are subsets
+    # of the fine grid, so for grids ending at xmax use ns = 2**k+1 points.
     ns = np.array(nsample)
+    val, prob = read_values(fscanlines, prod(ns))
+#    prob = sctx.calc_prob_batch(grid_points(xmin, xmax, ns)[0])
+    val = val.reshape(ns, order='F')
+    prob = prob.reshape(ns, order='F')
     res = []
     for isub in range(nsub):
-        dx = np.divide((xmax-xmin),(ns-1.0))
-        lsum = 0
-        psum = 0
-        done =False
-        midx = MultiIndex(dim, ns)
-        idx = 0
-        while not done:
-            x = xmin + np.multiply(dx, np.array(midx.midx))
-#            print idx, x
-            val = fscanlines[idx][20]  ### NOTE exact field of interest!
-#            prob = sctx.calc_prob(x)
-            prob = fscanlines[idx][4]
-    #        prob = pdf2(x)
-            psum += prob
-            lsum += (val * prob * prod(dx))
-    #        print x, val, prob, lsum, psum, dx
-            done = midx.incr()
-            idx += 1
- #       print "det int done, ", lsum, psum,  psum * prod(dx)
-        ns = ns/2.0
-        res.append(lsum/(psum * prod(dx)))
+        sub = tuple(slice(None, None, 2**isub) for j in range(len(ns)))
+        p = prob[sub]
+        lsum = np.sum(val[sub] * p)
+        psum = np.sum(p)
+ #       print "det int done, ", p.shape, lsum, psum
+        res.append(lsum/psum)
     return res
 
+def int_quad4(sctx,rule,ns,write,read):
+    # rule: 'gauss' or 'clenshaw_curtis' for tensor product rules with ns points per dimension,
+    # 'smolyak' for the Clenshaw-Curtis sparse grid of level ns
+    if (rule == 'smolyak'):
+        x, w = smolyak_rule(ns, xmin, xmax)
+    else:
+        x, w = tensor_rule(rule, ns, xmin, xmax)
+    if (write):
+        np.savetxt(fscan, x, fmt="%f")
+    if (read):
+        val = read_values(fscanlines, len(x))[0]
+    else:
+        val = fn(x)
+    prob = sctx.calc_prob_batch(x)
+    psum = np.sum(w * prob)
+    lsum = np.sum(w * val * prob)
+    print "quad int done, ", rule, len(x), lsum, psum
+    return lsum
+
 def int_mc(nsample_per_dim):
     nsample = nsample_per_dim ** dim
     lsum = 0
@@ -211,9 +218,10 @@ def int_mc2(ns):
     lsum /= nsample
     return lsum
 
-def int_mc4(sctx,ns,write,read):
+def int_mc4(sctx,ns,write,read,method='random'):
+    # method: 'random', or 'lhs', 'sobol', 'halton' for Latin hypercube or QMC sampling
     nsample = prod(ns)
-    sctx.sample(nsample)
+    sctx.sample(nsample, method=method)
     if (dim == 1):
         xx = sctx.Vhub
     elif (dim == 2):
@@ -238,8 +246,9 @@ def int_mc4(sctx,ns,write,read):
     lsum /= nsample
     return lsum
 
-def int_mc4_cumulative(sctx,ns,incr):
+def int_mc4_cumulative(sctx,ns,incr,rel_tol=None):
     nsample = prod(ns)
+    monitor = ConvergenceMonitor(1, rel_tol=rel_tol)
 #    sctx.sample(nsample)
 #    if (dim == 1):
 #        xx = sctx.Vhub
@@ -257,18 +266,20 @@ def int_mc4_cumulative(sctx,ns,incr):
             x = np.array([x])
         val = fsamplines[i][20]  ### NOTE exact field of interest!
         lsum += val
+        monitor.update(val)
         if (check_prob):
             prob = sctx.calc_prob(x)
             print i, x, "   %e" %( prob)
         if (i > 0 and i % incr == 0):
-            vals = fsamplines[0:i]
-            vals = [vals[j][20] for j in range(i)]
-            sd = np.std(vals)
-            est = lsum/float(i)
-            err = sd/np.sqrt(i)
-            print i, est, sd, err, est+err, est-err
-
-    lsum /= nsample
+            est = monitor.mean[0]
+            sd = monitor.stats.std[0]
+            err = monitor.stderr[0]
+            print i, est, sd, err, est+err, est-err, monitor.ci_halfwidth()[0]
+        if (monitor.converged):
+            print "converged to relative error %e after %d samples" % (monitor.rel_error()[0], monitor.n)
+            break
+
+    lsum /= monitor.n
     return lsum
 
 
@@ -475,6 +486,26 @@ def int_test(fnamein = None, head = None, tail = None):
         res = int_det4_cumulative(sctx,ns,1)
         print ns, prod(ns), res
 
+def quad_test():
+    # grid, Gauss, sparse grid and MC estimates of the test integral for increasing numbers of points
+    import sampler
+    global xmin, xmax, dim
+
+    dim = 4
+    xmin = np.array([1,-pi,0,0])
+    xmax = np.array([30,pi,6,6])
+    sctx = sampler.Context(dim)
+
+    for n in [3,5,9,17]:
+        ns = [n for i in range(dim)]
+        lsum1 = int_det4(sctx,ns,False,False)
+        lsum2 = int_quad4(sctx,'gauss',ns,False,False)
+        lsum3 = int_mc4(sctx,ns,False,False,'sobol')
+        print ns, prod(ns), lsum1, lsum2, lsum3
+    for level in range(1,7):
+        lsum = int_quad4(sctx,'smolyak',level,False,False)
+        print "smolyak level", level, lsum
+
 def mc_test(fname = None):
     import sampler
     global xmin, xmax, shape, scale, gshape, gscale, kappa, loc, dim, kappa0
@@ -620,6 +651,7 @@ def run_fast():
 if __name__=="__main__":
     simple_test()
 #    less_simple_test()
+#    quad_test()
 #    real_test(write=True, read=False)   # generate samples, evaluate and integrate test function
 #    real_test(write=False, read=True)   # read samples and function values, just do integration of read-in values
 #    run_fast()
@@ -4,7 +4,7 @@ import unittest
 import pkg_resources
 import os
 
-from fusedwind.turbine.geometry_vt import AirfoilShape, BlendAirfoilShapes
+from fusedwind.turbine.geometry_vt import AirfoilShape, BlendAirfoilShapes, redistribute_airfoils
 
 PATH = pkg_resources.resource_filename('fusedwind', 'test')
 
@@ -148,6 +148,31 @@ class BlendAirfoilTest(unittest.TestCase):
         aff = af.redistribute(20, even=True)
         self.assertEqual(np.testing.assert_array_almost_equal(aff.points, aff_data, decimal=6), None)
 
+    def test_airfoilshape_lazy(self):
+
+        af = AirfoilShape(afs[0])
+        self.assertEqual(af._cache, {})
+        sLE = af.sLE
+        self.assertTrue('sLE' in af._cache)
+        af.initialize(afs[1])
+        self.assertEqual(af._cache, {})
+        self.assertNotAlmostEqual(af.sLE, sLE, places=6)
+
+    def test_redistribute_airfoils(self):
+
+        points = redistribute_airfoils(afs, 20, even=True)
+        self.assertEqual(points.shape, (3, 20, 2))
+        self.assertEqual(np.testing.assert_array_almost_equal(points[0], aff_data, decimal=6), None)
+        for af, p in zip(afs, points):
+            aff = AirfoilShape(af).redistribute(20, even=True)
+            self.assertEqual(np.testing.assert_array_almost_equal(p, aff.points, decimal=10), None)
+
+        dist = [[0., -1, 1], [0.5, 0.01, 30], [1., -1, 60]]
+        points = redistribute_airfoils(afs, 60, dist=dist, nproc=2)
+        for af, p in zip(afs, points):
+            aff = AirfoilShape(af).redistribute(60, dist=dist)
+            self.assertEqual(np.testing.assert_array_almost_equal(p, aff.points, decimal=10), None)
+
     def test_pchip(self):
 
         b = pchip_interpolator()
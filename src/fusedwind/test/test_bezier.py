@@ -34,6 +34,14 @@ class TestBezier(unittest.TestCase):
 
         self.assertEqual(np.testing.assert_array_almost_equal(b.points, points, decimal=6), None)
 
+    def test_bezier_derivative(self):
+
+        b = make_bezier()
+        dp = b.derivative()
+
+        self.assertEqual(np.testing.assert_array_almost_equal(dp[0], [0., -1.], decimal=10), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(dp[-1], [1., -0.4], decimal=10), None)
+
 if __name__ == '__main__':
 
     unittest.main()
@@ -6,8 +6,14 @@ import os
 
 from openmdao.main.api import Assembly
 
-from fusedwind.turbine.blade_structure import BladeStructureReader, BladeStructureWriter, BladeStructureCSBuilder
+from fusedwind.turbine.blade_structure import BladeStructureReader, BladeStructureWriter, BladeStructureCSBuilder, \
+                                             SplinedBladeStructure, SplinedBladeStructureArray, \
+                                             BladeStructureProperties, read_bladestructure_npz, \
+                                             convert_bladestructure_text_to_npz, \
+                                             convert_bladestructure_npz_to_text
 from fusedwind.turbine.structure_vt import BladeStructureVT3D
+from fusedwind.turbine.geometry_vt import BladePlanformVT, AirfoilShape
+from fusedwind.test.test_bladesurface import configure_blade
 
 
 
@@ -176,6 +182,182 @@ class BladeSurfaceTestCase(unittest.TestCase):
                 self.assertEqual(np.testing.assert_almost_equal(l2.thickness, l1.thickness, decimal=5), None)
 
 
+class BladeStructureNPZTestCase(unittest.TestCase):
+
+    def tearDown(self):
+
+        files = glob.glob('testST*')
+        for name in files:
+            os.remove(name)
+
+    def compare(self, st0, st1):
+
+        self.assertEqual(np.testing.assert_array_almost_equal(st1.x, st0.x, decimal=10), None)
+        for name in st0.DPs:
+            self.assertEqual(np.testing.assert_array_almost_equal(getattr(st1, name), getattr(st0, name), decimal=10), None)
+        self.assertEqual(st1.iwebs, st0.iwebs)
+        for rname in st0.regions + st0.webs:
+            r0 = getattr(st0, rname)
+            r1 = getattr(st1, rname)
+            self.assertEqual(r1.layers, r0.layers)
+            for lname in r0.layers:
+                l0 = getattr(r0, lname)
+                l1 = getattr(r1, lname)
+                self.assertEqual(np.testing.assert_array_almost_equal(l1.thickness, l0.thickness, decimal=10), None)
+                self.assertEqual(np.testing.assert_array_almost_equal(l1.angle, l0.angle, decimal=10), None)
+        self.assertEqual(sorted(st1.materials.keys()), sorted(st0.materials.keys()))
+        for name, mat in st0.materials.iteritems():
+            self.assertAlmostEqual(st1.materials[name].E1, mat.E1)
+            self.assertAlmostEqual(st1.materials[name].s11_t, mat.s11_t)
+            self.assertEqual(st1.materials[name].failure_criterium, mat.failure_criterium)
+
+    def test_npz_readwrite(self):
+
+        top = BladeStructureSetup()
+        top.writer.file_format = 'npz'
+        top.reader.file_format = 'npz'
+        top.run()
+        self.compare(top.stbase, top.reader.st3d)
+
+        st = read_bladestructure_npz('testST_1.npz', regions=['region01'])
+        self.assertEqual(st.region01.layers, top.stbase.region01.layers)
+        self.assertEqual(st.region00.layers, [])
+
+    def test_convert(self):
+
+        top = BladeStructureSetup()
+        top.run()
+        convert_bladestructure_text_to_npz('testST_1', 'testST_2.npz')
+        convert_bladestructure_npz_to_text('testST_2.npz', 'testST_3')
+        reader = BladeStructureReader()
+        reader.filebase = 'testST_3'
+        reader.run()
+        self.compare(top.reader.st3d, reader.st3d)
+
+
+def configure_pf():
+
+    pf = BladePlanformVT()
+    pf.blade_length = 1.
+    pf.s = np.array([0, 0.25, 0.5, 0.75, 1.])
+    pf.x = np.zeros(5)
+    pf.y = np.zeros(5)
+    pf.z = pf.s.copy()
+    pf.rot_x = np.zeros(5)
+    pf.rot_y = np.zeros(5)
+    pf.rot_z = np.zeros(5)
+    pf.chord = np.array([0.06, 0.07, 0.05, 0.03, 0.01])
+    pf.rthick = np.array([1., 0.5, 0.3, 0.25, 0.24])
+    pf.athick = pf.chord * pf.rthick
+    pf.p_le = np.array([0.5, 0.4, 0.35, 0.35, 0.35])
+    return pf
+
+
+class SplinedBladeStructureTestCase(unittest.TestCase):
+
+    def test_array_consistency(self):
+
+        st = BladeStructureSetup().stbase
+        tops = []
+        for cls in [SplinedBladeStructure, SplinedBladeStructureArray]:
+            top = cls()
+            top.pfIn = configure_pf()
+            top.st3dIn = st.copy()
+            top.nC = 4
+            top.span_ni = 10
+            top.configure_bladestructure()
+            top.DP02_C[1] = -0.05
+            top.r01uniaxT_C[2] = 0.01
+            top.web00biaxA_C[1] = 10.
+            top.run()
+            tops.append(top)
+
+        st0, st1 = tops[0].st3dOut, tops[1].st3dOut
+        for name in ['DP01', 'DP02', 'DP03']:
+            self.assertEqual(np.testing.assert_array_almost_equal(getattr(st1, name), getattr(st0, name), decimal=10), None)
+        for rname in st0.regions + st0.webs:
+            r0 = getattr(st0, rname)
+            r1 = getattr(st1, rname)
+            self.assertEqual(np.testing.assert_array_almost_equal(r1.thickness, r0.thickness, decimal=10), None)
+            for lname in r0.layers:
+                self.assertEqual(np.testing.assert_array_almost_equal(getattr(r1, lname).angle,
+                                                                      getattr(r0, lname).angle, decimal=10), None)
+
+
+class BladeStructureCSBuilderTestCase(unittest.TestCase):
+
+    def tearDown(self):
+
+        files = glob.glob('testST*')
+        for name in files:
+            os.remove(name)
+
+    def test_build(self):
+
+        top = BladeStructureSetup()
+        top.run()
+        st = top.reader.st3d
+        cs2d = []
+        for nproc in [1, 2]:
+            b = BladeStructureCSBuilder()
+            b.st3d = st
+            b.nproc = nproc
+            b.run()
+            cs2d.append(b.cs2d)
+
+        for cs0, cs1 in zip(*cs2d):
+            self.assertEqual(cs0.regions, cs1.regions)
+            self.assertEqual(cs0.webs, cs1.webs)
+            self.assertEqual(np.testing.assert_array_almost_equal(cs0.DPs, cs1.DPs, decimal=10), None)
+            for rname in cs0.regions + cs0.webs:
+                r0 = getattr(cs0, rname)
+                r1 = getattr(cs1, rname)
+                self.assertEqual(r0.layers, r1.layers)
+                for lname in r0.layers:
+                    self.assertEqual(getattr(r0, lname).materialname, getattr(r1, lname).materialname)
+                    self.assertAlmostEqual(getattr(r0, lname).thickness, getattr(r1, lname).thickness, places=10)
+
+        cs = cs2d[0]
+        for i in range(st.x.shape[0]):
+            reg = st.region00
+            layers = [lname for lname in reg.layers if getattr(reg, lname).thickness[i] > 0.]
+            self.assertEqual(cs[i].REGION00.layers, layers)
+        self.assertEqual(np.testing.assert_array_almost_equal(cs[0].DPs, [-1., -0.5, -0.35, 0.35, 0.5, 1.], decimal=10), None)
+        # materials are shared between sections but not with st3d
+        self.assertTrue(cs[0].materials['uniax'] is cs[1].materials['uniax'])
+        self.assertFalse(cs[0].materials['uniax'] is st.uniax)
+
+
+class BladeStructurePropertiesTestCase(unittest.TestCase):
+
+    def test_dp_curves(self):
+
+        top = configure_blade()
+        top.run()
+        p = BladeStructureProperties()
+        p.surface = top.blade_surface.surfnorot
+        p.pf = top.pf_splines.pfOut
+        p.st3d = BladeStructureSetup().stbase
+        p.cap_ids = [[2, 3], [1, 4]]
+        p.run()
+
+        for i in range(p.surface.surface.shape[1]):
+            af = AirfoilShape(points=p.surface.surface[:, i, :])
+            for j, name in enumerate(p.st3d.DPs):
+                s_chord = np.interp(p.pf.s[i], p.st3d.x, getattr(p.st3d, name))
+                xx = af.interp_s(af.s_to_01(s_chord))
+                self.assertEqual(np.testing.assert_array_almost_equal(p.dp_curves[j][i], xx, decimal=10), None)
+        dW0 = p.dp_curves[2] - p.dp_curves[1]
+        alpha = np.array([np.arctan(a) for a in dW0[:, 0]/dW0[:, 1]]) * 180. / np.pi
+        self.assertEqual(np.testing.assert_array_almost_equal(p.alphaW0, alpha, decimal=10), None)
+
+        # changing the structure reuses the section parameterization
+        fixed = p._fixed
+        p.st3d.DP02 = np.ones(4) * -0.3
+        p.run()
+        self.assertTrue(p._fixed is fixed)
+
+
 if __name__ == '__main__':
 
     # top = BladeStructureSetup()
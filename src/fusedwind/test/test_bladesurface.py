@@ -7,7 +7,7 @@ import unittest
 from openmdao.main.api import Assembly
 
 from fusedwind.turbine.configurations import configure_bladesurface
-from fusedwind.turbine.geometry import read_blade_planform
+from fusedwind.turbine.geometry import read_blade_planform, LoftedBladeSurface
 
 PATH = pkg_resources.resource_filename('fusedwind', 'test')
 
@@ -40,6 +40,15 @@ def configure_blade():
 
     return top
 
+
+class TaggedBladeSurface(LoftedBladeSurface):
+
+    def set_airfoil(self, airfoil, pos_z):
+
+        self.tagged.append(pos_z)
+        return airfoil
+
+
 class LoftedBladeSurfaceTest(unittest.TestCase):
 
     def test_build(self):
@@ -48,6 +57,30 @@ class LoftedBladeSurfaceTest(unittest.TestCase):
         d = np.loadtxt(os.path.join(PATH, 'data/blade_test_data.dat')).reshape(40, 5, 3)
         self.assertEqual(np.testing.assert_array_almost_equal(top.blade_surface.surfout.surface, d, decimal=6), None)
 
+    def test_interpolate_profiles(self):
+        top = configure_blade()
+        top.run()
+        surf = top.blade_surface.surfout
+        x = np.array([0., 0.13, 0.5, 0.77, 1.])
+        profs = surf.interpolate_profiles(x)
+        for j, ix in enumerate(x):
+            p = np.array([[np.interp(ix, surf.axis.s, surf.surface[i, :, k])
+                           for k in range(3)] for i in range(surf.surface.shape[0])])
+            self.assertEqual(np.testing.assert_array_almost_equal(profs[:, j, :], p, decimal=10), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(surf.interpolate_profile(ix), p, decimal=10), None)
+    def test_set_airfoil_hook(self):
+        # an overridden set_airfoil is called for each section also when dist_LE is set
+        b = TaggedBladeSurface()
+        b.tagged = []
+        b.redistribute_flag = True
+        b.chord_ni = 40
+        b.dist_LE = np.array([[0., 0.001], [1., 0.001]])
+        b.pf.z = np.array([0., 0.5, 1.])
+        afs = [np.loadtxt(os.path.join(PATH, 'data/ffaw3301.dat')) for i in range(3)]
+        afs = b.redistribute_sections(afs)
+        self.assertEqual(b.tagged, [0., 0.5, 1.])
+        self.assertEqual(afs[0].shape, (40, 2))
+
 if __name__ == '__main__':
 
     unittest.main()
@@ -0,0 +1,160 @@
+import numpy as np
+import unittest
+import shutil
+import tempfile
+import os
+
+from fusedwind.turbine.structure_vt import CrossSectionStructureVT, MaterialProps, BeamStructureVT
+from fusedwind.turbine.cs_dispatch import SectionDispatcher, SectionDiskCache, section_hash, \
+                                        assemble_beam_structure
+
+
+def configure_sections(n):
+
+    mat = MaterialProps()
+    mat.materialname = 'uniax'
+    mat.E1 = 41.63e9
+    mat.rho = 1915.5
+
+    cs2d = []
+    for i in range(n):
+        st2d = CrossSectionStructureVT()
+        st2d.s = float(i)
+        st2d.DPs = [-1., 1.]
+        r = st2d.add_region('REGION00')
+        r.s0 = -1.
+        r.s1 = 1.
+        l = r.add_layer('uniax')
+        l.materialname = 'uniax'
+        l.thickness = 0.01 * (i + 1)
+        l.angle = 0.
+        r.thickness = l.thickness
+        st2d.add_material('uniax', mat)
+        cs2d.append(st2d)
+    return cs2d
+
+
+def mass(st2d):
+
+    r = st2d.REGION00
+    return r.thickness * st2d.materials['uniax'].rho
+
+
+def beam_props(st2d):
+
+    return {'s': st2d.s, 'dm': mass(st2d), 'A': st2d.REGION00.thickness}
+
+
+_calls = []
+
+def counted_mass(st2d):
+
+    _calls.append(st2d.s)
+    return mass(st2d)
+
+
+def failing_mass(st2d):
+
+    _calls.append(st2d.s)
+    if _calls.count(st2d.s) < 2:
+        raise RuntimeError('solver failed')
+    return mass(st2d)
+
+
+class SectionDispatcherTest(unittest.TestCase):
+
+    def setUp(self):
+
+        del _calls[:]
+
+    def test_hash(self):
+
+        cs2d = configure_sections(2)
+        h = section_hash(cs2d[0])
+        self.assertEqual(h, section_hash(configure_sections(1)[0]))
+        self.assertNotEqual(h, section_hash(cs2d[1]))
+        self.assertNotEqual(h, section_hash(cs2d[0], key='mesh=fine'))
+        cs2d[0].materials['uniax'].E1 = 42.e9
+        self.assertNotEqual(h, section_hash(cs2d[0]))
+
+    def test_dispatch(self):
+
+        cs2d = configure_sections(5)
+        expected = [mass(cs) for cs in cs2d]
+        for nproc in [1, 2]:
+            d = SectionDispatcher(mass, nproc=nproc)
+            self.assertEqual(np.testing.assert_array_almost_equal(d(cs2d), expected, decimal=10), None)
+
+    def test_cache(self):
+
+        cs2d = configure_sections(3)
+        d = SectionDispatcher(counted_mass)
+        d(cs2d)
+        cs2d[1].REGION00.uniax.thickness = 0.05
+        cs2d[1].REGION00.thickness = 0.05
+        res = d(cs2d)
+        self.assertEqual(_calls, [0., 1., 2., 1.])
+        self.assertAlmostEqual(res[1], 0.05 * 1915.5, places=10)
+
+    def test_retries(self):
+
+        cs2d = configure_sections(2)
+        d = SectionDispatcher(failing_mass, retries=1)
+        self.assertEqual(np.testing.assert_array_almost_equal(d(cs2d), [mass(cs) for cs in cs2d], decimal=10), None)
+        d = SectionDispatcher(failing_mass, use_cache=False)
+        self.assertRaises(RuntimeError, d, configure_sections(3)[2:])
+
+
+class SectionDiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        del _calls[:]
+        self.tmpdir = tempfile.mkdtemp()
+        self.cachedir = os.path.join(self.tmpdir, 'cs_cache')
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmpdir)
+
+    def test_dispatch(self):
+
+        cs2d = configure_sections(4)
+        d = SectionDispatcher(beam_props, cache=SectionDiskCache(self.cachedir))
+        res0 = d(cs2d)
+        self.assertEqual(len(os.listdir(self.cachedir)), 4)
+
+        # a new dispatcher reads the results from disk
+        d = SectionDispatcher(counted_mass, cache=SectionDiskCache(self.cachedir))
+        res1 = d(cs2d)
+        self.assertEqual(_calls, [])
+        beam = assemble_beam_structure(res1, BeamStructureVT())
+        self.assertEqual(np.testing.assert_array_almost_equal(beam.dm, [r['dm'] for r in res0], decimal=10), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(beam.s, [0., 1., 2., 3.], decimal=10), None)
+
+    def test_eviction(self):
+
+        cache = SectionDiskCache(self.cachedir)
+        for key in ['a', 'b', 'c']:
+            cache[key] = {'dm': np.ones(10)}
+        cache.max_size = 3 * cache._index['a'][1]
+        cache['a']
+        cache['d'] = {'dm': np.ones(10)}
+        self.assertEqual(sorted(os.listdir(self.cachedir)), ['a.npz', 'c.npz', 'd.npz'])
+        self.assertEqual(cache['d']['dm'].shape, (10,))
+
+    def test_oversized(self):
+
+        cache = SectionDiskCache(self.cachedir)
+        cache['a'] = {'dm': np.ones(10)}
+        cache.max_size = 2 * cache._index['a'][1]
+        # an entry larger than max_size is not stored and evicts nothing
+        cache['b'] = {'dm': np.random.random(1000)}
+        self.assertEqual(sorted(os.listdir(self.cachedir)), ['a.npz'])
+        self.assertTrue('b' not in cache._index)
+        self.assertEqual(cache['a']['dm'].shape, (10,))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
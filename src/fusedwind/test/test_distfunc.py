@@ -0,0 +1,45 @@
+
+import numpy as np
+import unittest
+
+from fusedwind.lib.distfunc import distfunc, transsinh, transtanh
+
+d_data = np.array([0.0, 0.023841070649174796, 0.11678000980398164,
+                   0.31066181142755356, 0.454487969758405, 0.5,
+                   0.5493250556085718, 0.7137436370281457, 0.9086280011842216,
+                   0.9820046907270401, 0.9972787148952458, 1.0])
+
+
+class DistfuncTest(unittest.TestCase):
+
+    def test_distfunc(self):
+
+        s = distfunc([[0., 0.01, 1], [0.5, 0.02, 6], [1., 0.001, 12]])
+        self.assertEqual(np.testing.assert_array_almost_equal(s, d_data, decimal=10), None)
+
+    def test_distfunc_cache(self):
+
+        s0 = distfunc([[0., -1, 1], [1., 0.01, 50]])
+        s = s0.copy()
+        s0[:] = 0.
+        s1 = distfunc([[0., -1, 1], [1., 0.01, 50]])
+        self.assertEqual(np.testing.assert_array_equal(s1, s), None)
+
+    def test_uniform(self):
+
+        s = distfunc([[0., 0.1, 1], [1., 0.1, 11]])
+        self.assertEqual(np.testing.assert_array_almost_equal(s, np.linspace(0, 1, 11), decimal=10), None)
+
+    def test_transcendental(self):
+
+        for b in [1.0001, 1.5, 50., 1.e4]:
+            delta = transsinh(b)
+            self.assertAlmostEqual(np.sinh(delta) / delta, b, places=6)
+        for b in [0.9999, 0.7, 0.05, 0.001]:
+            delta = transtanh(b)
+            self.assertAlmostEqual(np.tanh(0.5 * delta) / (0.5 * delta), b, places=6)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -1,11 +1,13 @@
 
 import numpy as np
 import unittest
+from scipy.interpolate import pchip
 
 from openmdao.main.api import Assembly
 
 from fusedwind.turbine.geometry_vt import BladePlanformVT
-from fusedwind.turbine.geometry import RedistributedBladePlanform, SplinedBladePlanform
+from fusedwind.turbine.geometry import RedistributedBladePlanform, SplinedBladePlanform, \
+                                       pchipSpline, BezierSpline
 
 
 
@@ -92,6 +94,29 @@ class TestGeometry(unittest.TestCase):
 
         self.assertEqual(np.testing.assert_array_almost_equal(top.pfOut.chord, chord, decimal=6), None)
 
+    def test_pchip_engine(self):
+
+        x = np.linspace(0, 1, 20)
+        Cx = np.array([0, 0.08, 0.25, 0.5, 0.7, 0.98, 1.])
+        C = configure_pf().chord
+
+        spl = pchipSpline()
+        self.assertEqual(np.testing.assert_array_almost_equal(spl(x, Cx, C), pchip(Cx, C)(x), decimal=10), None)
+        C[3] += 0.02
+        self.assertEqual(np.testing.assert_array_almost_equal(spl(x, Cx, C), pchip(Cx, C)(x), decimal=10), None)
+
+    def test_bezier_jacobian(self):
+
+        x = np.linspace(0, 1, 20)
+        Cx = np.linspace(0, 1, 6)
+        C = np.array([0., 0.1, -0.2, 0.3, 0.05, 0.])
+        dC = np.array([0., 0.02, 0., -0.01, 0., 0.])
+
+        spl = BezierSpline()
+        P0 = spl(x, Cx, C)
+        P1 = spl(x, Cx, C + dC)
+        self.assertEqual(np.testing.assert_array_almost_equal(P1 - P0, np.dot(spl.jacobian(x, Cx, C), dC), decimal=10), None)
+
     def test_pf_redist(self):
 
         top = RedistAsym()
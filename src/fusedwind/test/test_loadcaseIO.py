@@ -29,6 +29,84 @@ class TestLoadCaseIO(unittest.TestCase):
             c1 = l1._toarray()
             self.assertEqual(np.testing.assert_array_almost_equal(c0, c1, decimal=6), None)
 
+    def test_array(self):
+        r = LoadCaseReader()
+        r.case_files = sorted(glob.glob('data/extreme_loads0*'))
+        r.execute()
+        data = r.load_cases.get_array()
+        self.assertEqual(data.shape[0], len(r.case_files))
+        self.assertEqual(data.shape[2], 9)
+
+        w = LoadCaseWriter()
+        w.load_cases = r.load_cases
+        w.file_base = 'test_lc0'
+        w.file_format = 'npy'
+        w.execute()
+
+        rr = LoadCaseReader()
+        rr.array_file = 'test_lc0'
+        rr.views = False
+        rr.execute()
+        self.assertEqual(rr.load_cases.cases, [])
+        self.assertTrue(isinstance(rr.load_cases.get_array(), np.memmap))
+        for i in range(data.shape[0]):
+            case = rr.load_cases.get_case(i)
+            self.assertEqual(case.case_id, r.load_cases.cases[i].case_id)
+            self.assertEqual(np.testing.assert_array_almost_equal(case._toarray(), data[i], decimal=10), None)
+
+        # assigning the cases list replaces the array
+        rr.load_cases.cases = [rr.load_cases.get_case(1)]
+        self.assertEqual(rr.load_cases.n_cases, 1)
+        self.assertEqual(rr.load_cases.get_array().shape, (1,) + data.shape[1:])
+        self.assertEqual(rr.load_cases.get_case_ids(), [r.load_cases.cases[1].case_id])
+
+    def test_interpolator(self):
+        r = LoadCaseReader()
+        r.case_files = sorted(glob.glob('data/extreme_loads0*'))
+        r.execute()
+
+        ip = LoadCaseInterpolator()
+        ip.lcIn = r.load_cases
+        ip.s = np.array([0., 0.13, 0.5, 0.8])
+        ip.execute()
+        self.assertEqual(ip.lcOutArray.shape, (4, len(r.case_files), 9))
+        for i, s in enumerate(ip.s):
+            self.assertAlmostEqual(ip.lcOut[i].s, s)
+            for j, case in enumerate(r.load_cases.cases):
+                c = case._toarray()
+                ref = [np.interp(s, c[:, 0], c[:, k]) for k in range(9)]
+                self.assertEqual(np.testing.assert_array_almost_equal(ip.lcOutArray[i, j], ref, decimal=6), None)
+                self.assertEqual(np.testing.assert_array_almost_equal(ip.lcOut[i].cases[j]._toarray(), ref, decimal=6), None)
+                self.assertEqual(ip.lcOut[i].cases[j].case_id, case.case_id)
+
+    def test_interpolator_ragged(self):
+        # cases with different spanwise discretizations
+        c0 = np.loadtxt('data/extreme_loads001.dat')
+        for i, c in enumerate([c0, c0[::2]]):
+            np.savetxt('test_lc0_ragged%i.dat' % i, c, header='case%03d' % i)
+        r = LoadCaseReader()
+        r.case_files = ['test_lc0_ragged0.dat', 'test_lc0_ragged1.dat']
+        r.execute()
+
+        ip = LoadCaseInterpolator()
+        ip.lcIn = r.load_cases
+        ip.s = np.array([0., 0.13, 0.5, 0.8])
+        ip.execute()
+        self.assertEqual(ip.lcOutArray.shape, (4, 2, 9))
+        for j, case in enumerate(r.load_cases.cases):
+            c = case._toarray()
+            for i, s in enumerate(ip.s):
+                ref = [np.interp(s, c[:, 0], c[:, k]) for k in range(9)]
+                self.assertEqual(np.testing.assert_array_almost_equal(ip.lcOutArray[i, j], ref, decimal=6), None)
+                self.assertEqual(ip.lcOut[i].cases[j].case_id, 'case%03d' % j)
+
+    def test_interpolator_empty(self):
+        ip = LoadCaseInterpolator()
+        ip.s = np.array([0., 0.5])
+        ip.execute()
+        self.assertEqual(ip.lcOutArray.shape, (2, 0, 9))
+        self.assertEqual([len(lc.cases) for lc in ip.lcOut], [0, 0])
+
     def tearDown(self):
 
         files = glob.glob('test_lc0*')
@@ -0,0 +1,230 @@
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import numpy.random as npr
+import unittest
+from StringIO import StringIO
+import scipy.integrate as integrate
+from optparse import Values
+
+from fusedwind.runSuite.runCaseGenerator import DistnParser, truncated_interval, gen_cases, read_samples
+
+# y and z depend on x, z is defined before the variable it depends on,
+# the items of the enum w and the arguments of the joint distribution of Hs
+# and Tp depend on x
+dist_plan = """
+x = {1, 2, 3}
+w = {x, 2*x}
+z = U(y, y + 0.01)
+y = N(10*x, 0.01)
+Hs, Tp = N2(x, 5*x, 0.0001, 0.0001, 0)
+"""
+
+# truncated and joint distributions with dependent arguments
+dist_prob = """
+Vhub = TW(2., 10., 4., 25.)
+WaveDir = VM(2., 0.5)
+Hs = TG(1. + 0.1*Vhub, 0.5, 0.5, 8.)
+Tp = N(3. + 2.*Hs, 1.)
+a, b = N2(Vhub, 1., 2., 1., 0.5)
+"""
+
+# distribution, arguments and truncation points, and whether the truncation
+# interval lies in the upper tail, which is sampled by the survival function
+truncated = [('W', [2., 10., 4., 25.], False),
+             ('W', [2., 10., 20., 25.], True),
+             ('N', [5., 2., 1., 6.], False),
+             ('N', [0., 1., 8., 10.], True),
+             ('G', [2., 1., 0.5, 3.], False),
+             ('G', [2., 1., 6., 9.], True),
+             ('U', [0., 10., 2., 3.], False),
+             ('U', [0., 10., 7., 9.], True)]
+
+
+def parse(dist):
+
+    d = DistnParser()
+    d.parse(dist.split('\n'))
+    return d
+
+
+class SampleTableTest(unittest.TestCase):
+
+    def setUp(self):
+
+        npr.seed(1)
+
+    def check_parents(self, table):
+
+        x, w, z, y, Hs, Tp = table.T
+        self.assertTrue((np.abs(y - 10 * x) < 0.1).all())
+        self.assertTrue(((z >= y) & (z <= y + 0.01)).all())
+        self.assertTrue((np.abs(Hs - x) < 0.1).all())
+        self.assertTrue((np.abs(Tp - 5 * x) < 0.1).all())
+
+    def test_compile_plan(self):
+
+        d = parse(dist_plan)
+        self.assertEqual([p.vstr for p in d.compile_plan()], ['x', 'w', 'y', 'Tp', 'z'])
+        self.assertEqual(d.dlist_map['Tp'].vnames, ['Hs', 'Tp'])
+        self.assertEqual(d.dlist_map['Tp'].deps, set(['x']))
+        self.assertEqual(d.dlist_map['z'].deps, set(['y']))
+
+        d = parse('a = N(b, 1)\nb = N(a, 1)')
+        self.assertRaises(ValueError, d.compile_plan)
+
+    def test_expand_enums(self):
+
+        d = parse(dist_plan)
+        names, table = d.multi_sample_table(4, expand_enums=True)
+        self.assertEqual(names, ['x', 'w', 'z', 'y', 'Hs', 'Tp'])
+        self.assertEqual(table.shape, (24, 6))
+        # combinations of the enum items in the order of their definition
+        self.assertEqual(np.testing.assert_array_equal(table[:, 0], np.repeat([1, 1, 2, 2, 3, 3], 4)), None)
+        self.assertEqual(np.testing.assert_array_equal(table[:, 1], np.repeat([1, 2, 2, 4, 3, 6], 4)), None)
+        self.check_parents(table)
+
+    def test_random_enums(self):
+
+        d = parse(dist_plan)
+        names, table = d.multi_sample_table(50)
+        self.assertEqual(table.shape, (50, 6))
+        self.assertEqual(set(table[:, 0]), set([1, 2, 3]))
+        self.assertTrue(((table[:, 1] == table[:, 0]) | (table[:, 1] == 2 * table[:, 0])).all())
+        self.assertTrue((table[:, 1] == 2 * table[:, 0]).any())
+        self.check_parents(table)
+
+    def test_enum_sample_batch(self):
+
+        d = parse(dist_plan)
+        d.compile_plan()
+        w = d.dlist_map['w']
+        val = w.sample_batch(np.array([0, 1, 1]), {'x': np.array([1., 2., 3.])})
+        self.assertEqual(np.testing.assert_array_almost_equal(val, [1., 4., 6.], decimal=10), None)
+        x = d.dlist_map['x']
+        val = x.sample_batch(np.array([2, 0]), {})
+        self.assertEqual(np.testing.assert_array_almost_equal(val, [3., 1.], decimal=10), None)
+
+
+class TruncatedTest(unittest.TestCase):
+
+    def setUp(self):
+
+        npr.seed(1)
+
+    def test_bounds(self):
+
+        for fn, args, upper in truncated:
+            self.assertEqual(truncated_interval(fn, args[:2], args[2], args[3])[2], upper)
+            d = parse('V = T%s(%s)' % (fn, ', '.join(map(repr, args))))
+            dist = d.dlist[0]
+            C = dist.ensure_C(args)
+            mean = integrate.quad(lambda x: x * dist.raw_prob(x, args), args[2], args[3])[0] / C
+            for method in ['random', 'lhs']:
+                names, table = d.multi_sample_table(2000, method=method)
+                V = table[:, 0]
+                self.assertTrue(((V >= args[2]) & (V <= args[3])).all())
+                # the samples follow the truncated density
+                self.assertTrue(abs(V.mean() - mean) < 4 * V.std() / np.sqrt(V.size))
+
+    def test_ensure_C(self):
+
+        for fn, args, upper in truncated:
+            dist = parse('V = T%s(%s)' % (fn, ', '.join(map(repr, args)))).dlist[0]
+            C = dist.ensure_C(args)
+            self.assertAlmostEqual(C / integrate.quad(dist.raw_prob, args[2], args[3], args=(args,))[0], 1., places=6)
+            self.assertEqual(dist.C.keys(), [tuple(args)])
+            self.assertEqual(dist.ensure_C(args), C)
+
+
+class ProbTest(unittest.TestCase):
+
+    def setUp(self):
+
+        npr.seed(1)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmpdir)
+
+    def test_calc_prob_batch(self):
+
+        d = parse(dist_prob)
+        names, table = d.multi_sample_table(20)
+        # the scalar version resolves the arguments to 6 decimals
+        table = np.round(table, 6)
+        table[0, 0] = 30.
+        table[1, 2] = 9.
+        p = d.calc_prob_batch(names, table)
+        self.assertEqual(p[0], 0.)
+        self.assertEqual(p[1], 0.)
+        self.assertTrue((p[2:] > 0.).all())
+
+        for k, row in enumerate(table):
+            samp = dict(zip(names, row))
+            # the scalar version expects the values of a joint distribution in its last variable
+            samp['b'] = [samp.pop('a'), samp['b']]
+            self.assertAlmostEqual(p[k], d.calc_prob(samp), places=10)
+
+    def test_augment(self):
+
+        fdist = os.path.join(self.tmpdir, 'dist.txt')
+        fcases = os.path.join(self.tmpdir, 'cases.txt')
+        fout = os.path.join(self.tmpdir, 'probs.txt')
+        f = file(fdist, 'w')
+        f.write(dist_prob)
+        f.close()
+        gen_cases(Values(dict(dist=fdist, old_samples=None, nsamples=10, tmax=None,
+                              main_output=fcases, method='random', replicates=1, seed=1)))
+        hdr, cases = read_samples(fcases)
+        self.assertEqual(hdr, ['Vhub', 'WaveDir', 'Hs', 'Tp', 'a', 'b', 'Prob'])
+        self.assertEqual(cases.shape, (10, 7))
+
+        # probabilities w.r.t. a wider distribution of the wind speed
+        d = parse(dist_prob.replace('TW(2., 10., 4., 25.)', 'TW(2., 10., 3., 30.)'))
+        p = d.calc_prob_batch(hdr, cases)
+        f = file(fdist, 'w')
+        f.write(dist_prob.replace('TW(2., 10., 4., 25.)', 'TW(2., 10., 3., 30.)'))
+        f.close()
+
+        gen_cases(Values(dict(dist=fdist, old_samples=fcases, augment=True, main_output=fout)))
+        hdr2, probs = read_samples(fout)
+        self.assertEqual(hdr2, hdr + ['Prob2'])
+        self.assertEqual(np.testing.assert_array_equal(probs[:, :7], cases), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(probs[:, 7] / p, 1., decimal=10), None)
+        self.assertTrue((probs[:, 7] < probs[:, 6]).all())
+
+        gen_cases(Values(dict(dist=fdist, old_samples=fcases, augment=False, main_output=fout)))
+        hdr2, probs = read_samples(fout)
+        self.assertEqual(hdr2, hdr)
+        self.assertEqual(np.testing.assert_array_equal(probs[:, :6], cases[:, :6]), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(probs[:, 6] / p, 1., decimal=10), None)
+
+    def test_replicates(self):
+
+        fdist = os.path.join(self.tmpdir, 'dist.txt')
+        fcases = os.path.join(self.tmpdir, 'cases.txt')
+        f = file(fdist, 'w')
+        f.write(dist_prob)
+        f.close()
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            gen_cases(Values(dict(dist=fdist, old_samples=None, nsamples=10, tmax=None,
+                                  main_output=fcases, method='lhs', replicates=2, seed=1)))
+            out = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        hdr, cases = read_samples(fcases)
+        self.assertEqual(hdr, ['Vhub', 'WaveDir', 'Hs', 'Tp', 'a', 'b', 'Replicate', 'Prob'])
+        self.assertEqual(cases.shape, (20, 8))
+        self.assertEqual(list(cases[:, 6]), [0.] * 10 + [1.] * 10)
+        self.assertTrue('wrote 20 samples' in out)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
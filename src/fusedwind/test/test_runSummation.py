@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import numpy.random as npr
+import unittest
+
+from fusedwind.runSuite.runSummation import RunningStats, ConvergenceMonitor, read_header, read_chunks, \
+    write_binary, summation_stream
+
+
+class RunningStatsTest(unittest.TestCase):
+
+    def setUp(self):
+
+        npr.seed(1)
+        self.data = npr.normal(1e3, [1., 10., 100.], size=(23, 3))
+        self.tmpdir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.tmpdir, 'res.txt')
+        fout = file(self.fname, 'w')
+        fout.write('a b c\n')
+        np.savetxt(fout, self.data, fmt='%.16e')
+        fout.close()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmpdir)
+
+    def test_update(self):
+
+        stats = RunningStats(3)
+        self.assertEqual(np.testing.assert_array_equal(stats.var, np.zeros(3)), None)
+        self.assertEqual(np.testing.assert_array_equal(stats.stderr, np.zeros(3)), None)
+        cummean = []
+        for i0, i1 in [(0, 1), (1, 1), (1, 8), (8, 23)]:
+            cummean.append(stats.update(self.data[i0:i1]))
+        self.assertEqual(cummean[1].shape, (0, 3))
+        self.assertEqual(stats.n, 23)
+        ref = np.cumsum(self.data, axis=0) / np.arange(1, 24)[:, None]
+        self.assertEqual(np.testing.assert_array_almost_equal(np.vstack(cummean), ref, decimal=8), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(stats.mean, self.data.mean(axis=0), decimal=8), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(stats.var / self.data.var(axis=0, ddof=1), np.ones(3), decimal=10), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(stats.stderr, self.data.std(axis=0, ddof=1) / np.sqrt(23), decimal=8), None)
+
+    def test_read_chunks(self):
+
+        npy_name = os.path.join(self.tmpdir, 'res.npy')
+        write_binary(self.fname, npy_name, chunk_size=5)
+        self.assertEqual(read_header(npy_name), ['a', 'b', 'c'])
+        self.assertEqual(np.testing.assert_array_equal(np.load(npy_name), self.data), None)
+        for fname in [self.fname, npy_name]:
+            chunks = list(read_chunks(fname, chunk_size=5))
+            self.assertEqual([c.shape[0] for c in chunks], [5, 5, 5, 5, 3])
+            self.assertEqual(np.testing.assert_array_equal(np.vstack(chunks), self.data), None)
+
+    def test_summation_stream(self):
+
+        npy_name = os.path.join(self.tmpdir, 'res.npy')
+        write_binary(self.fname, npy_name)
+        ref = np.cumsum(self.data, axis=0) / np.arange(1, 24)[:, None]
+        for fname in [self.fname, npy_name]:
+            out_name = os.path.join(self.tmpdir, 'res.out')
+            fout = file(out_name, 'w')
+            stats = summation_stream(fname, fout, stride=4, chunk_size=5)
+            fout.close()
+            self.assertEqual(np.testing.assert_array_almost_equal(stats.mean, self.data.mean(axis=0), decimal=8), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(stats.var / self.data.var(axis=0, ddof=1), np.ones(3), decimal=10), None)
+
+            # every 4th record, ending with the average over all records
+            res = np.loadtxt(out_name)
+            self.assertEqual(np.testing.assert_array_equal(res[:, 0], [4, 8, 12, 16, 20, 23]), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(res[:, 1:] / ref[[3, 7, 11, 15, 19, 22]], np.ones((6, 3)), decimal=5), None)
+
+        # no extra row if the last record is on the stride
+        fout = file(out_name, 'w')
+        summation_stream(npy_name, fout, stride=23, chunk_size=5)
+        fout.close()
+        res = np.loadtxt(out_name, ndmin=2)
+        self.assertEqual(res.shape, (1, 4))
+        self.assertEqual(res[0, 0], 23)
+
+
+class ConvergenceMonitorTest(unittest.TestCase):
+
+    def setUp(self):
+
+        npr.seed(1)
+        # the last field has zero mean
+        self.data = npr.normal([10., 100., 0.], [0.1, 1., 1.], size=(60, 3))
+
+    def test_batches(self):
+
+        m1 = ConvergenceMonitor(3, batch_size=7)
+        for rec in self.data[:30]:
+            m1.update(rec)
+        m2 = ConvergenceMonitor(3, batch_size=7)
+        m2.update(self.data[:30])
+        m3 = ConvergenceMonitor(3, batch_size=7)
+        for i0, i1 in [(0, 3), (3, 14), (14, 30)]:
+            m3.update(self.data[i0:i1])
+
+        bmeans = self.data[:28].reshape(4, 7, 3).mean(axis=1)
+        for m in [m1, m2, m3]:
+            self.assertEqual(m.n, 30)
+            self.assertEqual(m.batch_stats.n, 4)
+            self.assertEqual(m._batch_n, 2)
+            self.assertEqual(np.testing.assert_array_almost_equal(m._batch_sum, self.data[28:30].sum(axis=0), decimal=10), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(m.batch_stats.mean, bmeans.mean(axis=0), decimal=10), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(m.batch_stats.var, bmeans.var(axis=0, ddof=1), decimal=10), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(m.ci_halfwidth(), m1.ci_halfwidth(), decimal=10), None)
+
+    def test_converged(self):
+
+        m = ConvergenceMonitor(3, rel_tol=0.01, batch_size=5, min_samples=40)
+        self.assertTrue(np.isinf(m.ci_halfwidth()).all())
+        self.assertFalse(m.update(self.data[:5]))
+        self.assertTrue(np.isinf(m.rel_error()).all())
+        self.assertFalse(m.update(self.data[5:30]))
+        self.assertTrue((m.rel_error()[:2] < 0.01).all())
+        self.assertFalse(m.update(self.data[30:60]))
+
+        # the zero mean field never converges, unless it is excluded
+        m = ConvergenceMonitor(3, rel_tol=0.01, batch_size=5, min_samples=40, fields=[0, 1])
+        self.assertFalse(m.update(self.data[:30]))
+        self.assertTrue(m.update(self.data[30:40]))
+        self.assertFalse(ConvergenceMonitor(3, batch_size=5, fields=[0, 1]).update(self.data))
+
+    def test_zero_mean(self):
+
+        m = ConvergenceMonitor(2, rel_tol=0.01, batch_size=1, min_samples=1)
+        m.update([[1., 0.], [-1., 0.], [2., 0.], [-2., 0.]])
+        self.assertEqual(m.mean[0], 0.)
+        # no error if the field is constant, infinite relative error otherwise
+        self.assertEqual(list(m.rel_error()), [np.inf, 0.])
+        self.assertFalse(m.converged)
+        m.fields = [1]
+        self.assertTrue(m.converged)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import unittest
+from math import pi
+from scipy.stats import gamma
+from scipy.special import i0
+
+# the runiec_proto scripts are run from their directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'runiec_proto'))
+import sampler
+
+# distribution parameters linear in the wind speed v and wave direction wd,
+# reproduced exactly by the interpolation in the tables
+params = {'WindDir_kappa': lambda v: 1. + 0.1 * v,
+          'WindDir_loc': lambda v: 0.5 - 0.02 * v,
+          'Hs_shape': lambda v, wd: 2. + 0.1 * v + 0.2 * wd,
+          'Hs_scale': lambda v, wd: 1. + 0.02 * v,
+          'Tp_shape': lambda v, wd: 5. + 0.1 * v,
+          # negative for wd < -2.5
+          'Tp_scale': lambda v, wd: 0.5 + 0.2 * wd}
+
+V = [0., 10., 20., 30.]
+WD = [4., 2., 0., -2., -4.]
+
+
+def write_tables(path):
+
+    os.makedirs(path)
+    for name in ['WindDir_kappa', 'WindDir_loc']:
+        fout = file(os.path.join(path, name + '.txt'), 'w')
+        fout.write('V %s\n' % name)
+        for v in V:
+            fout.write('%f %f\n' % (v, params[name](v)))
+        fout.close()
+    for name in ['Hs_shape', 'Hs_scale', 'Tp_shape', 'Tp_scale']:
+        fout = file(os.path.join(path, name + '.txt'), 'w')
+        fout.write('WD %s\n' % ' '.join(['%f' % v for v in V]))
+        for wd in WD:
+            fout.write('%f %s\n' % (wd, ' '.join(['%f' % params[name](v, wd) for v in V])))
+        fout.close()
+
+
+def prob(v, wd, hs, tp):
+    """ joint probability of a sample, computed sample by sample """
+
+    if v < 0 or v > 30:
+        return 0.
+    pv = (2.120 / 9.767) * (v / 9.767)**1.120 * np.exp(-(v / 9.767)**2.120)
+    k = params['WindDir_kappa'](v)
+    l = params['WindDir_loc'](v)
+    pwd = np.exp(k * np.cos(wd - l)) / (2 * pi * i0(k))
+    hshape, hscale, tshape, tscale = [params[name](v, wd) for name in ['Hs_shape', 'Hs_scale', 'Tp_shape', 'Tp_scale']]
+    if min(hshape, hscale, tshape, tscale) <= 0:
+        return 0.
+    if hs < 0.001 or hs > 20 or tp < 0.001 or tp > 30 or abs(wd) > 3.14159:
+        return 0.
+    return pv * pwd * gamma.pdf(hs, hshape, scale=hscale) * gamma.pdf(tp, tshape, scale=tscale)
+
+
+class SamplerTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.mkdtemp()
+        write_tables(os.path.join(self.tmpdir, 'windwavedistn'))
+        os.chdir(self.tmpdir)
+        self.ctx = sampler.Context()
+
+    def tearDown(self):
+
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmpdir)
+
+    def check_prob(self, x, p):
+
+        for k in range(x.shape[0]):
+            ref = prob(*x[k])
+            if ref == 0.:
+                self.assertEqual(p[k], 0.)
+            else:
+                self.assertAlmostEqual(p[k] / ref, 1., places=8)
+
+    def test_calc_prob(self):
+
+        # inside the bounds, invalid Tp scale, Vhub, Hs and WaveDir out of bounds
+        x = np.array([[10., 0.3, 2., 8.],
+                      [25., -1., 5., 12.],
+                      [3., 2.5, 0.5, 6.],
+                      [10., -3., 2., 8.],
+                      [35., 0., 2., 8.],
+                      [10., 0.3, 25., 8.],
+                      [10., 3.3, 2., 8.]])
+        p = self.ctx.calc_prob_batch(x)
+        self.assertTrue((p[:3] > 0).all())
+        self.assertEqual(list(p[3:]), [0., 0., 0., 0.])
+        self.check_prob(x, p)
+        for k in range(x.shape[0]):
+            self.assertEqual(self.ctx.calc_prob(x[k]), p[k])
+
+    def test_sample_block(self):
+
+        v, wd, hs, tp, p = self.ctx.sample_block(500)
+        self.assertTrue(len(v) > 0)
+        self.assertTrue(((v >= 0) & (v <= 30)).all())
+        # negative Tp scales are rejected
+        self.assertTrue((wd > -2.5).all())
+        l = params['WindDir_loc'](v)
+        self.assertTrue(((wd >= l - pi) & (wd <= l + pi)).all())
+        x = np.column_stack((v, wd, hs, tp))
+        inb = (hs <= 20) & (tp <= 30) & (np.abs(wd) <= 3.14159)
+        self.assertEqual(np.testing.assert_array_almost_equal(p[inb] / self.ctx.calc_prob_batch(x[inb]), 1., decimal=10), None)
+        self.check_prob(x[inb], p[inb])
+
+    def test_sample(self):
+
+        for method in ['random', 'lhs']:
+            self.ctx.sample(200, method=method, seed=1)
+            x = np.column_stack((self.ctx.Vhub, self.ctx.WaveDir, self.ctx.Hs, self.ctx.Tp))
+            self.assertEqual(x.shape, (200, 4))
+            p = self.ctx.Prob
+            inb = (x[:, 2] <= 20) & (x[:, 3] <= 30) & (np.abs(x[:, 1]) <= 3.14159)
+            self.assertEqual(np.testing.assert_array_almost_equal(p[inb] / self.ctx.calc_prob_batch(x[inb]), 1., decimal=10), None)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
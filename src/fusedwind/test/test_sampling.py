@@ -0,0 +1,92 @@
+
+import numpy as np
+import unittest
+
+from scipy.stats import vonmises
+from fusedwind.lib.sampling import sobol, halton, latin_hypercube, uniform_points, ppf_vonmises, \
+    grid_points, quadrature_rule, tensor_rule, smolyak_rule
+
+# first points of the unscrambled Sobol sequence in 3 dimensions
+s_data = np.array([[0., 0., 0.],
+                   [0.5, 0.5, 0.5],
+                   [0.75, 0.25, 0.25],
+                   [0.25, 0.75, 0.75],
+                   [0.375, 0.375, 0.625],
+                   [0.875, 0.875, 0.125],
+                   [0.625, 0.125, 0.875],
+                   [0.125, 0.625, 0.375]])
+
+
+class SamplingTest(unittest.TestCase):
+
+    def test_sobol(self):
+
+        u = sobol(8, 3, scramble=False)
+        self.assertEqual(np.testing.assert_array_almost_equal(u, s_data, decimal=8), None)
+
+    def test_halton(self):
+
+        u = halton(4, 2, scramble=False)
+        h_data = np.array([[1/2., 1/3.], [1/4., 2/3.], [3/4., 1/9.], [1/8., 4/9.]])
+        self.assertEqual(np.testing.assert_array_almost_equal(u, h_data, decimal=10), None)
+
+    def test_latin_hypercube(self):
+
+        u = latin_hypercube(20, 3, seed=1)
+        for j in range(3):
+            self.assertEqual(np.testing.assert_array_equal(np.sort(np.floor(u[:, j] * 20)), np.arange(20)), None)
+
+    def test_scrambled(self):
+
+        # each scrambled point set is stratified like the unscrambled one
+        for method in ['sobol', 'halton', 'lhs']:
+            u = uniform_points(64, 4, method, seed=2)
+            self.assertEqual(u.shape, (64, 4))
+            self.assertTrue(u.min() > 0. and u.max() < 1.)
+            self.assertEqual(np.testing.assert_array_equal(np.bincount((u[:, 0] * 2).astype(int)), [32, 32]), None)
+        u0 = uniform_points(16, 2, 'sobol', seed=3)
+        u1 = uniform_points(16, 2, 'sobol', seed=3)
+        self.assertEqual(np.testing.assert_array_equal(u0, u1), None)
+
+    def test_ppf_vonmises(self):
+
+        p = np.linspace(0.01, 0.99, 21)
+        x = ppf_vonmises(p, 2., 0.)
+        self.assertEqual(np.testing.assert_array_almost_equal(vonmises.cdf(x, 2.), p, decimal=10), None)
+        x = ppf_vonmises(0.5, 2., 3.)
+        self.assertAlmostEqual(float(x), 3., places=10)
+        x = ppf_vonmises(0.9, 2., 3.)
+        self.assertTrue(-np.pi <= float(x) < 0.)
+
+    def test_grid_points(self):
+
+        x, dx = grid_points([0., 1.], [1., 3.], [3, 2])
+        g_data = np.array([[0., 1.], [0.5, 1.], [1., 1.], [0., 3.], [0.5, 3.], [1., 3.]])
+        self.assertEqual(np.testing.assert_array_almost_equal(x, g_data, decimal=12), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(dx, [0.5, 2.], decimal=12), None)
+
+    def test_quadrature_rule(self):
+
+        # n point Gauss and Clenshaw-Curtis rules integrate x**(n-1) exactly
+        for rule in ['gauss', 'clenshaw_curtis']:
+            x, w = quadrature_rule(rule, 5, 1., 3.)
+            self.assertAlmostEqual(np.sum(w * x**4), (3.**5 - 1.) / 5., places=10)
+        x, w = tensor_rule('gauss', [3, 2], [0., -1.], [2., 1.])
+        self.assertAlmostEqual(np.sum(w * x[:, 0]**2 * x[:, 1]**2), 16. / 9., places=10)
+
+    def test_smolyak_rule(self):
+
+        xmin = np.array([0., -1., 0., 0.])
+        xmax = np.array([2., 1., 1., 3.])
+        npts = [len(smolyak_rule(l, xmin, xmax)[0]) for l in range(1, 5)]
+        self.assertEqual(npts, [1, 9, 41, 137])
+        # level 3 is exact for total degree 5
+        x, w = smolyak_rule(3, xmin, xmax)
+        f = x[:, 0]**2 * x[:, 1]**2 + x[:, 2]**3 + x[:, 0] * x[:, 3]**2
+        self.assertAlmostEqual(np.sum(w), 12., places=10)
+        self.assertAlmostEqual(np.sum(w * f), 133. / 3., places=8)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
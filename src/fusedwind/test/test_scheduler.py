@@ -0,0 +1,117 @@
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from fusedwind.lib.scheduler import JobQueue, LocalScheduler
+
+
+def square(x):
+
+    return x**2
+
+
+def fail_once(x):
+
+    # fails the first time it runs in a directory
+    if not os.path.exists('tried'):
+        file('tried', 'w').close()
+        raise RuntimeError('first attempt')
+    return x
+
+
+def sleep(x):
+
+    time.sleep(x)
+    return x
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmpdir)
+
+    def test_run(self):
+
+        jobs = [('case%i' % i, i) for i in range(10)]
+        for nproc in [1, 4]:
+            res = {}
+            s = LocalScheduler(square, nproc=nproc)
+            ndone = s.run(jobs, collector=res.__setitem__)
+            self.assertEqual(ndone, 10)
+            self.assertEqual(res, dict(('case%i' % i, i**2) for i in range(10)))
+            self.assertEqual(len(s.queue.keys('done')), 10)
+
+    def test_retries(self):
+
+        s = LocalScheduler(fail_once, nproc=2, retries=1, backoff=0.01, rundir=self.tmpdir)
+        res = {}
+        s.run([('a', 1), ('b', 2)], collector=res.__setitem__)
+        self.assertEqual(res, {'a': 1, 'b': 2})
+        self.assertEqual(s.queue['a']['attempts'], 2)
+
+        s = LocalScheduler(fail_once, rundir=os.path.join(self.tmpdir, 'new'))
+        self.assertEqual(s.run([('c', 3)]), 0)
+        self.assertEqual(s.queue.keys('failed'), ['c'])
+        s.queue.reset()
+        self.assertEqual(s.run(), 1)
+
+    def test_timeout(self):
+
+        s = LocalScheduler(sleep, nproc=2, timeout=1)
+        s.run([('fast', 0.01), ('slow', 5)])
+        self.assertEqual(s.queue['fast']['status'], 'done')
+        self.assertEqual(s.queue['slow']['status'], 'failed')
+        self.assertTrue(s.queue['slow']['error'].startswith('JobTimeout'))
+
+    def test_resume(self):
+
+        fname = os.path.join(self.tmpdir, 'queue.txt')
+        jobs = [('case%i' % i, i) for i in range(6)]
+        res = {}
+        s = LocalScheduler(square, queue=JobQueue(fname))
+        s.run(jobs, collector=res.__setitem__, stop=lambda key, r: len(res) == 2)
+        s.queue.close()
+        # journal interrupted while writing
+        file(fname, 'a').write('["case')
+
+        q = JobQueue(fname)
+        self.assertEqual(q.keys('done'), ['case0', 'case1'])
+        s = LocalScheduler(square, nproc=2, queue=q)
+        self.assertEqual(s.run(jobs, collector=res.__setitem__), 4)
+        self.assertEqual(res, dict(('case%i' % i, i**2) for i in range(6)))
+        q.close()
+
+    def test_validate(self):
+
+        # outputs of the even jobs exist, e.g. from a run with a lost journal
+        fname = os.path.join(self.tmpdir, 'queue.txt')
+        res = {}
+        s = LocalScheduler(square, queue=JobQueue(fname), validate=lambda key, x: x % 2 == 0)
+        s.queue.add('case5', 5, output='case5.out')
+        s.queue.mark('case5', 'failed', error='RuntimeError')
+        s.queue.reset()
+        self.assertEqual(s.run([('case%i' % i, i) for i in range(3, 7)], collector=res.__setitem__), 4)
+        self.assertEqual(res, {'case3': 9, 'case4': None, 'case5': 25, 'case6': None})
+        self.assertEqual(s.queue['case4']['attempts'], 0)
+        s.queue.close()
+
+        # only the given jobs are run
+        q = JobQueue(fname)
+        self.assertEqual(q['case5']['output'], 'case5.out')
+        q.add('case7', 7)
+        self.assertEqual(LocalScheduler(square, queue=q).run([('case8', 8)]), 1)
+        self.assertEqual(q.keys('pending'), ['case7'])
+        q.close()
+
+
+if __name__ == '__main__':
+
+    unittest.main()
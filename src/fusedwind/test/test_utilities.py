@@ -0,0 +1,47 @@
+import numpy as np
+import unittest
+
+from fusedwind.lib.utilities import Tab2
+
+# z = x * y + x, which is reproduced exactly by bilinear interpolation,
+# on unsorted axes
+x = [0., 2., 1.]
+y = [10., 0.]
+z = [[0., 22., 11.],
+     [0., 2., 1.]]
+
+
+class Tab2Test(unittest.TestCase):
+
+    def test_interp(self):
+
+        f = Tab2(x, y, z)
+        self.assertEqual(np.testing.assert_array_equal(f.x, [0., 1., 2.]), None)
+        self.assertEqual(np.testing.assert_array_equal(f.y, [0., 10.]), None)
+        self.assertAlmostEqual(f(0.5, 5.), 3., places=12)
+        self.assertAlmostEqual(f(1.5, 2.), 4.5, places=12)
+        self.assertAlmostEqual(f(2., 10.), 22., places=12)
+
+    def test_clamp(self):
+
+        f = Tab2(x, y, z)
+        # clamped to the edges of the table, separately along each axis
+        self.assertAlmostEqual(f(5., 20.), 22., places=12)
+        self.assertAlmostEqual(f(-1., -3.), 0., places=12)
+        self.assertAlmostEqual(f(1.5, -3.), 1.5, places=12)
+        self.assertAlmostEqual(f(-1., 5.), 0., places=12)
+
+    def test_array(self):
+
+        f = Tab2(x, y, z)
+        xi = np.array([0.5, 1.5, 5., -1.])
+        yi = np.array([5., 2., 20., -3.])
+        self.assertEqual(np.testing.assert_array_almost_equal(f(xi, yi), [3., 4.5, 22., 0.], decimal=12), None)
+        for k in range(4):
+            self.assertEqual(f(xi[k], yi[k]), f(xi, yi)[k])
+        self.assertEqual(np.asarray(f(0.5, 5.)).shape, ())
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -2,19 +2,29 @@
 import glob
 import numpy as np
 from string import digits
+from multiprocessing import Pool
 from scipy.interpolate import pchip, Akima1DInterpolator
 
 from openmdao.main.api import Component, Assembly
-from openmdao.lib.datatypes.api import VarTree, Float, Array, Bool, Str, List, Int
+from openmdao.lib.datatypes.api import VarTree, Float, Array, Bool, Str, List, Int, Enum
 
 from fusedwind.turbine.geometry_vt import BladeSurfaceVT, BladePlanformVT, Curve, AirfoilShape
-from fusedwind.turbine.geometry import RedistributedBladePlanform, SplineComponentBase, FFDSplineComponentBase
+from fusedwind.turbine.geometry import RedistributedBladePlanform, SplineComponentBase, FFDSplineComponentBase, \
+                                       spline_dict, _fixed_inputs_changed
 from fusedwind.turbine.structure_vt import BladeStructureVT3D, CrossSectionStructureVT, BeamStructureVT
 from fusedwind.turbine.rotoraero_vt import LoadVectorCaseList
 from fusedwind.interface import base, implement_base
 from fusedwind.lib.geom_tools import curvature
 
 
+# material properties stored in the .mat and .failmat files
+_mat_props = ['E1', 'E2', 'E3', 'nu12', 'nu13', 'nu23', 'G12', 'G13', 'G23', 'rho']
+_failmat_props = ['s11_t', 's22_t', 's33_t', 's11_c', 's22_c', 's33_c',
+                  't12', 't13', 't23', 'e11_c', 'e22_c', 'e33_c',
+                  'e11_t', 'e22_t', 'e33_t', 'g12', 'g13', 'g23',
+                  'gM0', 'C1a', 'C2a', 'C3a', 'C4a']
+_failcrit = {1:'maximum_strain', 2:'maximum_stress', 3:'tsai_wu'}
+
 @base
 class BladeStructureReaderBase(Component):
 
@@ -42,74 +52,55 @@ class ModifyBladeStructureBase(Component):
 class BladeStructureReader(Component):
     """
     input file reader of BladeStructureVT3D data
+
+    The structure is either read from a set of text files or from
+    a single binary <filebase>.npz file, see write_bladestructure_npz.
     """
 
     filebase = Str(iotype='in')
+    file_format = Enum('text', ('text', 'npz'), iotype='in', desc='format of the input files')
+    load_regions = List(iotype='in', desc='names of the regions and webs to load layups for '
+                                          'from a npz file, all regions are loaded if empty')
 
     st3d = VarTree(BladeStructureVT3D(), iotype='out',
                                          desc='Vartree containing discrete definition of blade structure')
 
     def execute(self):
 
+        if self.file_format == 'npz':
+            read_bladestructure_npz(self.filebase + '.npz', self.st3d,
+                                    self.load_regions if len(self.load_regions) > 0 else None)
+            return
+
         self.read_layups()
         self.read_materials()
 
     def read_materials(self):
 
-        fid = open(self.filebase + '.mat', 'r')
-        materials = fid.readline().split()[1:]
-        data = np.loadtxt(fid)
+        with open(self.filebase + '.mat', 'r') as fid:
+            materials = fid.readline().split()[1:]
+            data = np.loadtxt(fid)
         for i, name in enumerate(materials):
             mat = self.st3d.add_material(name)
             try:
                 d = data[i, :]
             except:
                 d = data
-            mat.E1 = d[0]
-            mat.E2 = d[1]
-            mat.E3 = d[2]
-            mat.nu12 = d[3]
-            mat.nu13 = d[4]
-            mat.nu23 = d[5]
-            mat.G12 = d[6]
-            mat.G13 = d[7]
-            mat.G23 = d[8]
-            mat.rho = d[9]
-
-        failcrit = {1:'maximum_strain', 2:'maximum_stress', 3:'tsai_wu'}
-        fid = open(self.filebase + '.failmat', 'r')
-        materials = fid.readline().split()[1:]
-        data = np.loadtxt(fid)
+            for j, prop in enumerate(_mat_props):
+                setattr(mat, prop, d[j])
+
+        with open(self.filebase + '.failmat', 'r') as fid:
+            materials = fid.readline().split()[1:]
+            data = np.loadtxt(fid)
         for i, name in enumerate(materials):
             mat = self.st3d.add_material(name)
             try:
                 d = data[i, :]
             except:
                 d = data
-            mat.failure_criterium = failcrit[int(d[0])]
-            mat.s11_t = d[1]
-            mat.s22_t = d[2]
-            mat.s33_t = d[3]
-            mat.s11_c = d[4]
-            mat.s22_c = d[5]
-            mat.s33_c = d[6]
-            mat.t12 = d[7]
-            mat.t13 = d[8]
-            mat.t23 = d[9]
-            mat.e11_c = d[10]
-            mat.e22_c = d[11]
-            mat.e33_c = d[12]
-            mat.e11_t = d[13]
-            mat.e22_t = d[14]
-            mat.e33_t = d[15]
-            mat.g12 = d[16]
-            mat.g13 = d[17]
-            mat.g23 = d[18]
-            mat.gM0 = d[19]
-            mat.C1a = d[20]
-            mat.C2a = d[21]
-            mat.C3a = d[22]
-            mat.C4a = d[23]
+            mat.failure_criterium = _failcrit[int(d[0])]
+            for j, prop in enumerate(_failmat_props):
+                setattr(mat, prop, d[j + 1])
 
     def read_layups(self):
         """
@@ -140,17 +131,16 @@ class BladeStructureReader(Component):
 
         for dpfile in self.dp_files:
             self._logger.info('reading dp_file: %s' % dpfile)
-            dpfid = open(dpfile, 'r')
-            
-            # read webs 
-            wnames = dpfid.readline().split()[1:]
-            iwebs = []
-            for w, wname in enumerate(wnames):
-                line = dpfid.readline().split()[1:]
-                line = [int(entry) for entry in line]
-                iwebs.append(line)
-            nwebs = len(iwebs)
-            header = dpfid.readline()
+            with open(dpfile, 'r') as dpfid:
+                # read webs 
+                wnames = dpfid.readline().split()[1:]
+                iwebs = []
+                for w, wname in enumerate(wnames):
+                    line = dpfid.readline().split()[1:]
+                    line = [int(entry) for entry in line]
+                    iwebs.append(line)
+                nwebs = len(iwebs)
+                header = dpfid.readline()
             dpdata = np.loadtxt(dpfile)
             nreg = dpdata.shape[1] - 2
 
@@ -176,11 +166,10 @@ class BladeStructureReader(Component):
         
                 layup_file = '_'.join([self.filebase, rname]) + '.st3d'
                 self._logger.info('  reading layup file %s' % layup_file)
-                fid = open(layup_file, 'r')
-                rrname = fid.readline().split()[1]
-                lheader = fid.readline().split()[1:]
-
-                cldata = np.loadtxt(fid)
+                with open(layup_file, 'r') as fid:
+                    rrname = fid.readline().split()[1]
+                    lheader = fid.readline().split()[1:]
+                    cldata = np.loadtxt(fid)
                 layers = lheader[1:]
                 nl = len(lheader)
 
@@ -205,11 +194,10 @@ class BladeStructureReader(Component):
         
                 layup_file = '_'.join([self.filebase, rname]) + '.st3d'
                 self._logger.info('  reading layup file %s' % layup_file)
-                fid = open(layup_file, 'r')
-                rrname = fid.readline().split()[1]
-                lheader = fid.readline().split()[1:]
-
-                cldata = np.loadtxt(fid)
+                with open(layup_file, 'r') as fid:
+                    rrname = fid.readline().split()[1]
+                    lheader = fid.readline().split()[1:]
+                    cldata = np.loadtxt(fid)
                 layers = lheader[1:]
                 nl = len(lheader)
 
@@ -234,9 +222,13 @@ class BladeStructureReader(Component):
 class BladeStructureWriter(Component):
     """
     input file writer of BladeStructureVT3D data
+
+    The structure is either written to a set of text files or to
+    a single binary <filebase>.npz file, see write_bladestructure_npz.
     """
 
     filebase = Str('blade', iotype='in')
+    file_format = Enum('text', ('text', 'npz'), iotype='in', desc='format of the output files')
     st3d = VarTree(BladeStructureVT3D(), iotype='in')
 
     def execute(self):
@@ -249,65 +241,35 @@ class BladeStructureWriter(Component):
         except:
             self.fbase = self.filebase
 
+        if self.file_format == 'npz':
+            write_bladestructure_npz(self.st3d, self.fbase + '.npz')
+            return
+
         self.write_layup_data()
         self.write_materials()
 
     def write_materials(self):
 
-        fid = open(self.fbase + '.mat', 'w')
-        fid.write('# %s\n' % (' '.join(self.st3d.materials.keys())))
-        fid.write('# E1 E2 E3 nu12 nu13 nu23 G12 G13 G23 rho\n')
-        matdata = []
-        for name, mat in self.st3d.materials.iteritems():
-            data = np.array([mat.E1,
-                             mat.E2,
-                             mat.E3, 
-                             mat.nu12,
-                             mat.nu13,
-                             mat.nu23,
-                             mat.G12,
-                             mat.G13,
-                             mat.G23,
-                             mat.rho]) 
-            matdata.append(data)
-
-        np.savetxt(fid, np.asarray(matdata))
-
-        failcrit = dict(maximum_strain=1, maximum_stress=2, tsai_wu=3)
-        fid = open(self.fbase + '.failmat', 'w')
-        fid.write('# %s\n' % (' '.join(self.st3d.materials.keys())))
-        fid.write('# failcrit s11_t s22_t s33_t s11_c s22_c s33_c'
-                  't12 t13 t23 e11_c e22_c e33_c e11_t e22_t e33_t g12 g13 g23'
-                  'gM0 C1a C2a C3a C4a\n')
-        matdata = []
-        for name, mat in self.st3d.materials.iteritems():
-            data = np.array([failcrit[mat.failure_criterium],
-                             mat.s11_t,
-                             mat.s22_t,
-                             mat.s33_t, 
-                             mat.s11_c,
-                             mat.s22_c,
-                             mat.s33_c,
-                             mat.t12,
-                             mat.t13,
-                             mat.t23,
-                             mat.e11_c,
-                             mat.e22_c,
-                             mat.e33_c,
-                             mat.e11_t,
-                             mat.e22_t,
-                             mat.e33_t,
-                             mat.g12,
-                             mat.g13,
-                             mat.g23,
-                             mat.gM0,
-                             mat.C1a,
-                             mat.C2a,
-                             mat.C3a,
-                             mat.C4a])
-            matdata.append(data)
-        fmt = '%i ' + ' '.join(23*['%.20e'])
-        np.savetxt(fid, np.asarray(matdata), fmt=fmt)
+        with open(self.fbase + '.mat', 'w') as fid:
+            fid.write('# %s\n' % (' '.join(self.st3d.materials.keys())))
+            fid.write('# %s\n' % (' '.join(_mat_props)))
+            matdata = []
+            for name, mat in self.st3d.materials.iteritems():
+                matdata.append([getattr(mat, prop) for prop in _mat_props])
+            np.savetxt(fid, np.asarray(matdata))
+
+        failcrit = dict((v, k) for k, v in _failcrit.iteritems())
+        with open(self.fbase + '.failmat', 'w') as fid:
+            fid.write('# %s\n' % (' '.join(self.st3d.materials.keys())))
+            fid.write('# failcrit s11_t s22_t s33_t s11_c s22_c s33_c'
+                      't12 t13 t23 e11_c e22_c e33_c e11_t e22_t e33_t g12 g13 g23'
+                      'gM0 C1a C2a C3a C4a\n')
+            matdata = []
+            for name, mat in self.st3d.materials.iteritems():
+                matdata.append([failcrit[mat.failure_criterium]] +
+                               [getattr(mat, prop) for prop in _failmat_props])
+            fmt = '%i ' + ' '.join(23*['%.20e'])
+            np.savetxt(fid, np.asarray(matdata), fmt=fmt)
 
     def write_layup_data(self):
 
@@ -348,6 +310,7 @@ class BladeStructureWriter(Component):
         DPs.append(getattr(self.st3d, 'DP%02d' % (i + 1)))
         DPs = np.asarray(DPs).T
         np.savetxt(fid1, DPs)
+        fid1.close()
         for i, wname in enumerate(self.st3d.webs):
             
             self._logger.info('  writing web: %s' % rname)
@@ -372,6 +335,163 @@ class BladeStructureWriter(Component):
             fid.close()
 
 
+def write_bladestructure_npz(st3d, filename):
+    """
+    write a BladeStructureVT3D to a single binary numpy .npz file
+
+    The archive contains the arrays
+
+    * ``x``, ``DPs``: spanwise discretization and division points ((ni, nDP))
+    * ``regions``, ``webs``, ``iwebs``: region and web names and web DP indices
+    * ``<region>/layers``, ``<region>/thickness``, ``<region>/angle``:
+      layer names, thicknesses and angles ((ni, nlayers)) of each region and web
+    * ``materials``, ``mat``, ``failmat``: material names and properties
+      as stored in the .mat and .failmat text files
+
+    parameters
+    ----------
+    st3d: object
+        BladeStructureVT3D object
+    filename: str
+        name of the output file
+    """
+
+    failcrit = dict((v, k) for k, v in _failcrit.iteritems())
+    data = {}
+    data['x'] = np.asarray(st3d.x)
+    data['DPs'] = np.array([getattr(st3d, name) for name in st3d.DPs]).T
+    data['regions'] = np.array(st3d.regions, dtype=str)
+    data['webs'] = np.array(st3d.webs, dtype=str)
+    data['iwebs'] = np.array(st3d.iwebs, dtype=int).reshape(-1, 2)
+    for rname in st3d.regions + st3d.webs:
+        reg = getattr(st3d, rname)
+        data[rname + '/layers'] = np.array(reg.layers, dtype=str)
+        data[rname + '/thickness'] = np.array([getattr(reg, lname).thickness for lname in reg.layers]).T
+        data[rname + '/angle'] = np.array([getattr(reg, lname).angle for lname in reg.layers]).T
+    names = st3d.materials.keys()
+    data['materials'] = np.array(names, dtype=str)
+    data['mat'] = np.array([[getattr(st3d.materials[name], prop) for prop in _mat_props]
+                            for name in names]).reshape(-1, len(_mat_props))
+    data['failmat'] = np.array([[failcrit[st3d.materials[name].failure_criterium]] +
+                                [getattr(st3d.materials[name], prop) for prop in _failmat_props]
+                                for name in names]).reshape(-1, len(_failmat_props) + 1)
+
+    with open(filename, 'wb') as fid:
+        np.savez(fid, **data)
+
+
+def read_bladestructure_npz(filename, st3d=None, regions=None):
+    """
+    read a BladeStructureVT3D from a binary numpy .npz file written by
+    write_bladestructure_npz
+
+    The archive is read lazily, such that only the layups of the
+    requested regions are loaded.
+
+    parameters
+    ----------
+    filename: str
+        name of the input file
+    st3d: object
+        optional BladeStructureVT3D object to fill in
+    regions: list
+        optional list of names of the regions and webs to load layups for,
+        all regions and webs are loaded by default
+
+    returns
+    -------
+    st3d: object
+        BladeStructureVT3D object
+    """
+
+    if st3d is None:
+        st3d = BladeStructureVT3D()
+
+    d = np.load(filename)
+    try:
+        x = d['x']
+        DPs = d['DPs']
+        rnames = [str(name) for name in d['regions']]
+        wnames = [str(name) for name in d['webs']]
+        iwebs = [[int(i) for i in iweb] for iweb in d['iwebs']]
+
+        st3d.configure_regions(len(rnames), names=rnames)
+        st3d.configure_webs(len(wnames), iwebs, names=wnames)
+        st3d.x = x
+        for i, name in enumerate(st3d.DPs):
+            setattr(st3d, name, DPs[:, i])
+
+        for i, (name, rname) in enumerate(zip(rnames + wnames, st3d.regions + st3d.webs)):
+            if regions is not None and name not in regions:
+                continue
+            r = getattr(st3d, rname)
+            thickness = d[name + '/thickness']
+            angle = d[name + '/angle']
+            r.thickness = np.zeros(x.shape[0])
+            if i < len(rnames):
+                r.width = DPs[:, i + 1] - DPs[:, i]
+            else:
+                r.width = np.zeros(x.shape[0])
+            for il, lname in enumerate(d[name + '/layers']):
+                l = r.add_layer(str(lname))
+                l.thickness = thickness[:, il]
+                l.angle = angle[:, il]
+                r.thickness += l.thickness
+
+        mat = d['mat']
+        failmat = d['failmat']
+        for i, name in enumerate(d['materials']):
+            m = st3d.add_material(str(name))
+            for j, prop in enumerate(_mat_props):
+                setattr(m, prop, mat[i, j])
+            m.failure_criterium = _failcrit[int(failmat[i, 0])]
+            for j, prop in enumerate(_failmat_props):
+                setattr(m, prop, failmat[i, j + 1])
+    finally:
+        d.close()
+
+    return st3d
+
+
+def convert_bladestructure_text_to_npz(filebase, filename):
+    """
+    convert a blade structure stored in the text format read by
+    BladeStructureReader to a single binary .npz file
+
+    parameters
+    ----------
+    filebase: str
+        base name of the text files
+    filename: str
+        name of the output .npz file
+    """
+
+    reader = BladeStructureReader()
+    reader.filebase = filebase
+    reader.run()
+    write_bladestructure_npz(reader.st3d, filename)
+
+
+def convert_bladestructure_npz_to_text(filename, filebase):
+    """
+    convert a blade structure stored in a binary .npz file to the text format
+    written by BladeStructureWriter
+
+    parameters
+    ----------
+    filename: str
+        name of the input .npz file
+    filebase: str
+        base name of the output text files
+    """
+
+    writer = BladeStructureWriter()
+    writer.st3d = read_bladestructure_npz(filename)
+    writer.fbase = filebase
+    writer.write_layup_data()
+    writer.write_materials()
+
+
 @base
 class BeamStructureReaderBase(Component):
 
@@ -627,29 +747,182 @@ class SplinedBladeStructure(Assembly):
         """
         super(SplinedBladeStructure, self)._post_execute()
 
-        for i, rname in enumerate(self.st3dOut.regions):
-            region = getattr(self.st3dOut, rname)
-            DP0 = getattr(self.st3dOut, 'DP%02d' % i)
-            DP1 = getattr(self.st3dOut, 'DP%02d' % (i + 1))
-            width = DP1 - DP0
-            for ix in range(width.shape[0]):
-                if width[ix] < 0.:
-                    DPt = DP0[ix]
-                    DP0[ix] = DP1[ix]
-                    DP1[ix] = DPt
-                    width[ix] *= -1.
-                    self._logger.warning('switching DPs %i %i for section %i' %
-                                         (i, i + 1, ix))
-            region.width = width * self.pf.pfOut.chord * self.pfOut.blade_length
-            region.thickness = np.zeros(self.st3dOut.x.shape)
-            for layer in region.layers:
-                region.thickness += np.maximum(0., getattr(region, layer).thickness)
-
-        for i, rname in enumerate(self.st3dOut.webs):
-            region = getattr(self.st3dOut, rname)
-            region.thickness = np.zeros(self.st3dOut.x.shape)
-            for layer in region.layers:
-                region.thickness += np.maximum(0., getattr(region, layer).thickness)
+        _update_regions(self.st3dOut, self.pf.pfOut.chord * self.pfOut.blade_length, self._logger)
+
+
+def _update_regions(st3d, chord, logger):
+    """
+    swap crossing division points and update region widths
+    and thicknesses of a BladeStructureVT3D
+
+    parameters
+    -----------
+    st3d: object
+        BladeStructureVT3D vartree to update
+    chord: array
+        dimensional chord length at each section
+    logger: object
+        logger used to warn about swapped division points
+    """
+
+    nr = len(st3d.regions)
+    DPs = np.array([getattr(st3d, 'DP%02d' % i) for i in range(nr + 1)], dtype=float)
+    widths = np.zeros((nr, DPs.shape[1]))
+
+    # the swaps are done region by region since swapping the DPs of one
+    # region changes the starting DP of the next
+    swapped = np.zeros(nr + 1, dtype=bool)
+    for i in range(nr):
+        nswap = np.sum(DPs[i + 1] < DPs[i])
+        if nswap > 0:
+            logger.warning('switching DPs %i %i for %i sections' % (i, i + 1, nswap))
+            DP0 = np.minimum(DPs[i], DPs[i + 1])
+            DPs[i + 1] = np.maximum(DPs[i], DPs[i + 1])
+            DPs[i] = DP0
+            swapped[[i, i + 1]] = True
+        widths[i] = DPs[i + 1] - DPs[i]
+
+    # the DP curves may be connected outputs, so they are updated in place
+    for i in np.nonzero(swapped)[0]:
+        getattr(st3d, 'DP%02d' % i)[:] = DPs[i]
+
+    for i, rname in enumerate(st3d.regions):
+        region = getattr(st3d, rname)
+        region.width = widths[i] * chord
+        region.thickness = _total_thickness(region, st3d.x.shape)
+
+    for rname in st3d.webs:
+        region = getattr(st3d, rname)
+        region.thickness = _total_thickness(region, st3d.x.shape)
+
+
+def _total_thickness(region, shape):
+    """
+    sum of the non-negative layer thicknesses of a Region3D
+    """
+
+    if len(region.layers) == 0:
+        return np.zeros(shape)
+
+    t = np.array([getattr(region, lname).thickness for lname in region.layers])
+
+    return np.maximum(0., t).sum(axis=0)
+
+
+@implement_base(ModifyBladeStructureBase)
+class SplinedBladeStructureArray(Component):
+    """
+    Single component alternative to SplinedBladeStructure.
+
+    All division point, layer thickness and layer angle curves are stacked
+    into one matrix and evaluated with one shared spline engine, rather than
+    with a FFDSplineComponentBase per curve.
+    The component exposes the same ``<name>_C`` design variables, as well as
+    the ``pfIn``/``pfOut`` planforms and the ``st3dOut`` output.
+    """
+
+    x = Array(iotype='in', desc='spanwise resolution of blade')
+    span_ni = Int(20, iotype='in', desc='Number of discrete points along span')
+    nC = Int(8, iotype='in', desc='Number of spline control points along span')
+    Cx = Array(iotype='in', desc='spanwise distribution of spline control points')
+    pfIn = VarTree(BladePlanformVT(), iotype='in')
+    st3dIn = VarTree(BladeStructureVT3D(), iotype='in',
+                                         desc='Vartree containing initial discrete definition of blade structure')
+    pfOut = VarTree(BladePlanformVT(), iotype='out')
+    st3dOut = VarTree(BladeStructureVT3D(), iotype='out',
+                                         desc='Vartree containing re-splined discrete definition of blade structure')
+
+    def __init__(self):
+        super(SplinedBladeStructureArray, self).__init__()
+
+        self.spline_type = 'pchip'
+        # list of (design variable name, path to the curve in st3dOut)
+        self._curves = []
+        self._fixed = None
+
+    def configure_bladestructure(self, spline_type='pchip'):
+        """
+        method for trawling through the st3dIn vartree
+        and adding the spline control points of all curves as inputs
+        """
+
+        if self.x.shape[0] == 0:
+            self.x = np.linspace(0, 1, self.span_ni)
+        else:
+            self.span_ni = self.x.shape[0]
+        if self.Cx.shape[0] == 0:
+            self.Cx = np.linspace(0, 1, self.nC)
+        else:
+            self.nC = self.Cx.shape[0]
+
+        self.spline_type = spline_type
+        self.st3dOut = self.st3dIn.copy()
+        sec = self.st3dIn
+
+        self._curves = []
+        for dpname in sec.DPs:
+            self._curves.append((dpname + '_C', (dpname,)))
+        for ir, rname in enumerate(sec.regions):
+            for lname in getattr(sec, rname).layers:
+                lcname = 'r%02d%s' % (ir, lname)
+                self._curves.append((lcname + 'T_C', (rname, lname, 'thickness')))
+                self._curves.append((lcname + 'A_C', (rname, lname, 'angle')))
+        for wname in sec.webs:
+            for lname in getattr(sec, wname).layers:
+                lcname = '%s%s' % (wname, lname)
+                self._curves.append((lcname + 'T_C', (wname, lname, 'thickness')))
+                self._curves.append((lcname + 'A_C', (wname, lname, 'angle')))
+
+        for name, path in self._curves:
+            self.add(name, Array(np.zeros(self.nC), size=(self.nC,),
+                                                     dtype=float,
+                                                     iotype='in',
+                                                     desc='spline control points of %s' % name[:-2]))
+
+        # initial curves as function of span, size ((len(st3dIn.x), ncurves))
+        self._Pinit = np.array([sec.get('.'.join(path)) for name, path in self._curves]).T
+
+        # copy materials to output VT
+        self.st3dOut.materials = self.st3dIn.materials.copy()
+        self._fixed = None
+
+    def initialize(self):
+        """
+        evaluate the base curves and precompute the spline
+        for the current x and Cx distributions
+        """
+
+        self.spline = spline_dict[self.spline_type]()
+        base_spline = spline_dict['pchip']()
+        self.Pbase = base_spline(self.x, self.st3dIn.x, self._Pinit)
+        self._fixed = [self.x.copy(), self.Cx.copy()]
+
+    def execute(self):
+
+        if _fixed_inputs_changed(self._fixed, (self.x, self.Cx)):
+            self.initialize()
+
+        # redistribute the planform onto x
+        self.pfOut.blade_length = self.pfIn.blade_length
+        self.pfIn._compute_s()
+        for name in self.pfIn.list_vars():
+            var = getattr(self.pfIn, name)
+            if not isinstance(var, np.ndarray): continue
+            setattr(self.pfOut, name, pchip(self.pfIn.s, var)(self.x))
+        self.pfOut._compute_s()
+
+        # evaluate all curves at once
+        C = np.array([getattr(self, name) for name, path in self._curves]).T
+        P = self.Pbase + self.spline(self.x, self.Cx, C)
+
+        self.st3dOut.x = self.x.copy()
+        for i, (name, path) in enumerate(self._curves):
+            obj = self.st3dOut
+            for vname in path[:-1]:
+                obj = getattr(obj, vname)
+            setattr(obj, path[-1], P[:, i].copy())
+
+        _update_regions(self.st3dOut, self.pfOut.chord * self.pfOut.blade_length, self._logger)
 
 
 class BladeStructureProperties(Component):
@@ -673,35 +946,80 @@ class BladeStructureProperties(Component):
             self.add('alphaW%i' % w, Array(iotype='out', desc='Web%02d angle' % w))
             self.add('dW%i' % w, Array(iotype='out', desc='Web%02d offset' % w))
 
+        self._fixed = None
+
+    def _compute_sections(self):
+        """
+        compute the arc length parameterization, leading edge position
+        and spline second derivatives of all sections of the surface.
+        These are only recomputed when the surface changes.
+        """
+
+        surface = self.surface.surface
+        if not _fixed_inputs_changed(self._fixed, [surface]):
+            return
+        self._fixed = [surface.copy()]
+
+        nj = surface.shape[1]
+        self._s = np.zeros((nj, surface.shape[0]))
+        self._sLE = np.zeros(nj)
+        self._fpp = np.zeros((nj, surface.shape[0], surface.shape[2]))
+        for i in range(nj):
+            af = AirfoilShape(points=surface[:, i, :])
+            self._s[i] = af.s
+            self._sLE[i] = af.sLE
+            for k, spline in enumerate(af._splines):
+                self._fpp[i, :, k] = spline.fpp
+
+    def _interp_sections(self, s):
+        """
+        evaluate the splined sections at the curve fractions s of size
+        ((nsec, n)), equivalent to AirfoilShape.interp_s for each section.
+
+        returns
+        -------
+        points: array
+            array of size ((nsec, n, 3))
+        """
+
+        ns = self._s.shape[1]
+        sec = np.arange(s.shape[0])[:, np.newaxis]
+        j = np.clip((self._s[:, np.newaxis, :] <= s[:, :, np.newaxis]).sum(axis=2) - 1, 0, ns - 2)
+        s1 = self._s[sec, j]
+        s2 = self._s[sec, j + 1]
+        h = s2 - s1
+
+        A = ((s2 - s) / h)[:, :, np.newaxis]
+        B = 1 - A
+        C = 1.0/6*(A**3 - A)*(h**2)[:, :, np.newaxis]
+        D = 1.0/6*(B**3 - B)*(h**2)[:, :, np.newaxis]
+
+        points = self.surface.surface.swapaxes(0, 1)
+        return A * points[sec, j] + B * points[sec, j + 1] + \
+               C * self._fpp[sec, j] + D * self._fpp[sec, j + 1]
 
     def execute(self):
 
-        self.dp_curves = [] 
-        self.scurves = []
+        self._compute_sections()
+
         ni = self.pf.chord.shape[0]
         nDP = len(self.st3d.DPs)
-        for i in range(nDP):
-            name = 'DP%02d' % i
-            c = getattr(self.st3d, name)
-            self.scurves.append(Akima1DInterpolator(self.st3d.x, c))
-            dp = np.zeros([self.surface.surface.shape[1], self.surface.surface.shape[2]])
-            self.dp_curves.append(dp)
-
-        for i in range(self.surface.surface.shape[1]):
-            x = self.surface.surface[:, i, :]
-            span = self.pf.s[i]
-            af = AirfoilShape(points=x)
-            for j in range(nDP):
-                s_chord = self.scurves[j](span)
-                xx = af.interp_s(af.s_to_01(s_chord))
-                self.dp_curves[j][i, :] = xx
-
-        self.pacc_l = self.dp_curves[self.cap_ids[0][0]].copy()
-        self.pacc_u = self.dp_curves[self.cap_ids[1][0]].copy()
-        self.pacc_l[:, [0, 1]] = (self.dp_curves[self.cap_ids[0][0]][:, [0,1]] + \
-                                  self.dp_curves[self.cap_ids[0][1]][:, [0,1]]) / 2.
-        self.pacc_u[:, [0, 1]] = (self.dp_curves[self.cap_ids[1][0]][:, [0,1]] + \
-                                  self.dp_curves[self.cap_ids[1][1]][:, [0,1]]) / 2.
+        DPs = np.array([getattr(self.st3d, 'DP%02d' % i) for i in range(nDP)]).T
+        self.scurve = Akima1DInterpolator(self.st3d.x, DPs)
+
+        # DP curve fractions of all sections transformed from [-1, 1] to [0, 1]
+        s_chord = self.scurve(self.pf.s)
+        sLE = self._sLE[:, np.newaxis]
+        s_chord = np.where(s_chord >= 0., s_chord * (1. - sLE) + sLE, (1. + s_chord) * sLE)
+
+        dp_curves = self._interp_sections(s_chord)
+        self.dp_curves = [dp_curves[:, j, :] for j in range(nDP)]
+
+        (l0, l1), (u0, u1) = self.cap_ids
+        self.pacc_l = dp_curves[:, l0, :].copy()
+        self.pacc_u = dp_curves[:, u0, :].copy()
+        self.pacc_l[:, [0, 1]] = (dp_curves[:, l0, :2] + dp_curves[:, l1, :2]) / 2.
+        self.pacc_u[:, [0, 1]] = (dp_curves[:, u0, :2] + dp_curves[:, u1, :2]) / 2.
 
         self.pacc_l_curv = np.zeros((ni, 2))
         self.pacc_u_curv = np.zeros((ni, 2))
@@ -710,15 +1028,12 @@ class BladeStructureProperties(Component):
         self.pacc_l_curv[:, 1] = curvature(self.pacc_l)
         self.pacc_u_curv[:, 1] = curvature(self.pacc_u)
 
-        self.dW0 = self.dp_curves[self.cap_ids[0][0]].copy()
-        self.dW1 = self.dp_curves[self.cap_ids[0][1]].copy()
-        self.dW0[:, [0, 1]] = self.dp_curves[self.cap_ids[0][0]][:, [0,1]] -\
-                              self.dp_curves[self.cap_ids[1][0]][:, [0,1]]
-        self.dW1[:, [0, 1]] = self.dp_curves[self.cap_ids[0][1]][:, [0,1]] -\
-                              self.dp_curves[self.cap_ids[1][1]][:, [0,1]]
-        self.alphaW0 = np.array([np.arctan(a) for a in self.dW0[:, 0]/self.dW0[:, 1]]) * 180. / np.pi
-        self.alphaW1 = np.array([np.arctan(a) for a in self.dW1[:, 0]/self.dW1[:, 1]]) * 180. / np.pi
-
+        self.dW0 = dp_curves[:, l0, :].copy()
+        self.dW1 = dp_curves[:, l1, :].copy()
+        self.dW0[:, [0, 1]] = dp_curves[:, l0, :2] - dp_curves[:, u0, :2]
+        self.dW1[:, [0, 1]] = dp_curves[:, l1, :2] - dp_curves[:, u1, :2]
+        self.alphaW0 = np.arctan(self.dW0[:, 0] / self.dW0[:, 1]) * 180. / np.pi
+        self.alphaW1 = np.arctan(self.dW1[:, 0] / self.dW1[:, 1]) * 180. / np.pi
 
 
 @base
@@ -769,9 +1084,53 @@ class BladeStructureCSBuilder(BladeStructureBuilderBase):
     surface = VarTree(BladeSurfaceVT(), iotype='in', desc='Stacked blade surface object')
     st3d = VarTree(BladeStructureVT3D(), iotype='in', desc='Blade structure definition')
 
+    nproc = Int(1, desc='number of processes used to build the cross sections')
+
     cs2d = List(iotype='out', desc='List of cross-sectional properties'
                                          'vartrees')
 
+    def _resolve_materials(self):
+        """
+        resolve the material of every layer name in the structure once.
+        Each material is copied once and shared by all cross sections.
+
+        returns
+        -------
+        materials: dict
+            dictionary with layer names as keys and tuples of
+            (material name, MaterialProps object) as values
+        """
+
+        shared = {}
+        materials = {}
+        for rname in self.st3d.regions + self.st3d.webs:
+            for lname in getattr(self.st3d, rname).layers:
+                if lname in materials:
+                    continue
+                lnamebase = lname.translate(None, digits)
+                if lnamebase not in shared:
+                    mat = self.get_material(lname)
+                    shared[lnamebase] = mat.copy() if mat is not None else None
+                materials[lname] = (lnamebase, shared[lnamebase])
+        return materials
+
+    def _region_spec(self, reg, i, DP0, DP1, tmin):
+        """
+        plain data definition of region reg at section i
+        """
+
+        layers = []
+        for lname in reg.layers:
+            lay = getattr(reg, lname)
+            if lay.thickness[i] > tmin:
+                try:
+                    angle = lay.angle[i]
+                except:
+                    angle = 0.
+                layers.append((lname, self._materials[lname][0],
+                               max(0., lay.thickness[i]), angle))
+        return (DP0[i], DP1[i], reg.thickness[i], layers)
+
     def execute(self):
         """
         generate cross sections at every spanwise node of the st3d vartree
@@ -780,80 +1139,103 @@ class BladeStructureCSBuilder(BladeStructureBuilderBase):
         # clear list of outputs!
         self.cs2d = []
 
+        self._materials = self._resolve_materials()
+
         ni = self.st3d.x.shape[0]
+        nreg = len(self.st3d.regions)
+        try:
+            airfoils = self.surface.interpolate_profiles(self.st3d.x)[:, :, [0, 1]] * self.blade_length
+        except:
+            airfoils = None
+
+        DPs = [getattr(self.st3d, 'DP%02d' % i) for i in range(nreg + 1)]
+        iwebs = []
+        for ir, rname in enumerate(self.st3d.webs):
+            iweb = []
+            for idp in self.st3d.iwebs[ir]:
+                if not hasattr(self.st3d, 'DP%02d' % idp):
+                    idp = nreg + idp + 1
+                iweb.append(getattr(self.st3d, 'DP%02d' % idp))
+            iwebs.append(iweb)
+
+        # build plain data definitions of the sections
+        specs = []
         for i in range(ni):
-            x = self.st3d.x[i]
-            # print 'adding section at r/R = %2.2f' % x 
-            st2d = CrossSectionStructureVT()
-            st2d.s = x * self.blade_length
-            st2d.DPs = []
-            try:
-                airfoil = self.surface.interpolate_profile(x)[:, [0, 1]] * self.blade_length
-                st2d.airfoil.initialize(airfoil)
-            except:
-                pass
+            regions = []
+            sDPs = []
+            DP1 = None
             for ir, rname in enumerate(self.st3d.regions):
                 reg = getattr(self.st3d, rname)
                 if reg.thickness[i] < 1.e-5:
                     print 'zero thickness region!', rname
                     continue
-                DP0 = getattr(self.st3d, 'DP%02d' % ir)
-                DP1 = getattr(self.st3d, 'DP%02d' % (ir + 1))
-                r = st2d.add_region(rname.upper())
-                st2d.DPs.append(DP0[i])
-                r.s0 = DP0[i]
-                r.s1 = DP1[i]
-                r.thickness = reg.thickness[i]
-                for lname in reg.layers:
-                    lay = getattr(reg, lname)
-                    if lay.thickness[i] > 0.: 
-                        l = r.add_layer(lname)
-                        # try:
-                        lnamebase = lname.translate(None, digits)
-                        st2d.add_material(lnamebase, self.get_material(lname).copy())
-                        # except:
-                            # raise RuntimeError('Material %s not in materials list' % lname)
-                        l.materialname = lnamebase
-                        l.thickness = max(0., lay.thickness[i])
-                        try:
-                            l.angle = lay.angle[i]
-                        except:
-                            l.angle = 0.
-
-            st2d.DPs.append(DP1[i])
+                DP1 = DPs[ir + 1]
+                sDPs.append(DPs[ir][i])
+                regions.append((rname.upper(),) + self._region_spec(reg, i, DPs[ir], DP1, 0.))
+            if DP1 is not None:
+                sDPs.append(DP1[i])
+
+            webs = []
             for ir, rname in enumerate(self.st3d.webs):
                 reg = getattr(self.st3d, rname)
                 if reg.thickness[i] < 1.e-5:
                     continue
-                r = st2d.add_web(rname.upper())
-                try:
-                    DP0 = getattr(self.st3d, 'DP%02d' % self.st3d.iwebs[ir][0])
-                except:
-                    DP0 = getattr(self.st3d, 'DP%02d' % (len(self.st3d.regions) + self.st3d.iwebs[ir][0] + 1))
-                try:
-                    DP1 = getattr(self.st3d, 'DP%02d' % self.st3d.iwebs[ir][1])
-                except:
-                    DP1 = getattr(self.st3d, 'DP%02d' % (len(self.st3d.regions) + self.st3d.iwebs[ir][1] + 1))
-                r.s0 = DP0[i]
-                r.s1 = DP1[i]
-                r.thickness = reg.thickness[i]
-                for lname in reg.layers:
-                    lay = getattr(reg, lname)
-                    if lay.thickness[i] > 1.e-5:
-                        l = r.add_layer(lname)
-                        try:
-                            lnamebase = lname.translate(None, digits)
-                            st2d.add_material(lnamebase, self.get_material(lname).copy())
-                        except:
-                            raise RuntimeError('Material %s not in materials list' % lname)
-                        l.materialname = lnamebase
-                        l.thickness = max(0., lay.thickness[i])
-                        try:
-                            l.angle = lay.angle[i]
-                        except:
-                            l.angle = 0.
-
-            self.cs2d.append(st2d)
+                webs.append((rname.upper(),) + self._region_spec(reg, i, iwebs[ir][0], iwebs[ir][1], 1.e-5))
+
+            airfoil = airfoils[:, i, :] if airfoils is not None else None
+            specs.append((self.st3d.x[i] * self.blade_length, airfoil, sDPs, regions, webs))
+
+        if self.nproc > 1 and ni > 1:
+            pool = Pool(min(self.nproc, ni))
+            try:
+                cs2d = pool.map(_build_cross_section, specs)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            cs2d = map(_build_cross_section, specs)
+
+        # add the shared material objects
+        for st2d, spec in zip(cs2d, specs):
+            for reg in spec[3] + spec[4]:
+                for lname, lnamebase, t, angle in reg[4]:
+                    mat = self._materials[lname][1]
+                    if mat is None:
+                        raise RuntimeError('Material %s not in materials list' % lname)
+                    st2d.add_material(lnamebase, mat)
+
+        self.cs2d = cs2d
+
+
+def _build_cross_section(spec):
+    """
+    build a CrossSectionStructureVT from the plain data definition
+    generated by BladeStructureCSBuilder, module level to allow pickling.
+    Materials are added by the caller.
+    """
+
+    s, airfoil, DPs, regions, webs = spec
+
+    st2d = CrossSectionStructureVT()
+    st2d.s = s
+    st2d.DPs = DPs
+    try:
+        st2d.airfoil.initialize(airfoil)
+    except:
+        pass
+    for add, regs in [(st2d.add_region, regions), (st2d.add_web, webs)]:
+        for name, s0, s1, thickness, layers in regs:
+            r = add(name)
+            r.s0 = s0
+            r.s1 = s1
+            r.thickness = thickness
+            for lname, lnamebase, t, angle in layers:
+                l = r.add_layer(lname)
+                l.materialname = lnamebase
+                l.thickness = t
+                l.angle = angle
+
+    return st2d
 
 
 @base
@@ -865,6 +1247,9 @@ class BeamStructureCSCode(Component):
     The analysis assumes that the list of CrossSectionStructureVT's and the
     BladePlanformVT are interpolated onto the structural grid, and that
     the code itself is responsible for the meshing of the cross sections.
+
+    Implementations can use fusedwind.turbine.cs_dispatch.SectionDispatcher
+    to analyse the sections in parallel.
     """
 
     cs2d = List(CrossSectionStructureVT, iotype='in', desc='Blade cross sectional structure geometry')
@@ -0,0 +1,332 @@
+import os
+import glob
+import hashlib
+import tempfile
+import numpy as np
+from multiprocessing import Pool
+
+
+def _update_hash(h, value):
+    """
+    feed a string or numeric value to the hash object h in canonical form
+    """
+
+    if isinstance(value, basestring):
+        h.update('s%i:' % len(value))
+        h.update(value)
+    else:
+        a = np.ascontiguousarray(value, dtype=np.float64)
+        h.update('a%s:' % (a.shape,))
+        h.update(a.tostring())
+
+
+def section_hash(st2d, key=''):
+    """
+    compute a hash of the definition of a cross section.
+
+    Two sections with the same shape, regions, layups and material
+    properties have the same hash independent of the order in which
+    the materials were added.
+
+    parameters
+    ----------
+    st2d: object
+        CrossSectionStructureVT object
+    key: str
+        optional string mixed into the hash, e.g. solver settings that
+        affect the result of the analysis
+
+    returns
+    -------
+    hash: str
+        hexadecimal SHA1 digest
+    """
+
+    h = hashlib.sha1()
+    _update_hash(h, key)
+    _update_hash(h, st2d.s)
+    _update_hash(h, st2d.DPs)
+    _update_hash(h, st2d.airfoil.points)
+    for kind, names in [('regions', st2d.regions), ('webs', st2d.webs)]:
+        _update_hash(h, kind)
+        for name in names:
+            r = getattr(st2d, name)
+            _update_hash(h, name)
+            _update_hash(h, [r.s0, r.s1, r.thickness])
+            for lname in r.layers:
+                l = getattr(r, lname)
+                _update_hash(h, lname)
+                _update_hash(h, l.materialname)
+                _update_hash(h, [l.thickness, l.angle])
+    for mname in sorted(st2d.materials.keys()):
+        mat = st2d.materials[mname]
+        _update_hash(h, mname)
+        for vname in sorted(mat.list_vars()):
+            _update_hash(h, vname)
+            _update_hash(h, getattr(mat, vname))
+
+    return h.hexdigest()
+
+
+def _run_section(args):
+    """
+    run the analysis of a single section, retrying on failure.
+    Module level to allow pickling.
+    """
+
+    func, section, retries = args
+    for n in range(retries + 1):
+        try:
+            return func(section)
+        except Exception, e:
+            if n == retries:
+                raise
+            print 'section analysis failed (%s), retry %i of %i' % (e, n + 1, retries)
+
+
+class SectionDispatcher(object):
+    """
+    Run independent cross-sectional analyses of a list of
+    CrossSectionStructureVT's, typically from the execute method of
+    a BeamStructureCSCode or StressRecoveryCSCode implementation.
+
+    The sections are analysed by ``func``, optionally in a pool of worker
+    processes, and the results are returned in the order of the sections.
+    Results are cached on the hash of the section definition, such that
+    sections that are unchanged between calls are not re-analysed.
+
+    Parameters
+    ----------
+    func: callable
+        function taking a CrossSectionStructureVT as argument and returning
+        the result of the analysis. With nproc > 1 both func, the sections
+        and the results need to be picklable, i.e. func has to be defined
+        at module level.
+    nproc: int
+        number of worker processes
+    retries: int
+        number of times the analysis of a section is retried if it fails
+    cache: dict
+        optional dictionary like object storing the results, keyed on the
+        section hash. Defaults to an in-memory dictionary.
+    use_cache: bool
+        flag for caching the results
+    key: str
+        string mixed into the section hash, e.g. solver settings that
+        affect the result of the analysis
+    """
+
+    def __init__(self, func, nproc=1, retries=0, cache=None, use_cache=True, key=''):
+
+        self.func = func
+        self.nproc = nproc
+        self.retries = retries
+        if cache is None and use_cache:
+            cache = {}
+        self.cache = cache if use_cache else None
+        self.key = key
+
+    def __call__(self, sections):
+        """
+        analyse a list of sections
+
+        parameters
+        ----------
+        sections: list
+            list of CrossSectionStructureVT objects
+
+        returns
+        -------
+        results: list
+            results of func for each section
+        """
+
+        results = [None] * len(sections)
+        keys = [None] * len(sections)
+        todo = []
+        for i, section in enumerate(sections):
+            if self.cache is not None:
+                keys[i] = section_hash(section, self.key)
+                try:
+                    results[i] = self.cache[keys[i]]
+                    continue
+                except KeyError:
+                    pass
+            todo.append(i)
+
+        args = [(self.func, sections[i], self.retries) for i in todo]
+        if self.nproc > 1 and len(args) > 1:
+            pool = Pool(min(self.nproc, len(args)))
+            try:
+                res = pool.map(_run_section, args)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            res = map(_run_section, args)
+
+        for i, r in zip(todo, res):
+            results[i] = r
+            if self.cache is not None:
+                self.cache[keys[i]] = r
+
+        return results
+
+
+class SectionDiskCache(object):
+    """
+    Dictionary like cache of cross-sectional analysis results stored on
+    local disk, for use with SectionDispatcher.
+
+    Each result is stored in a compressed numpy .npz file named by
+    the section hash. Results must be dictionaries of numeric values or
+    arrays, e.g. the beam properties of the section, or a single
+    numeric value or array. When the total size of the cache exceeds
+    max_size the least recently used entries are evicted. Entries that
+    alone are larger than max_size are not stored.
+
+    Parameters
+    ----------
+    directory: str
+        path to the cache directory, created if it does not exist
+    max_size: int
+        maximum size of the cache in bytes
+    """
+
+    def __init__(self, directory, max_size=2**29):
+
+        self.directory = directory
+        self.max_size = max_size
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # index of existing entries: key -> [last access, size], where the
+        # last access is a stamp of a clock counting reads and writes,
+        # initially ordered by modification time of the files
+        self._index = {}
+        files = [(os.stat(path), path) for path in glob.glob(os.path.join(directory, '*.npz'))]
+        files.sort(key=lambda f: f[0].st_mtime)
+        for i, (st, path) in enumerate(files):
+            key = os.path.splitext(os.path.basename(path))[0]
+            self._index[key] = [i, st.st_size]
+        self._clock = len(files)
+
+    def _path(self, key):
+
+        return os.path.join(self.directory, key + '.npz')
+
+    def __len__(self):
+
+        return len(self._index)
+
+    def __contains__(self, key):
+
+        return key in self._index
+
+    def __getitem__(self, key):
+
+        if key not in self._index:
+            raise KeyError(key)
+        path = self._path(key)
+        try:
+            d = np.load(path)
+            try:
+                data = dict((name, d[name][()]) for name in d.files)
+            finally:
+                d.close()
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            # entry removed or corrupted by another process
+            self._remove(key)
+            raise KeyError(key)
+
+        self._clock += 1
+        self._index[key][0] = self._clock
+        if data.keys() == ['_value']:
+            return data['_value']
+        return data
+
+    def __setitem__(self, key, value):
+
+        if not isinstance(value, dict):
+            value = {'_value': value}
+
+        # write to a temporary file first to avoid partial entries
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        f = os.fdopen(fd, 'wb')
+        try:
+            np.savez_compressed(f, **value)
+        finally:
+            f.close()
+        size = os.stat(tmp).st_size
+        if size > self.max_size:
+            os.remove(tmp)
+            print 'section cache entry %s of %i bytes exceeds max_size %i, not stored' % (key, size, self.max_size)
+            return
+        path = self._path(key)
+        os.rename(tmp, path)
+        self._clock += 1
+        self._index[key] = [self._clock, size]
+        self._evict()
+
+    def __delitem__(self, key):
+
+        if key not in self._index:
+            raise KeyError(key)
+        self._remove(key)
+
+    def _remove(self, key):
+
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """
+        remove the least recently used entries until the cache is below max_size
+        """
+
+        size = sum(v[1] for v in self._index.values())
+        if size <= self.max_size:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k][0]):
+            size -= self._index[key][1]
+            self._remove(key)
+            if size <= self.max_size:
+                break
+
+    def clear(self):
+        """
+        remove all entries from the cache
+        """
+
+        for key in self._index.keys():
+            self._remove(key)
+
+
+def assemble_beam_structure(results, beam_structure):
+    """
+    assemble the per section beam properties returned by a cross-sectional
+    analysis into a BeamStructureVT
+
+    parameters
+    ----------
+    results: list
+        list of dictionaries with the beam properties of each section with
+        names of the BeamStructureVT variables as keys
+    beam_structure: object
+        BeamStructureVT object to update
+
+    returns
+    -------
+    beam_structure: object
+        the updated BeamStructureVT object
+    """
+
+    for name in beam_structure.list_vars():
+        if all(name in r for r in results):
+            setattr(beam_structure, name, np.array([r[name] for r in results]))
+
+    return beam_structure
@@ -6,23 +6,105 @@ from openmdao.main.api import Component, Assembly
 from openmdao.lib.datatypes.api import Instance, Array, VarTree, Enum, Int, List, Str, Float, Bool
 
 from fusedwind.lib.distfunc import distfunc
-from fusedwind.lib.cubicspline import NaturalCubicSpline
+from fusedwind.lib.cubicspline import NaturalCubicSpline, cubic_spline_basis
 from fusedwind.lib.geom_tools import RotMat, dotXC, calculate_length, curvature
-from fusedwind.lib.bezier import BezierCurve
-from fusedwind.turbine.geometry_vt import Curve, BladePlanformVT, BladeSurfaceVT, BlendAirfoilShapes, AirfoilShape
+from fusedwind.lib.bezier import BezierCurve, bernstein_basis
+from fusedwind.turbine.geometry_vt import Curve, BladePlanformVT, BladeSurfaceVT, BlendAirfoilShapes, AirfoilShape, \
+                                         redistribute_airfoils
 from fusedwind.interface import base, implement_base
 
 
+def _pchip_slopes(xp, yp):
+    """
+    derivatives at the control points of a piecewise cubic Hermite
+    interpolating polynomial, following scipy.interpolate.PchipInterpolator.
+
+    yp can be of size ((len(xp), ...)) to compute the slopes of several
+    curves at once.
+    """
+
+    yp = np.asarray(yp, dtype=float)
+    h = np.diff(xp).reshape((-1,) + (1,) * (yp.ndim - 1))
+    m = np.diff(yp, axis=0) / h
+    d = np.zeros(yp.shape)
+    if yp.shape[0] == 2:
+        d[0] = m[0]
+        d[1] = m[0]
+        return d
+
+    # weighted harmonic mean of the neighbouring secants, zero at local extrema
+    w1 = 2. * h[1:] + h[:-1]
+    w2 = h[1:] + 2. * h[:-1]
+    flat = (np.sign(m[1:]) != np.sign(m[:-1])) | (m[1:] == 0.) | (m[:-1] == 0.)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        whmean = (w1 / m[:-1] + w2 / m[1:]) / (w1 + w2)
+        d[1:-1] = np.where(flat, 0., 1. / whmean)
+
+    # shape preserving one-sided three-point estimates at the ends
+    for i, (h0, h1, m0, m1) in [(0, (h[0], h[1], m[0], m[1])),
+                                (-1, (h[-1], h[-2], m[-1], m[-2]))]:
+        de = ((2. * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+        overshoot = (np.sign(m0) != np.sign(m1)) & (np.abs(de) > 3. * np.abs(m0))
+        d[i] = np.where(np.sign(de) != np.sign(m0), 0., np.where(overshoot, 3. * m0, de))
+
+    return d
+
+
+def _fixed_inputs_changed(old, new):
+    """
+    check whether any of the arrays in new differ from the stored copies in old
+    """
+
+    if old is None:
+        return True
+    for a, b in zip(old, new):
+        if not np.array_equal(a, b):
+            return True
+    return False
+
+
+def _curvature_jacobian(x, y):
+    """
+    jacobian of ``curvature(np.array([x, y]).T)`` wrt y
+    """
+
+    n = y.shape[0]
+    J = np.zeros((n, n))
+    if n < 3:
+        return J
+
+    x1 = np.diff(x)[1:]
+    x2 = np.diff(x, 2)
+    y1 = np.diff(y)[1:]
+    y2 = np.diff(y, 2)
+    q = x1**2 + y1**2
+    dcdy1 = -x2 * q**-1.5 - 3. * (x1*y2 - y1*x2) * y1 * q**-2.5
+    dcdy2 = x1 * q**-1.5
+
+    k = np.arange(n - 2)
+    J[k + 1, k] = dcdy2
+    J[k + 1, k + 1] = -dcdy1 - 2. * dcdy2
+    J[k + 1, k + 2] = dcdy1 + dcdy2
+    J[0] = J[1]
+    J[-1] = J[-2]
+
+    return J
+
+
 class SplineBase(object):
     """
     base for 1-D splines
 
-    if the spline requires it, implement a fitting procedure in __init__
+    if the spline requires it, implement a fitting procedure in initialize
 
     place the main call to the spline in __call__ 
+
+    the x and Cx distributions are normally fixed for the lifetime of a spline,
+    so derived classes should precompute what they can for a given
+    (x, Cx) pair in initialize.
     """
 
-    def initialize(self, Cx, xp, yp):
+    def initialize(self, x, Cx, C):
 
         pass
 
@@ -50,37 +132,47 @@ class SplineBase(object):
 
         raise NotImplementedError('A derived class of SplineBase needs to implement a __call__ method')
 
-
-class pchipSpline(SplineBase):
-
-    def initialize(self, x, xp, yp):
+    def jacobian(self, x, Cx, C):
         """
-        params:
-        ----------
-        x: array
-            array with new x-distribution
-        xp: array
-            array with original x-distribution
-        yp: array
-            array with original y-distribution
-
         returns
         ---------
-        ynew: array
-            resampled points
+        J: array
+            derivatives of the resampled points wrt C, size ((len(x), len(C)))
         """
 
-        return self.__call__(x, xp, yp)
+        raise NotImplementedError('%s does not provide a jacobian' % self.__class__.__name__)
 
-    def __call__(self, x, Cx, C):
+
+class LinearSplineBase(SplineBase):
+    """
+    base for splines that are linear in the control point values C.
+
+    For fixed x and Cx the spline is evaluated as ``P = B * C``, where the
+    basis matrix B is computed once in compute_basis and also is the
+    jacobian of the spline.
+    """
+
+    def __init__(self):
+
+        self._fixed = None
+        self.B = None
+
+    def compute_basis(self, x, Cx):
+        """
+        returns the basis matrix of size ((len(x), len(Cx)))
+        """
+
+        raise NotImplementedError('A derived class of LinearSplineBase needs to implement compute_basis')
+
+    def initialize(self, x, Cx, C):
         """
         params:
         ----------
         x: array
             array with new x-distribution
-        xp: array
+        Cx: array
             array with x-coordinates of spline control points
-        yp: array
+        C: array
             array with y-coordinates of spline control points
 
         returns
@@ -89,41 +181,62 @@ class pchipSpline(SplineBase):
             resampled points
         """
 
-        spl = pchip(Cx, C)
-        return spl(x)
+        if _fixed_inputs_changed(self._fixed, (x, Cx)):
+            self.B = self.compute_basis(np.asarray(x, dtype=float),
+                                        np.asarray(Cx, dtype=float))
+            self._fixed = (np.array(x, copy=True), np.array(Cx, copy=True))
 
+        return np.dot(self.B, C)
 
-class BezierSpline(SplineBase):
+    def __call__(self, x, Cx, C):
 
-    def initialize(self, x, xp, yp):
-        """
-        params:
-        ----------
-        x: array
-            array with new x-distribution
-        xp: array
-            array with original x-distribution
-        yp: array
-            array with original y-distribution
+        return self.initialize(x, Cx, C)
 
-        returns
-        ---------
-        ynew: array
-            resampled points
-        """
-        self.B = BezierCurve()
-        self.B.CPs = np.array([xp, yp]).T
-        return self.__call__(x, xp, yp)
+    def jacobian(self, x, Cx, C):
 
-    def __call__(self, x, Cx, C):
+        self.initialize(x, Cx, C)
+        return self.B
+
+
+class pchipSpline(SplineBase):
+    """
+    Piecewise cubic Hermite interpolating polynomial (scipy.interpolate.pchip).
+
+    The Hermite basis functions only depend on x and Cx and are precomputed,
+    the slopes at the control points are recomputed from C on every call.
+    """
+
+    def __init__(self):
+
+        self._fixed = None
+
+    def _compute_basis(self, x, Cx):
+
+        x = np.asarray(x, dtype=float)
+        Cx = np.asarray(Cx, dtype=float)
+        nC = Cx.shape[0]
+        # bracketing intervals, x outside Cx is extrapolated like pchip
+        i = np.clip(np.searchsorted(Cx, x, side='right') - 1, 0, nC - 2)
+        h = Cx[i + 1] - Cx[i]
+        t = (x - Cx[i]) / h
+        eye = np.eye(nC)
+
+        # values and slopes basis
+        self.A = ((1. + 2. * t) * (1. - t)**2)[:, np.newaxis] * eye[i] + \
+                 (t**2 * (3. - 2. * t))[:, np.newaxis] * eye[i + 1]
+        self.D = (h * t * (1. - t)**2)[:, np.newaxis] * eye[i] + \
+                 (h * t**2 * (t - 1.))[:, np.newaxis] * eye[i + 1]
+        self._fixed = (np.array(x, copy=True), np.array(Cx, copy=True))
+
+    def initialize(self, x, Cx, C):
         """
         params:
         ----------
         x: array
             array with new x-distribution
-        xp: array
+        Cx: array
             array with x-coordinates of spline control points
-        yp: array
+        C: array
             array with y-coordinates of spline control points
 
         returns
@@ -131,14 +244,70 @@ class BezierSpline(SplineBase):
         ynew: array
             resampled points
         """
-        self.B.CPs = np.array([Cx, C]).T
-        self.B.update()
-        spl = NaturalCubicSpline(self.B.points[:, 0], self.B.points[:, 1])
-        return spl(x)
+
+        if _fixed_inputs_changed(self._fixed, (x, Cx)):
+            self._compute_basis(x, Cx)
+
+        return np.dot(self.A, C) + np.dot(self.D, _pchip_slopes(self._fixed[1], np.asarray(C, dtype=float)))
+
+    def __call__(self, x, Cx, C):
+
+        return self.initialize(x, Cx, C)
+
+    def jacobian(self, x, Cx, C):
+        """
+        The slopes are a non-linear function of C, their derivatives
+        are computed using central finite differences
+        """
+
+        if _fixed_inputs_changed(self._fixed, (x, Cx)):
+            self._compute_basis(x, Cx)
+
+        C = np.asarray(C, dtype=float)
+        Cx = self._fixed[1]
+        dd = np.zeros((C.shape[0], C.shape[0]))
+        for j in range(C.shape[0]):
+            step = 1.e-6 * max(1., abs(C[j]))
+            Cp = C.copy()
+            Cm = C.copy()
+            Cp[j] += step
+            Cm[j] -= step
+            dd[:, j] = (_pchip_slopes(Cx, Cp) - _pchip_slopes(Cx, Cm)) / (2. * step)
+
+        return self.A + np.dot(self.D, dd)
+
+
+class BezierSpline(LinearSplineBase):
+    """
+    Bezier curve through the control points (Cx, C) resampled onto x
+    with a natural cubic spline.
+
+    For fixed x and Cx both operations are linear in C, so the
+    combined basis matrix is precomputed.
+    """
+
+    ni = 100
+
+    def compute_basis(self, x, Cx):
+
+        Bern = bernstein_basis(self.ni, Cx.shape[0])
+
+        return np.dot(cubic_spline_basis(np.dot(Bern, Cx), x), Bern)
+
+
+class CubicSpline(LinearSplineBase):
+    """
+    Natural cubic spline through the control points (Cx, C)
+    """
+
+    def compute_basis(self, x, Cx):
+
+        return cubic_spline_basis(Cx, x)
 
 
 spline_dict = {'pchip': pchipSpline,
-               'bezier': BezierSpline}
+               'bezier': BezierSpline,
+               'cubic': CubicSpline}
 
 
 @base
@@ -180,12 +349,18 @@ class SplineComponentBase(Component):
         self.spline = spline_dict[spline_type]()
         self.spline_type = spline_type
 
+    def _fixed_inputs(self):
+
+        return (self.x, self.Cx, self.xinit, self.Pinit, np.array(self.spline_type))
+
     def initialize(self):
         """
-
+        fit the control points to the initial curve
         """
         self.set_spline(self.spline_type)
         self.C = self.spline(self.Cx, self.xinit, self.Pinit)
+        self._fixed = [np.array(a, copy=True) for a in self._fixed_inputs()]
+        self.init_called = True
 
     def execute(self):
         """
@@ -194,11 +369,22 @@ class SplineComponentBase(Component):
         derived classes need to overwrite this class with specific splines
         """
 
-        if not self.init_called:
+        if not self.init_called or _fixed_inputs_changed(self._fixed, self._fixed_inputs()):
             self.initialize()
 
         self.P = self.spline(self.x, self.Cx, self.C)
 
+    def list_deriv_vars(self):
+
+        inputs = ('C',)
+        outputs = ('P',)
+
+        return inputs, outputs
+
+    def provideJ(self):
+
+        return self.spline.jacobian(self.x, self.Cx, self.C)
+
 
 @base
 class FFDSplineComponentBase(Component):
@@ -240,15 +426,26 @@ class FFDSplineComponentBase(Component):
         self.spline = spline_dict[spline_type]()
         self.spline_type = spline_type
 
+    def _fixed_inputs(self):
+
+        return (self.x, self.Cx, self.xinit, self.Pinit,
+                np.array(self.spline_type), np.array(self.base_spline_type))
+
     def initialize(self):
         """
+        compute the base curve and precompute the spline for the
+        current x and Cx distributions.
 
+        The component is re-initialized when any of x, Cx, xinit, Pinit
+        or the spline types change.
         """
 
         self.base_spline = spline_dict[self.base_spline_type]()
         self.set_spline(self.spline_type)
         self.Pbase = self.base_spline(self.x, self.xinit, self.Pinit)
         self.spline.initialize(self.x, self.Cx, self.C)
+        self._fixed = [np.array(a, copy=True) for a in self._fixed_inputs()]
+        self.init_called = True
 
     def execute(self):
         """
@@ -257,12 +454,26 @@ class FFDSplineComponentBase(Component):
         derived classes need to overwrite this class with specific splines
         """
 
-        if not self.init_called:
+        if not self.init_called or _fixed_inputs_changed(self._fixed, self._fixed_inputs()):
             self.initialize()
 
         self.P = self.Pbase + self.spline(self.x, self.Cx, self.C)
         self.dPds = curvature(np.array([self.x, self.P]).T)
 
+    def list_deriv_vars(self):
+
+        inputs = ('C',)
+        outputs = ('P', 'dPds')
+
+        return inputs, outputs
+
+    def provideJ(self):
+
+        dPdC = self.spline.jacobian(self.x, self.Cx, self.C)
+        dcurvdC = np.dot(_curvature_jacobian(self.x, self.P), dPdC)
+
+        return np.vstack((dPdC, dcurvdC))
+
 
 @base
 class ModifyBladePlanformBase(Component):
@@ -540,6 +751,7 @@ class LoftedBladeSurface(Component):
     chord_ni = Int(300, iotype='in')
     span_ni = Int(300, iotype='in')
     redistribute_flag = Bool(False, desc='redistribute points chordwise')
+    nproc = Int(1, desc='number of processes used for redistributing the airfoils')
     x_chordwise = Array(iotype='in', desc='user specified chordwise distribution')
     minTE = Float(0., iotype='in', desc='minimum trailing edge thickness')
     interp_type = Enum('rthick', ('rthick', 's'), iotype='in')
@@ -558,30 +770,29 @@ class LoftedBladeSurface(Component):
         self.interpolator.spline = self.surface_spline
         self.interpolator.blend_var = self.blend_var
         self.interpolator.airfoil_list = self.base_airfoils
+        self.interpolator.nproc = self.nproc
         self.interpolator.initialize()
 
         self.span_ni = self.pf.s.shape[0]
         x = np.zeros((self.chord_ni, self.span_ni, 3))
 
+        # generate the blended airfoil shapes
+        afs = []
+        for i in range(self.span_ni):
+            if self.interp_type == 'rthick':
+                afs.append(self.interpolator(self.pf.rthick[i]))
+            else:
+                afs.append(self.interpolator(self.pf.s[i]))
+
+        afs = self.redistribute_sections(afs)
+
         for i in range(self.span_ni):
 
-            s = self.pf.s[i]
-            pos_x = self.pf.x[i]
-            pos_y = self.pf.y[i]
             pos_z = self.pf.z[i]
             chord = self.pf.chord[i]
             p_le = self.pf.p_le[i]
 
-            # generate the blended airfoil shape
-            if self.interp_type == 'rthick':
-                rthick = self.pf.rthick[i]
-                points = self.interpolator(rthick)
-            else:
-                points = self.interpolator(s)
-
-            points = self.redistribute(points, pos_z)
-
-            points *= chord
+            points = afs[i] * chord
             points = self.open_trailing_edge(points)
             points[:, 0] -= chord * p_le
 
@@ -651,6 +862,26 @@ class LoftedBladeSurface(Component):
 
         return x_rot
 
+    def redistribute_sections(self, afs):
+        """
+        redistribute the blended airfoil sections
+
+        The sections are redistributed as one family using
+        redistribute_airfoils unless they require individual treatment,
+        i.e. Gurney flaps, a user specified chordwise distribution or
+        a set_airfoil method overridden in a subclass.
+        """
+
+        if self.redistribute_flag == False:
+            return afs
+
+        custom = type(self).set_airfoil.__func__ is not LoftedBladeSurface.set_airfoil.__func__
+        if custom or hasattr(self, 'gf_height') or self.x_chordwise.shape[0] > 0 or \
+           not hasattr(self, 'dist_LE'):
+            return [self.redistribute(points, pos_z) for points, pos_z in zip(afs, self.pf.z)]
+
+        return redistribute_airfoils(afs, self.chord_ni, dLE=True, nproc=self.nproc)
+
     def redistribute(self, points, pos_z):
 
         if self.redistribute_flag == False:
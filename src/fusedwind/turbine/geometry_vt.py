@@ -1,5 +1,6 @@
 
 import numpy as np
+from multiprocessing import Pool
 from scipy.optimize import minimize
 from scipy.interpolate import pchip, Akima1DInterpolator
 
@@ -10,10 +11,36 @@ from fusedwind.interface import base, implement_base
 from fusedwind.lib.geom_tools import calculate_length, curvature
 from fusedwind.lib.cubicspline import NaturalCubicSpline
 from fusedwind.lib.distfunc import distfunc
+from fusedwind.lib.utilities import interp_weights
+
+
+def _cached(func):
+    """
+    decorator turning a method of a Curve into a property that is computed
+    on first access and kept until the points of the curve are updated
+    """
+    name = func.__name__
+
+    def getter(self):
+        cache = self.__dict__.setdefault('_cache', {})
+        try:
+            return cache[name]
+        except KeyError:
+            cache[name] = func(self)
+            return cache[name]
+
+    return property(getter, doc=func.__doc__)
 
 
 @base
 class Curve(VariableTree):
+    """
+    Splined curve through a set of points.
+
+    Only the running length ``s`` is computed when the points are set,
+    the tangent vectors ``dp`` and the splines are computed on first
+    access and cached until the curve is re-initialized.
+    """
 
     length = Float(desc='Total curve length')
     s = Array(desc='Curve accumulated curve length')
@@ -24,6 +51,7 @@ class Curve(VariableTree):
     def __init__(self, points=None):
         super(Curve, self).__init__()
 
+        self._cache = {}
         if points is not None:
             self.initialize(points)
 
@@ -33,8 +61,17 @@ class Curve(VariableTree):
             self.ni = points.shape[0]
 
             self._compute_s()
-            self._compute_dp()
-            self._build_splines()
+            self._clear_cache()
+
+    def _clear_cache(self):
+        """
+        discard the lazily computed quantities of the curve
+        """
+        self._cache = {}
+
+    def _points_changed(self, old, new):
+
+        self._clear_cache()
 
     def _compute_s(self):
         """
@@ -45,31 +82,31 @@ class Curve(VariableTree):
         self.ds = np.diff(s)
         self.s = s/s[-1]
 
+    @_cached
+    def dp(self):
+        """unit direction vectors along the curve"""
 
-    def _compute_dp(self):
-        """compute the unit direction vectors along the curve"""
- 
         t1 = np.gradient(self.points[:,:])[0]
-        self.dp = np.array([t1[i, :] / np.linalg.norm(t1[i, :]) for i in range(t1.shape[0])])
-
-    def _build_splines(self):
+        return t1 / np.sqrt((t1**2).sum(axis=1))[:, np.newaxis]
 
-        self._splines = []
+    @_cached
+    def _splines(self):
+        """natural cubic splines of each coordinate as function of s"""
 
-        for j in range(self.points.shape[1]):
-            self._splines.append(NaturalCubicSpline(self.s, self.points[:, j]))
+        return [NaturalCubicSpline(self.s, self.points[:, j])
+                for j in range(self.points.shape[1])]
 
     def redistribute(self, dist=None, s=None):
 
+        # the splines have to be built on the current distribution
+        splines = self._splines
+
         if dist is not None:
-            self.s = distfunc(dist)
-        else:
-            self.s = s
+            s = distfunc(dist)
 
-        self.ni = self.s.shape[0]
-        points = np.zeros((self.ni, self.points.shape[1]))
+        points = np.zeros((s.shape[0], self.points.shape[1]))
         for i in range(points.shape[1]):
-            points[:, i] = self._splines[i](self.s)
+            points[:, i] = splines[i](s)
 
         self.initialize(points)
 
@@ -93,17 +130,10 @@ class AirfoilShape(Curve):
     and can redistribute the points smoothly along the surface.
     Points along the surface need to be defined starting at the
     TE pressure side ending at the TE suction side.
-    """
-
-    LE = Array(desc='Leading edge coordinates')
-    TE = Array(desc='Trailing edge coordinates')
-    sLE = Float(desc='Leading edge curve fraction')
-    chord = Float(desc='chord length')
 
-    def initialize(self, points):
-
-        super(AirfoilShape, self).initialize(points)
-        self.computeLETE()
+    The LE, TE, chord and LE curvature are computed on first access
+    and cached until the points of the airfoil are updated.
+    """
 
     def computeLETE(self):
         """
@@ -113,16 +143,44 @@ class AirfoilShape(Curve):
         LE is computed as the point with maximum distance from the TE.
         """
 
-        self.TE = np.array([np.average(self.points[[0, -1], 0]),
-                            np.average(self.points[[0, -1], 1])])
+        cache = self.__dict__.setdefault('_cache', {})
+        for name in ['TE', 'sLE', 'LE', 'curvLE', 'chord']:
+            cache.pop(name, None)
+            getattr(self, name)
+
+    @_cached
+    def TE(self):
+        """Trailing edge coordinates"""
+
+        return np.array([np.average(self.points[[0, -1], 0]),
+                         np.average(self.points[[0, -1], 1])])
+
+    @_cached
+    def sLE(self):
+        """Leading edge curve fraction"""
 
         res = minimize(self._sdist, (0.5), method='SLSQP', bounds=[(0, 1)])
-        self.sLE = res['x'][0]
+        return res['x'][0]
+
+    @_cached
+    def LE(self):
+        """Leading edge coordinates"""
+
         xLE = self._splines[0](self.sLE)
         yLE = self._splines[1](self.sLE)
-        self.LE = np.array([xLE, yLE])
-        self.curvLE = NaturalCubicSpline(self.s, curvature(self.points))(self.sLE)
-        self.chord = np.linalg.norm(self.LE-self.TE)
+        return np.array([xLE, yLE])
+
+    @_cached
+    def curvLE(self):
+        """Curvature at the leading edge"""
+
+        return NaturalCubicSpline(self.s, curvature(self.points))(self.sLE)
+
+    @_cached
+    def chord(self):
+        """chord length"""
+
+        return np.linalg.norm(self.LE-self.TE)
 
     def _sdist(self, s):
 
@@ -286,6 +344,77 @@ class AirfoilShape(Curve):
         self.initialize(self.points)
 
 
+def _redistribute_airfoil(args):
+    """
+    redistribute a single airfoil, module level to allow pickling
+    """
+
+    points, ni, even, s, dLE, dTE = args
+    af = AirfoilShape(np.asarray(points, dtype=float))
+    if s is not None:
+        Curve.redistribute(af, s=s)
+    else:
+        af.redistribute(ni, even=even, dLE=dLE, dTE=dTE)
+    return af.points[:, :2]
+
+
+def redistribute_airfoils(airfoils, ni, even=False, dist=None, dLE=False, dTE=-1., nproc=1):
+    """
+    redistribute a family of airfoils in one call
+
+    The arc length distribution is computed once when it is shared by
+    the family, i.e. when ``dist`` is specified, otherwise it depends on
+    the leading edge position of each airfoil and is taken from the
+    distfunc cache when possible.
+
+    Parameters
+    ----------
+    airfoils : list
+        list of airfoil coordinates of size ((ni_k, 2)), where the number of
+        points ni_k can differ between airfoils, or array of size ((n_af, ni_k, 2))
+    ni : int
+        total number of points on the redistributed airfoils
+    even : bool
+        flag for getting an even distribution of points
+    dist : list
+        optional list of control points passed to distfunc, see
+        AirfoilShape.redistribute
+    dLE : bool
+        optional flag for automatically calculating a suitable leading edge cell
+        size based on the local curvature of each airfoil
+    dTE : float
+        optional trailing edge cell size used with dLE
+    nproc : int
+        number of processes to distribute the airfoils on
+
+    Returns
+    -------
+    points : array
+        redistributed airfoils of size ((n_af, ni, 2))
+    """
+
+    s = None
+    if dist is not None and not even:
+        s = distfunc(dist)
+        ni = s.shape[0]
+
+    args = [(af, ni, even, s, dLE, dTE) for af in airfoils]
+    if nproc > 1 and len(args) > 1:
+        pool = Pool(min(nproc, len(args)))
+        try:
+            afs = pool.map(_redistribute_airfoil, args)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        afs = map(_redistribute_airfoil, args)
+
+    points = np.zeros((len(afs), ni, 2))
+    for i, af in enumerate(afs):
+        points[i] = af
+    return points
+
+
 class BlendAirfoilShapes(object):
     """
     Blend input airfoil shape family based on a user defined scalar.
@@ -317,6 +446,9 @@ class BlendAirfoilShapes(object):
 
     allow_extrapolation: bool
         the splines allow for limited extrapolation, set to True if you feel lucky
+
+    nproc: int
+        number of processes used to redistribute the airfoils
     """
 
 
@@ -327,6 +459,7 @@ class BlendAirfoilShapes(object):
         self.blend_var = None
         self.spline = 'pchip'
         self.allow_extrapolation = False
+        self.nproc = 1
 
         for k,v in kwargs.iteritems():
             if hasattr(self,k):
@@ -343,12 +476,8 @@ class BlendAirfoilShapes(object):
 
         self.blend_var = np.asarray(self.blend_var)
 
-        afs = []
-        for af in self.airfoil_list:
-            a = AirfoilShape(af)
-            aa = a.redistribute(ni=self.ni, even=True)
-            afs.append(aa.points)
-        self.airfoil_list = afs
+        afs = redistribute_airfoils(self.airfoil_list, self.ni, even=True, nproc=self.nproc)
+        self.airfoil_list = list(afs)
 
         self.nj = len(self.airfoil_list)
         self.nk = 3
@@ -448,16 +577,16 @@ class BladeSurfaceVT(VariableTree):
 
         self._prep_called = False
 
+    def _surface_changed(self, old, new):
+
+        self._prep_called = False
+
     def _compute_axis(self):
         """
         The blade axis is computed along the 3rd dimension of the blade
         """
 
-        axis = np.zeros((self.surface.shape[1], 3))
-        for j in range(self.surface.shape[1]):
-            for nd in range(3):
-                axis[j, nd] = np.mean(self.surface[:, j, nd])
-        self.axis = Curve(axis)
+        self.axis = Curve(self.surface.mean(axis=0))
 
         self._prep_called = True
 
@@ -467,14 +596,24 @@ class BladeSurfaceVT(VariableTree):
         relative to the running length of the blade
         """
 
+        return self.interpolate_profiles(np.array([ix]))[:, 0, :]
+
+    def interpolate_profiles(self, x):
+        """
+        interpolate the profiles at positions x on the blade,
+        relative to the running length of the blade
+
+        returns
+        -------
+        profiles: array
+            interpolated profiles of size ((ni_chord, x.shape[0], 3))
+        """
+
         if not self._prep_called:
             self._compute_axis()
 
-        ni = self.surface.shape[0]
         # linear interpolation of points
-        prof = np.zeros((ni, 3))
-        for i in range(self.surface.shape[0]):
-            for iX in range(3):
-                prof[i,iX]  = np.interp(ix, self.axis.s, self.surface[i,:,iX])
+        i, w = interp_weights(x, self.axis.s)
+        w = w[np.newaxis, :, np.newaxis]
 
-        return prof
+        return (1. - w) * self.surface[:, i, :] + w * self.surface[:, i + 1, :]
@@ -1,7 +1,7 @@
 
 import numpy as np
 from openmdao.main.api import Component
-from openmdao.lib.datatypes.api import List, Array, VarTree, Float, Str
+from openmdao.lib.datatypes.api import List, Array, VarTree, Float, Str, Bool, Enum
 
 from fusedwind.interface import base, implement_base
 from fusedwind.turbine.rotoraero_vt import LoadVectorArray, LoadVectorArrayCaseList, LoadVectorCaseList
@@ -18,22 +18,47 @@ class LoadCaseReaderBase(Component):
 
 @implement_base(LoadCaseReaderBase)
 class LoadCaseReader(Component):
+    """
+    reads load cases from a list of text files, one per case, or from
+    a binary file written by LoadVectorArrayCaseList.save_array which is
+    memory-mapped.
+
+    The cases are stored in one array of size ((n_cases, n_s, 9)) and
+    load_cases.cases are views into this array.
+    """
 
     case_files = List(iotype='in', desc='List of load case files')
     case_filter = List(iotype='in', desc='List of cases indices to include, if empty all are used')
     blade_length = Float(86.366, iotype='in')
+    array_file = Str(iotype='in', desc='base name of binary load case file, read instead of case_files')
+    views = Bool(True, iotype='in', desc='populate load_cases.cases with views of the load case array')
 
     load_cases = VarTree(LoadVectorArrayCaseList(), iotype='out', desc='Load case arrays')
 
     def execute(self):
 
+        if self.array_file != '':
+            self.load_cases.load_array(self.array_file, views=self.views)
+            return
+
+        case_ids = []
+        data = []
         for name in self.case_files:
-            fid = open(name, 'r')
-            case_id = fid.readline().split()[1]
-            data = np.loadtxt(fid)
-            lc = LoadVectorArray()
-            lc._fromarray(data)
-            self.load_cases.cases.append(lc.copy())
+            with open(name, 'r') as fid:
+                case_ids.append(fid.readline().split()[1])
+                data.append(np.loadtxt(fid))
+
+        if len(set(d.shape for d in data)) > 1:
+            # cases with different spanwise discretizations cannot be stacked
+            self.load_cases.cases = []
+            for case_id, d in zip(case_ids, data):
+                lc = LoadVectorArray()
+                lc.case_id = case_id
+                lc._fromarray(d)
+                self.load_cases.cases.append(lc)
+            return
+
+        self.load_cases.set_array(np.array(data), case_ids, views=self.views)
 
 
 @implement_base(LoadCaseReaderBase)
@@ -52,6 +77,7 @@ class DTU10MWLoadCaseReader(Component):
     case_files = List(iotype='in', desc='List of load case files')
     case_filter = List(iotype='in', desc='List of cases indices to include, if empty all are used')
     blade_length = Float(86.366, iotype='in')
+    views = Bool(True, iotype='in', desc='populate load_cases.cases with views of the load case array')
 
     load_cases = VarTree(LoadVectorArrayCaseList(), iotype='out', desc='Load case arrays')
 
@@ -61,13 +87,13 @@ class DTU10MWLoadCaseReader(Component):
 
         r = []
         for name in self.case_files:
-            fid = open(name, 'r')
-            fid.readline()
-            radius = fid.readline().split()[4]
-            radius = float(radius.strip('r='))
-            r.append(radius)
-            fid.readline()
-            rdata.append(np.loadtxt(fid))
+            with open(name, 'r') as fid:
+                fid.readline()
+                radius = fid.readline().split()[4]
+                radius = float(radius.strip('r='))
+                r.append(radius)
+                fid.readline()
+                rdata.append(np.loadtxt(fid))
 
         isort = np.argsort(r)
         r = np.asarray(r)[isort]
@@ -77,17 +103,11 @@ class DTU10MWLoadCaseReader(Component):
         if len(self.case_filter) == 0:
             self.case_filter = range(rdata.shape[1])
 
-        for i in self.case_filter:
-            c = np.zeros((rdata.shape[0], 9))
-            c[:, 0] = r
-            c[:, 1:] = rdata[:, i, :] * 1.e6
-            v = LoadVectorArray()
-            try:
-                v.case_id = cases[i]
-            except:
-                v.case_id = 'case%03d' % i
-            v._fromarray(c)
-            self.load_cases.cases.append(v)
+        data = np.zeros((len(self.case_filter), rdata.shape[0], 9))
+        data[:, :, 0] = r
+        data[:, :, 1:] = rdata[:, self.case_filter, :].swapaxes(0, 1) * 1.e6
+        case_ids = ['case%03d' % i for i in self.case_filter]
+        self.load_cases.set_array(data, case_ids, views=self.views)
 
 
 class LoadCaseInterpolator(Component):
@@ -97,27 +117,38 @@ class LoadCaseInterpolator(Component):
 
     s = Array(iotype='in', desc='radial positions to interpolate load cases onto')
     lcIn = VarTree(LoadVectorArrayCaseList(), iotype='in', desc='Load case arrays')
+    create_cases = Bool(True, iotype='in', desc='create the lcOut list of LoadVectorCaseList objects')
 
     lcOut = List(LoadVectorCaseList, iotype='out', desc='List of 2D cases interpolated onto s')
+    lcOutArray = Array(iotype='out', desc='Load cases interpolated onto s of size ((len(s), n_cases, 9))')
 
     def execute(self):
 
+        self.lcOutArray = self.lcIn.interp_array(self.s)
+
         self.lcOut = []
-        for i, s in enumerate(self.s):
-            self.lcOut.append(self.lcIn._interp_s(s))
+        if self.create_cases:
+            case_ids = self.lcIn.get_case_ids()
+            for i, s in enumerate(self.s):
+                self.lcOut.append(self.lcIn._case_list(s, self.lcOutArray[i], case_ids))
 
 
 class LoadCaseWriter(Component):
 
     file_base = Str('extreme_loads', iotype='in')
+    file_format = Enum('text', ('text', 'npy'), iotype='in',
+                       desc='write one text file per case or a single binary file')
     load_cases = VarTree(LoadVectorArrayCaseList(), iotype='in', desc='Load case arrays')
 
     def execute(self):
 
-        for i, case in enumerate(self.load_cases.cases):
-
-            fid = file(self.file_base + '%03d.dat' % i, 'w')
-            fid.write('# %s\n' % case.case_id)
-            lc2d = case._toarray()
-            np.savetxt(fid, lc2d[:, :])
+        if self.file_format == 'npy':
+            self.load_cases.save_array(self.file_base)
+            return
 
+        for i in range(self.load_cases.n_cases):
+            case = self.load_cases.get_case(i)
+            with open(self.file_base + '%03d.dat' % i, 'w') as fid:
+                fid.write('# %s\n' % case.case_id)
+                lc2d = case._toarray()
+                np.savetxt(fid, lc2d[:, :])
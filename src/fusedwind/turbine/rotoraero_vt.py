@@ -4,6 +4,7 @@ from openmdao.main.api import VariableTree
 from openmdao.lib.datatypes.api import Int, Float, Array, List, Str, Enum, Bool, VarTree, Dict
 
 from fusedwind.interface import base, implement_base
+from fusedwind.lib.utilities import interp_weights
 
 
 @base
@@ -285,10 +286,9 @@ class LoadVectorArray(VariableTree):
 
     def _interp_s(self, s):
 
-        cn = np.zeros(9)
         arr = self._toarray()
-        for i in range(9):
-            cn[i] = np.interp(s, self.s, arr[:, i])
+        i, w = interp_weights(s, self.s)
+        cn = (1. - w) * arr[i] + w * arr[i + 1]
 
         vt = LoadVector()
         vt.case_id = self.case_id
@@ -300,8 +300,222 @@ class LoadVectorArray(VariableTree):
 class LoadVectorArrayCaseList(VariableTree):
     """
     List of load vector cases as function of span
+
+    The cases can either be stored as a list of LoadVectorArray's or
+    be backed by one contiguous array of size ((n_cases, n_s, 9)),
+    optionally memory-mapped from a binary file, see set_array and
+    load_array. In the latter case the LoadVectorArray's are views
+    into the array, created on demand with get_case unless
+    the ``cases`` list is populated explicitly. Assigning or modifying
+    the ``cases`` list discards the array, after which the list is the
+    only source of the load cases.
     """
     cases = List(LoadVectorArray, desc='List of load cases')
+    case_ids = List(desc='Case identifiers of the array backed load cases')
+
+    def __init__(self, *args, **kwargs):
+        super(LoadVectorArrayCaseList, self).__init__(*args, **kwargs)
+
+        self._data = None
+
+    def _cases_changed(self, old, new):
+
+        self._data = None
+
+    def _cases_items_changed(self, event):
+
+        self._data = None
+
+    @property
+    def n_cases(self):
+        """number of load cases"""
+
+        if self._data is not None:
+            return self._data.shape[0]
+        return len(self.cases)
+
+    def set_array(self, data, case_ids=None, views=True):
+        """
+        set the load cases from an array
+
+        Parameters
+        ----------
+        data: array
+            load cases of size ((n_cases, n_s, 9)) with the columns
+            s, Fx, Fy, Fz, Fres, Mx, My, Mz, Mres
+        case_ids: list
+            optional list of case identifiers
+        views: bool
+            populate the ``cases`` list with LoadVectorArray views of
+            the array. Set to False for very large numbers of cases.
+        """
+
+        if case_ids is None:
+            case_ids = ['case%03d' % i for i in range(data.shape[0])]
+        self.case_ids = list(case_ids)
+        self._data = data
+        cases = []
+        if views:
+            cases = [self._view(i) for i in range(data.shape[0])]
+        # assigning the cases discards the array, so it is set again
+        self.cases = cases
+        self._data = data
+
+    def get_array(self):
+        """
+        returns
+        -------
+        data: array
+            load cases of size ((n_cases, n_s, 9)), stacked from the ``cases``
+            list if the case list is not array backed
+        """
+
+        if self._data is not None:
+            return self._data
+        return np.array([case._toarray() for case in self.cases])
+
+    def get_case(self, i):
+        """
+        returns
+        -------
+        case: LoadVectorArray
+            load case i, a view into the array for array backed case lists
+        """
+
+        if self._data is None:
+            return self.cases[i]
+        if len(self.cases) == self._data.shape[0]:
+            return self.cases[i]
+        return self._view(i)
+
+    def _view(self, i):
+        """
+        LoadVectorArray view of case i of the array
+        """
+
+        lc = LoadVectorArray()
+        lc.case_id = self.case_ids[i]
+        lc._fromarray(self._data[i])
+        return lc
+
+    def save_array(self, filebase):
+        """
+        save the load cases to the binary file <filebase>.npy and
+        the case identifiers to <filebase>.ids
+
+        Parameters
+        ----------
+        filebase: str
+            base name of the files
+        """
+
+        np.save(filebase + '.npy', self.get_array())
+        if self._data is None:
+            case_ids = [case.case_id for case in self.cases]
+        else:
+            case_ids = self.case_ids
+        with open(filebase + '.ids', 'w') as fid:
+            fid.write('\n'.join(case_ids) + '\n')
+
+    def load_array(self, filebase, mmap_mode='r', views=False):
+        """
+        load the load cases saved with save_array
+
+        Parameters
+        ----------
+        filebase: str
+            base name of the files
+        mmap_mode: str
+            memory-map mode passed to numpy.load, set to None to read
+            the whole array into memory
+        views: bool
+            populate the ``cases`` list with LoadVectorArray views of the array
+        """
+
+        data = np.load(filebase + '.npy', mmap_mode=mmap_mode)
+        try:
+            with open(filebase + '.ids', 'r') as fid:
+                case_ids = fid.read().splitlines()
+        except IOError:
+            case_ids = None
+        self.set_array(data, case_ids, views=views)
+
+    def get_case_ids(self):
+        """
+        returns
+        -------
+        case_ids: list
+            list of case identifiers
+        """
+
+        if self._data is not None:
+            return list(self.case_ids)
+        return [case.case_id for case in self.cases]
+
+    def interp_array(self, s):
+        """
+        interpolate all load cases at the locations ``s``
+
+        The bracketing indices and weights are computed once for all
+        cases when the cases share the same spanwise discretization.
+        Cases with different numbers of stations are interpolated one
+        by one.
+
+        Parameters
+        ----------
+        s: array
+            curve fractions at which to interpolate the data
+
+        Returns
+        -------
+        data: array
+            interpolated load cases of size ((len(s), n_cases, 9))
+        """
+
+        s = np.atleast_1d(s)
+        if self.n_cases == 0:
+            return np.zeros((s.shape[0], 0, 9))
+        if self._data is None:
+            arrays = [case._toarray() for case in self.cases]
+            if len(set(arr.shape[0] for arr in arrays)) > 1:
+                # cases with different spanwise discretizations cannot be stacked
+                lc = np.zeros((s.shape[0], len(arrays), 9))
+                for k, arr in enumerate(arrays):
+                    i, w = interp_weights(s, arr[:, 0])
+                    w = w[:, np.newaxis]
+                    lc[:, k] = (1. - w) * arr[i] + w * arr[i + 1]
+                return lc
+            data = np.array(arrays)
+        else:
+            data = self._data
+        sp = data[:, :, 0]
+        if np.all(sp == sp[0]):
+            i, w = interp_weights(s, sp[0])
+            w = w[:, np.newaxis, np.newaxis]
+            return ((1. - w) * data[:, i].swapaxes(0, 1) +
+                    w * data[:, i + 1].swapaxes(0, 1))
+
+        lc = np.zeros((s.shape[0], data.shape[0], 9))
+        for k in range(data.shape[0]):
+            i, w = interp_weights(s, sp[k])
+            w = w[:, np.newaxis]
+            lc[:, k] = (1. - w) * data[k, i] + w * data[k, i + 1]
+        return lc
+
+    def _case_list(self, s, data, case_ids):
+        """
+        create a LoadVectorCaseList at ``s`` from an array of size ((n_cases, 9))
+        """
+
+        lc2d = LoadVectorCaseList()
+        lc2d.s = s
+        for case_id, d in zip(case_ids, data):
+            vt = LoadVector()
+            vt.case_id = case_id
+            vt._fromarray(d)
+            lc2d.cases.append(vt)
+
+        return lc2d
 
     def _interp_s(self, s):
         """
@@ -318,12 +532,7 @@ class LoadVectorArrayCaseList(VariableTree):
             Variable tree containing list of cases at ``s``
         """
 
-        lc2d = LoadVectorCaseList()
-        lc2d.s = s
-        for case in self.cases:
-            lc2d.cases.append(case._interp_s(s))
-
-        return lc2d
+        return self._case_list(s, self.interp_array(s)[0], self.get_case_ids())
 
 
 @base